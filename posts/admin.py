@@ -1,16 +1,179 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.shortcuts import render
+from django.utils.functional import cached_property
 
-from .models import Group, Post, Comment, Follow
+from . import bulk, counters, deletion
+from .models import Group, Post, Comment, DeletionRequest, Follow, Job
 
 
-class PostAdmin(admin.ModelAdmin):
+class CappedCountPaginator(Paginator):
+    """
+    Не считает COUNT(*) по всей таблице: считается не больше
+    COUNT_LIMIT строк, дальние страницы открываются фильтрами
+    и иерархией дат.
+    """
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        return self.object_list.values("pk")[:self.COUNT_LIMIT].count()
+
+
+class PostCountPaginator(CappedCountPaginator):
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            # Без фильтров число постов известно из счётчика
+            return counters.for_all().value()
+        return super().count
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(Group.objects.all(), required=False,
+                                   empty_label="Без группы",
+                                   label="Группа")
+    whole_authors = forms.BooleanField(
+        required=False, label="Все посты авторов выбранных постов")
+
+
+class BackgroundDeleteMixin:
+    """
+    Удаление в фоне вместо стандартного: объект сразу скрывается,
+    а каскад удаляется пачками (posts.deletion).
+    """
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление собирает все объекты в память и в одну
+        # транзакцию
+        actions.pop("delete_selected", None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        # Страница подтверждения не собирает весь каскад: удалится он
+        # в фоне
+        described = [deletion.describe(obj) for obj in objs]
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        return described, model_count, set(), []
+
+    def delete_model(self, request, obj):
+        # Кнопка «Удалить» на странице объекта
+        deletion.request(obj, request.user)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            deletion.request(obj, request.user)
+
+    def delete_in_background(self, request, queryset):
+        for obj in queryset:
+            deletion.request(obj, request.user)
+        self.message_user(request, f"Поставлено на удаление: "
+                                   f"{len(queryset)}")
+    delete_in_background.short_description = "Скрыть и удалить в фоне"
+
+
+class PostAdmin(BackgroundDeleteMixin, admin.ModelAdmin):
     list_display = ("pk", "text", "pub_date", "author", "group")
+    list_select_related = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date", "group")
+    date_hierarchy = "pub_date"
+    autocomplete_fields = ("author", "group")
+    show_full_result_count = False
+    paginator = PostCountPaginator
+    actions = ("delete_in_background", "delete_authors_posts",
+               "move_to_group")
     empty_value_display = "-пусто-"
 
+    @staticmethod
+    def authors_posts(queryset):
+        # id авторов читаются сразу: подзапрос опустел бы после первой
+        # удалённой пачки
+        authors = queryset.order_by().values_list("author_id", flat=True)
+        return Post.objects.filter(author_id__in=list(authors.distinct()))
+
+    def delete_authors_posts(self, request, queryset):
+        # Как и delete_in_background: посты сразу скрываются, а удаляются
+        # с картинками в фоне
+        posts = list(self.authors_posts(queryset).only("pk", "text"))
+        for post in posts:
+            deletion.request(post, request.user)
+        self.message_user(request, f"Поставлено на удаление: {len(posts)}")
+    delete_authors_posts.short_description = ("Скрыть и удалить в фоне все "
+                                              "посты авторов выбранных "
+                                              "постов")
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(request.POST if "apply" in request.POST
+                               else None)
+        if form.is_valid():
+            if form.cleaned_data["whole_authors"]:
+                queryset = self.authors_posts(queryset)
+            moved = bulk.move_posts(queryset, form.cleaned_data["group"])
+            self.message_user(request, f"Перенесено постов: {moved}")
+            return None
+        return render(request, "admin/posts/move_to_group.html", {
+            **self.admin_site.each_context(request),
+            "title": "Перенос постов в группу",
+            "opts": self.model._meta,
+            "form": form,
+            "selected": request.POST.getlist(admin.ACTION_CHECKBOX_NAME),
+            "select_across": request.POST.get("select_across", "0"),
+        })
+    move_to_group.short_description = "Перенести в группу пачками"
+
+
+class GroupAdmin(BackgroundDeleteMixin, admin.ModelAdmin):
+    list_display = ("pk", "title", "slug")
+    actions = ("delete_in_background",)
+    search_fields = ("title", "slug")
+    prepopulated_fields = {"slug": ("title",)}
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ("pk", "text", "post", "author", "created")
+    list_select_related = ("post", "author")
+    search_fields = ("text",)
+    raw_id_fields = ("post",)
+    autocomplete_fields = ("author",)
+    show_full_result_count = False
+    paginator = CappedCountPaginator
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ("pk", "user", "author")
+    list_select_related = ("user", "author")
+    autocomplete_fields = ("user", "author")
+    show_full_result_count = False
+    paginator = CappedCountPaginator
+
+
+class BackgroundDeleteUserAdmin(BackgroundDeleteMixin, UserAdmin):
+    actions = ("delete_in_background",)
+
+
+class DeletionRequestAdmin(admin.ModelAdmin):
+    list_display = ("pk", "kind", "label", "status", "stage", "progress",
+                    "created", "finished")
+    list_filter = ("status", "kind")
+    readonly_fields = ("kind", "object_id", "label", "requested_by",
+                       "status", "stage", "progress", "created", "finished")
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "status", "priority", "attempts",
+                    "run_at", "created")
+    list_filter = ("status", "name")
+
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(Job, JobAdmin)
+admin.site.register(DeletionRequest, DeletionRequestAdmin)
+admin.site.unregister(get_user_model())
+admin.site.register(get_user_model(), BackgroundDeleteUserAdmin)
@@ -0,0 +1,71 @@
+"""
+Массовые операции над постами для админки: удаление и перенос в другую
+группу пачками по ADMIN_BULK_BATCH_SIZE, каждая пачка — отдельная
+транзакция. Так миллион постов не держит одну огромную транзакцию
+и блокировки, а прерванную операцию можно просто запустить снова.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from . import counters, fragments, group_stats
+from .models import Post, PostScore
+
+
+def chunks(queryset, size=None):
+    """
+    id объектов queryset пачками по возрастанию первичного ключа.
+    """
+    size = size or settings.ADMIN_BULK_BATCH_SIZE
+    ids = queryset.order_by("pk").values_list("pk", flat=True)
+    last_pk = 0
+    while True:
+        batch = list(ids.filter(pk__gt=last_pk)[:size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1]
+
+
+def delete_posts(queryset, size=None):
+    """
+    Удаляет посты queryset пачками. Возвращает число удалённых постов.
+    """
+    deleted = 0
+    for batch in chunks(queryset, size):
+        with transaction.atomic():
+            _, per_model = Post.objects.filter(pk__in=batch).delete()
+        deleted += per_model.get(Post._meta.label, 0)
+    return deleted
+
+
+def move_posts(queryset, group, size=None):
+    """
+    Переносит посты queryset в group (None — без группы) пачками.
+    update() не шлёт сигналов, поэтому счётчики, сводки групп, рейтинги
+    и версии страниц постов обновляются здесь. Возвращает число постов.
+    """
+    group_id = group.pk if group is not None else None
+    moved = 0
+    for batch in chunks(queryset, size):
+        with transaction.atomic():
+            posts = Post.objects.filter(pk__in=batch)
+            if group_id is None:
+                posts = posts.filter(group__isnull=False)
+            else:
+                posts = posts.exclude(group_id=group_id)
+            old_groups = Counter(posts.values_list("group_id", flat=True))
+            count = posts.update(group_id=group_id)
+            PostScore.objects.filter(post_id__in=batch).update(
+                group_id=group_id)
+        for old_group, number in old_groups.items():
+            if old_group is not None:
+                counters.change(-number, [counters.key("group", old_group)])
+        if group_id is not None:
+            counters.change(count, [counters.key("group", group_id)])
+        group_stats.refresh([pk for pk in set(old_groups) | {group_id}
+                             if pk is not None])
+        fragments.bump(*batch)
+        moved += count
+    return moved
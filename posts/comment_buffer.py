@@ -0,0 +1,315 @@
+"""
+Отложенная пакетная запись комментариев (write-behind).
+
+Провалидированные комментарии складываются в очередь процесса и пишутся
+в базу одним ``bulk_create`` при достижении BATCH_SIZE или по таймеру
+FLUSH_INTERVAL. Пока комментарий ждёт записи, автор видит его через
+оверлей в кеше: у каждого комментария свой ключ-слот, номер которого
+выдаёт атомарный ``incr`` счётчика поста и автора, а после записи
+удаляются только слоты записанных комментариев. Журнал на диске
+позволяет дописать очередь после падения процесса командой
+``manage.py flush_comments``.
+
+Если запись пакета не удалась, пакет возвращается в очередь, а его журнал
+остаётся на диске до успешной записи: таймер повторит попытку. Каждая
+запись журнала несёт свой id (Comment.buffer_id), поэтому повторная
+запись журнала пропускает только уже записанные комментарии, а не все
+с тем же текстом.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import fragments, trending
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": False,
+    "BATCH_SIZE": 50,
+    "FLUSH_INTERVAL": 2.0,
+    # none — без журнала, journal — запись в файл, fsync — fsync на каждую
+    # запись
+    "DURABILITY": "journal",
+    "JOURNAL_DIR": None,
+    "OVERLAY_TIMEOUT": 5 * 60,
+}
+
+
+def get_option(name):
+    return getattr(settings, "COMMENT_BUFFER", {}).get(name, DEFAULTS[name])
+
+
+def is_enabled():
+    return get_option("ENABLED")
+
+
+def journal_dir():
+    return get_option("JOURNAL_DIR") or os.path.join(settings.BASE_DIR,
+                                                     "comment_journal")
+
+
+def overlay_key(post_id, author_id):
+    """
+    Счётчик слотов оверлея: сколько комментариев автор поставил в очередь
+    к посту.
+    """
+    return f"comments:pending:{post_id}:{author_id}"
+
+
+def slot_key(post_id, author_id, slot):
+    return f"{overlay_key(post_id, author_id)}:{slot}"
+
+
+def take_slot(post_id, author_id):
+    key = overlay_key(post_id, author_id)
+    timeout = get_option("OVERLAY_TIMEOUT")
+    cache.add(key, 0, timeout)
+    try:
+        slot = cache.incr(key)
+    except ValueError:
+        # Счётчик истёк между add и incr
+        cache.add(key, 0, timeout)
+        slot = cache.incr(key)
+    # incr не продлевает срок: счётчик должен пережить свои слоты
+    cache.touch(key, timeout)
+    return slot
+
+
+def live_entries(entries):
+    """
+    Отбрасывает комментарии к постам, удалённым за время ожидания.
+    """
+    post_ids = set(Post.objects.filter(
+        id__in={entry["post_id"] for entry in entries}
+    ).values_list("id", flat=True))
+    return [entry for entry in entries if entry["post_id"] in post_ids]
+
+
+def to_comment(entry):
+    return Comment(post_id=entry["post_id"], author_id=entry["author_id"],
+                   text=entry["text"],
+                   created=parse_datetime(entry["created"]),
+                   buffer_id=entry.get("id"))
+
+
+class CommentBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+        self.journal = None
+        self.journal_path = None
+        # Журналы пакетов, которые ещё не удалось записать
+        self.flushing = []
+        self.last_flush = time.monotonic()
+        self.timer = None
+
+    def add(self, comment):
+        """
+        Ставит несохранённый комментарий в очередь на запись.
+        """
+        entry = {"id": uuid.uuid4().hex,
+                 "post_id": comment.post_id,
+                 "author_id": comment.author_id,
+                 "text": comment.text,
+                 "created": timezone.now().isoformat()}
+        # Слот заполняется до постановки в очередь: иначе запись пакета
+        # могла бы удалить его раньше, чем он появится
+        entry["slot"] = take_slot(entry["post_id"], entry["author_id"])
+        cache.set(slot_key(entry["post_id"], entry["author_id"],
+                           entry["slot"]),
+                  entry, get_option("OVERLAY_TIMEOUT"))
+        with self.lock:
+            self.entries.append(entry)
+            self.write_journal(entry)
+            size = len(self.entries)
+        self.start_timer()
+        interval = get_option("FLUSH_INTERVAL")
+        if (size >= get_option("BATCH_SIZE") or
+                interval is not None and
+                time.monotonic() - self.last_flush >= interval):
+            self.try_flush()
+
+    def flush(self):
+        """
+        Записывает накопленную очередь одной транзакцией.
+        """
+        with self.lock:
+            entries, self.entries = self.entries, []
+            flushing = self.rotate_journal()
+            if flushing:
+                self.flushing.append(flushing)
+            journals, self.flushing = self.flushing, []
+            self.last_flush = time.monotonic()
+        if not entries:
+            return 0
+        try:
+            with transaction.atomic():
+                # bulk_create не шлёт сигналов: рейтинг и версии страниц
+                # постов обновляем сами
+                comments = Comment.objects.bulk_create(
+                    [to_comment(entry) for entry in live_entries(entries)],
+                    batch_size=get_option("BATCH_SIZE"))
+                trending.record((comment.post_id, comment.created)
+                                for comment in comments)
+        except Exception:
+            # Возвращаем пакет в начало очереди, журналы не трогаем
+            with self.lock:
+                self.entries[:0] = entries
+                self.flushing[:0] = journals
+            raise
+        fragments.bump(*{comment.post_id for comment in comments})
+        for path in journals:
+            os.remove(path)
+        # Только слоты записанных: комментарии, поставленные в очередь
+        # во время записи, автор должен видеть и дальше
+        cache.delete_many([slot_key(entry["post_id"], entry["author_id"],
+                                    entry["slot"])
+                           for entry in entries if "slot" in entry])
+        return len(entries)
+
+    def try_flush(self):
+        """
+        flush, после ошибки которого комментарии остаются в очереди
+        до следующей попытки.
+        """
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Не удалось записать %d комментариев",
+                             len(self.entries))
+
+    def write_journal(self, entry):
+        durability = get_option("DURABILITY")
+        if durability == "none":
+            return
+        if self.journal is None:
+            directory = journal_dir()
+            os.makedirs(directory, exist_ok=True)
+            self.journal_path = os.path.join(
+                directory, f"comments-{os.getpid()}.jsonl")
+            self.journal = open(self.journal_path, "a", encoding="utf-8")
+        self.journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.journal.flush()
+        if durability == "fsync":
+            os.fsync(self.journal.fileno())
+
+    def rotate_journal(self):
+        """
+        Переименовывает текущий журнал, чтобы новые записи шли в новый файл,
+        пока идёт запись пакета. Возвращает путь к отложенному журналу.
+        """
+        if self.journal is None:
+            return None
+        self.journal.close()
+        self.journal = None
+        flushing = f"{self.journal_path}.{time.time_ns()}.flushing"
+        os.rename(self.journal_path, flushing)
+        return flushing
+
+    def start_timer(self):
+        interval = get_option("FLUSH_INTERVAL")
+        if interval is None or self.timer is not None:
+            return
+        self.timer = threading.Thread(target=self.run_timer, args=(interval,),
+                                      daemon=True)
+        self.timer.start()
+
+    def run_timer(self, interval):
+        while True:
+            time.sleep(interval)
+            if self.entries:
+                close_old_connections()
+                self.try_flush()
+
+
+buffer = CommentBuffer()
+atexit.register(lambda: buffer.entries and buffer.flush())
+
+
+def submit(comment):
+    """
+    Сохраняет комментарий сразу или через очередь, если она включена.
+    """
+    if is_enabled():
+        buffer.add(comment)
+    else:
+        comment.save()
+
+
+def pending(post, user):
+    """
+    Комментарии пользователя к посту, ещё не записанные в базу.
+    """
+    if not is_enabled() or not user.is_authenticated:
+        return []
+    count = cache.get(overlay_key(post.id, user.id), 0)
+    keys = [slot_key(post.id, user.id, slot)
+            for slot in range(1, count + 1)]
+    found = cache.get_many(keys)
+    comments = [to_comment(found[key]) for key in keys if key in found]
+    for comment in comments:
+        comment.author = user
+    return list(reversed(comments))
+
+
+def replay_journals(directory=None, include_live=False):
+    """
+    Дописывает в базу журналы упавших процессов. Уже записанные комментарии
+    (тот же buffer_id; в старых журналах без id — тот же пост, автор
+    и текст) пропускаются. Возвращает число вставок.
+    """
+    directory = directory or journal_dir()
+    inserted = 0
+    for path in sorted(glob.glob(os.path.join(directory, "comments-*"))):
+        pid = int(os.path.basename(path).split("-")[1].split(".")[0])
+        if pid == os.getpid() or not include_live and is_alive(pid):
+            continue
+        with open(path, encoding="utf-8") as journal:
+            entries = [json.loads(line) for line in journal if line.strip()]
+        with transaction.atomic():
+            written = {str(buffer_id) for buffer_id in
+                       Comment.objects.filter(buffer_id__in=[
+                           uuid.UUID(entry["id"]) for entry in entries
+                           if "id" in entry]).values_list("buffer_id",
+                                                          flat=True)}
+            new = [to_comment(entry) for entry in live_entries(entries)
+                   if not is_written(entry, written)]
+            Comment.objects.bulk_create(new,
+                                        batch_size=get_option("BATCH_SIZE"))
+            trending.record((comment.post_id, comment.created)
+                            for comment in new)
+        fragments.bump(*{comment.post_id for comment in new})
+        os.remove(path)
+        inserted += len(new)
+    return inserted
+
+
+def is_written(entry, written):
+    if "id" in entry:
+        return str(uuid.UUID(entry["id"])) in written
+    return Comment.objects.filter(
+        post_id=entry["post_id"], author_id=entry["author_id"],
+        text=entry["text"]).exists()
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
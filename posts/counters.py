@@ -0,0 +1,99 @@
+"""
+Счётчики постов по областям (весь сайт, группа, автор, лента подписок)
+для пагинатора вместо COUNT(*) на каждый запрос.
+
+Счётчики лежат в общем кеше и меняются сигналами при создании, удалении
+и смене группы поста. Промах кеша считается одним COUNT и сохраняется
+на COUNTERS_TIMEOUT, так что возможный дрейф ограничен этим временем.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Follow, Post
+
+
+def key(scope, scope_id=None):
+    if scope_id is None:
+        return f"count:posts:{scope}"
+    return f"count:posts:{scope}:{scope_id}"
+
+
+class Counter:
+    def __init__(self, cache_key, queryset):
+        self.cache_key = cache_key
+        self.queryset = queryset
+
+    def value(self):
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = self.queryset.count()
+            cache.add(self.cache_key, count, settings.COUNTERS_TIMEOUT)
+        return count
+
+    def correct(self, count):
+        cache.set(self.cache_key, count, settings.COUNTERS_TIMEOUT)
+
+
+class FeedCounter(Counter):
+    """
+    Лента подписок: сумма счётчиков авторов, на которых подписан
+    пользователь. Промахи досчитываются одним GROUP BY.
+    """
+    def __init__(self, user):
+        super().__init__(None, Post.objects.filter(
+            author__following__user=user))
+        self.user = user
+
+    def value(self):
+        author_ids = list(Follow.objects.filter(
+            user=self.user).values_list("author_id", flat=True))
+        keys = {key("author", author_id): author_id
+                for author_id in author_ids}
+        counts = cache.get_many(keys)
+        missing = [author_id for cache_key, author_id in keys.items()
+                   if cache_key not in counts]
+        if missing:
+            found = dict(Post.objects.filter(author_id__in=missing).order_by(
+            ).values_list("author").annotate(count=Count("id")))
+            loaded = {key("author", author_id): found.get(author_id, 0)
+                      for author_id in missing}
+            cache.set_many(loaded, settings.COUNTERS_TIMEOUT)
+            counts.update(loaded)
+        return sum(counts.values())
+
+    def correct(self, count):
+        # Сумма по авторам исправится сама, когда истекут их счётчики
+        pass
+
+
+def for_all():
+    return Counter(key("all"), Post.objects.all())
+
+
+def for_group(group):
+    return Counter(key("group", group.pk), group.posts.all())
+
+
+def for_author(author):
+    return Counter(key("author", author.pk), author.posts.all())
+
+
+def for_feed(user):
+    return FeedCounter(user)
+
+
+def change(delta, scopes):
+    for cache_key in scopes:
+        try:
+            cache.incr(cache_key, delta)
+        except ValueError:
+            # Счётчика нет в кеше: его посчитают при первом чтении
+            pass
+
+
+def post_scopes(author_id, group_id):
+    scopes = [key("all"), key("author", author_id)]
+    if group_id is not None:
+        scopes.append(key("group", group_id))
+    return scopes
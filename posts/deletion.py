@@ -0,0 +1,239 @@
+"""
+Фоновое удаление пользователей, групп и больших постов.
+
+``request`` создаёт DeletionRequest и сразу скрывает объект: удаляемый
+пользователь больше не может войти, его посты и удаляемые посты пропадают
+из лент, страницы пользователя и группы отвечают 404. Затем задача
+``process_deletion`` (или команда ``manage.py process_deletions``)
+удаляет зависимые строки пачками по BATCH_SIZE — каждая пачка своей
+транзакцией — и только в конце сам объект, каскад которого к этому
+времени пуст. Картинки постов и их миниатюры удаляются после коммита
+пачки.
+
+Каждый шаг заново выбирает оставшиеся строки, поэтому прерванное
+удаление продолжается с того же места простым повторным запуском.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
+from sorl import thumbnail
+
+from . import bulk, fragments, jobs
+from .bulk import chunks
+from .models import (Comment, DeletionRequest, Follow, Group, Notification,
+                     Post, Recommendation, User)
+
+DEFAULTS = {
+    "BATCH_SIZE": 500,
+    # Сколько секунд задача удаляет, прежде чем уступить очередь
+    "JOB_TIME_LIMIT": 60,
+    # forget_hidden сбрасывает набор только в своём кеше: при кеше
+    # в памяти процесса другие процессы увидят новое удаление не позже,
+    # чем через столько секунд
+    "HIDDEN_TIMEOUT": 5,
+}
+
+HIDDEN_KEY = "deletion:hidden"
+
+KINDS = {
+    User: DeletionRequest.USER,
+    Group: DeletionRequest.GROUP,
+    Post: DeletionRequest.POST,
+}
+
+
+def get_option(name):
+    return getattr(settings, "DELETION", {}).get(name, DEFAULTS[name])
+
+
+def hidden():
+    """
+    id объектов, ожидающих удаления: {тип: множество id}.
+    """
+    found = cache.get(HIDDEN_KEY)
+    if found is None:
+        found = {kind: set() for kind, _ in DeletionRequest.KINDS}
+        for kind, object_id in DeletionRequest.objects.filter(
+                status=DeletionRequest.PENDING).values_list("kind",
+                                                            "object_id"):
+            found[kind].add(object_id)
+        cache.set(HIDDEN_KEY, found, get_option("HIDDEN_TIMEOUT"))
+    return found
+
+
+def forget_hidden():
+    cache.delete(HIDDEN_KEY)
+    # И после коммита: иначе другой запрос мог успеть закешировать
+    # старый набор
+    transaction.on_commit(lambda: cache.delete(HIDDEN_KEY))
+
+
+def is_hidden(kind, object_id):
+    return object_id in hidden()[kind]
+
+
+def check_visible(kind, object_id):
+    if is_hidden(kind, object_id):
+        raise Http404("Объект удаляется")
+
+
+def visible(posts):
+    """
+    Убирает из queryset посты удаляемых авторов и удаляемые посты.
+    """
+    hide = hidden()
+    if hide[DeletionRequest.USER]:
+        posts = posts.exclude(author_id__in=hide[DeletionRequest.USER])
+    if hide[DeletionRequest.POST]:
+        posts = posts.exclude(pk__in=hide[DeletionRequest.POST])
+    return posts
+
+
+def visible_groups(groups):
+    hide = hidden()[DeletionRequest.GROUP]
+    return groups.exclude(pk__in=hide) if hide else groups
+
+
+def visible_posts(posts):
+    """
+    То же для уже загруженного списка постов.
+    """
+    hide = hidden()
+    return [post for post in posts
+            if post.author_id not in hide[DeletionRequest.USER] and
+            post.pk not in hide[DeletionRequest.POST]]
+
+
+def describe(obj):
+    if isinstance(obj, User):
+        return obj.username
+    if isinstance(obj, Group):
+        return obj.slug
+    return f"{obj.pk}: {obj}"
+
+
+def request(obj, requested_by=None):
+    """
+    Скрывает пользователя, группу или пост и ставит удаление в очередь.
+    """
+    kind = KINDS[type(obj)]
+    with transaction.atomic():
+        deletion, created = DeletionRequest.objects.get_or_create(
+            kind=kind, object_id=obj.pk,
+            defaults={"label": describe(obj)[:200],
+                      "requested_by": requested_by})
+        if not created:
+            return deletion
+        if kind == DeletionRequest.USER:
+            # save(), а не update(): сигнал сбрасывает кеш пользователя,
+            # и вошедший пользователь сразу теряет сессию
+            obj.is_active = False
+            obj.save(update_fields=["is_active"])
+        forget_hidden()
+        enqueue(deletion)
+    if kind == DeletionRequest.POST:
+        fragments.bump(obj.pk)
+    return deletion
+
+
+def enqueue(deletion):
+    progress = json.loads(deletion.progress)
+    jobs.enqueue("process_deletion", lane="low",
+                 key=f"deletion:{deletion.pk}:{sum(progress.values())}",
+                 deletion_id=deletion.pk)
+
+
+def delete_rows(model, batch):
+    with transaction.atomic():
+        _, per_model = model.objects.filter(pk__in=batch).delete()
+    return per_model.get(model._meta.label, 0)
+
+
+def delete_posts(model, batch):
+    """
+    Удаляет посты пачки: сначала их комментарии и уведомления пачками,
+    потом сами посты, после коммита — картинки с миниатюрами.
+    """
+    for related in (Comment, Notification):
+        for rows in chunks(related.objects.filter(post_id__in=batch),
+                           get_option("BATCH_SIZE")):
+            delete_rows(related, rows)
+    images = list(Post.objects.filter(pk__in=batch).exclude(
+        image="").exclude(image__isnull=True).values_list("image",
+                                                          flat=True))
+    deleted = bulk.delete_posts(Post.objects.filter(pk__in=batch))
+    for name in images:
+        thumbnail.delete(name)
+    return deleted
+
+
+def detach_posts(model, batch):
+    return bulk.move_posts(Post.objects.filter(pk__in=batch), None)
+
+
+def steps(deletion):
+    """
+    Шаги удаления: (название, оставшиеся строки, обработчик пачки).
+    """
+    pk = deletion.object_id
+    if deletion.kind == DeletionRequest.USER:
+        return [
+            ("notifications", Notification.objects.filter(recipient_id=pk),
+             delete_rows),
+            ("recommendations", Recommendation.objects.filter(
+                Q(user_id=pk) | Q(author_id=pk)), delete_rows),
+            ("follows", Follow.objects.filter(
+                Q(user_id=pk) | Q(author_id=pk)), delete_rows),
+            ("comments", Comment.objects.filter(author_id=pk), delete_rows),
+            ("posts", Post.objects.filter(author_id=pk), delete_posts),
+            ("user", User.objects.filter(pk=pk), delete_rows),
+        ]
+    if deletion.kind == DeletionRequest.GROUP:
+        return [
+            ("posts", Post.objects.filter(group_id=pk), detach_posts),
+            ("group", Group.objects.filter(pk=pk), delete_rows),
+        ]
+    return [
+        ("comments", Comment.objects.filter(post_id=pk), delete_rows),
+        ("notifications", Notification.objects.filter(post_id=pk),
+         delete_rows),
+        ("post", Post.objects.filter(pk=pk), delete_posts),
+    ]
+
+
+def process(deletion, time_limit=None, report=None):
+    """
+    Продолжает удаление с того места, где оно остановилось. Если задан
+    time_limit, останавливается после пачки, на которой он истёк.
+    Возвращает True, если удаление завершено.
+    """
+    started = time.monotonic()
+    progress = json.loads(deletion.progress)
+    for stage, queryset, handler in steps(deletion):
+        for batch in chunks(queryset, get_option("BATCH_SIZE")):
+            progress[stage] = (progress.get(stage, 0) +
+                               handler(queryset.model, batch))
+            deletion.stage = stage
+            deletion.progress = json.dumps(progress)
+            deletion.save(update_fields=["stage", "progress"])
+            if report is not None:
+                report(deletion)
+            if (time_limit is not None and
+                    time.monotonic() - started >= time_limit):
+                return False
+    deletion.status = DeletionRequest.DONE
+    deletion.finished = timezone.now()
+    deletion.save(update_fields=["status", "finished"])
+    forget_hidden()
+    return True
+
+
+def pending():
+    return DeletionRequest.objects.filter(
+        status=DeletionRequest.PENDING).order_by("pk")
@@ -0,0 +1,133 @@
+"""
+Поиск почти одинаковых постов по SimHash.
+
+Текст приводится к виду из posts.moderation, разбивается на слова
+и пары соседних слов, каждая из которых хешируется в 64 бита; SimHash —
+побитовое «голосование» этих хешей. Копии с другим регистром,
+пунктуацией, подменой букв или парой дописанных слов дают хеши,
+отличающиеся в нескольких битах.
+
+Поиск кандидатов идёт по четырём 16-битным полосам хеша (индексы
+в PostFingerprint) среди постов за последние WINDOW секунд, а точное
+расстояние Хэмминга считается только для найденных кандидатов.
+Расстояние DISTANCE больше 3 полосами не гарантируется.
+"""
+import hashlib
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .moderation import normalize
+from .models import PostFingerprint
+
+DEFAULTS = {
+    # off — не проверять, reject — отклонять форму, flag — сохранять пост
+    # и отмечать, на какой пост он похож
+    "MODE": "reject",
+    "DISTANCE": 3,
+    "WINDOW": 24 * 60 * 60,
+    # Короткие тексты слишком часто похожи случайно
+    "MIN_TOKENS": 8,
+}
+WORD_RE = re.compile(r"\w+")
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def get_option(name):
+    return getattr(settings, "NEAR_DUPLICATES", {}).get(name, DEFAULTS[name])
+
+
+def features(text):
+    words = WORD_RE.findall(normalize(text))
+    if len(words) < get_option("MIN_TOKENS"):
+        return []
+    return words + [" ".join(words[i:i + 2]) for i in range(len(words) - 1)]
+
+
+def simhash(text):
+    """
+    64-битный SimHash текста или None для слишком короткого текста.
+    """
+    tokens = features(text)
+    if not tokens:
+        return None
+    votes = [0] * 64
+    for token in tokens:
+        value = int.from_bytes(hashlib.blake2b(
+            token.encode(), digest_size=8).digest(), "big")
+        for bit in range(64):
+            votes[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if votes[bit] > 0)
+
+
+def bands(value):
+    return [value >> (band * BAND_BITS) & BAND_MASK for band in range(BANDS)]
+
+
+def to_signed(value):
+    # BigIntegerField знаковый
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def nearest(value, exclude=None):
+    """
+    id недавнего поста с хешем не дальше DISTANCE от value или None.
+    """
+    if value is None:
+        return None
+    query = Q()
+    for band, band_value in enumerate(bands(value)):
+        query |= Q(**{f"band{band}": band_value})
+    since = timezone.now() - timedelta(seconds=get_option("WINDOW"))
+    candidates = PostFingerprint.objects.filter(query, created__gte=since)
+    if exclude is not None:
+        candidates = candidates.exclude(post_id=exclude)
+    limit = get_option("DISTANCE")
+    for post_id, other in candidates.values_list("post_id", "simhash"):
+        if distance(value, to_unsigned(other)) <= limit:
+            return post_id
+    return None
+
+
+def find(text, exclude=None):
+    """
+    id недавнего поста, почти совпадающего с text, или None.
+    """
+    if get_option("MODE") == "off":
+        return None
+    return nearest(simhash(text), exclude)
+
+
+def make_fingerprint(post, value):
+    band_values = bands(value)
+    return PostFingerprint(
+        post_id=post.pk, simhash=to_signed(value),
+        created=post.pub_date,
+        **{f"band{band}": band_values[band] for band in range(BANDS)})
+
+
+def remember(post):
+    """
+    Сохраняет отпечаток поста; в режиме flag отмечает похожий пост.
+    """
+    value = simhash(post.text)
+    if value is None:
+        PostFingerprint.objects.filter(post_id=post.pk).delete()
+        return
+    fingerprint = make_fingerprint(post, value)
+    if get_option("MODE") == "flag":
+        fingerprint.duplicate_of_id = nearest(value, exclude=post.pk)
+    fingerprint.save()
@@ -1,9 +1,24 @@
 from django import forms
 
+from . import duplicates, moderation
 from .models import Post, Comment
 
 
+def check_text(text):
+    if moderation.find(text) is not None:
+        raise forms.ValidationError("Айяйяй!")
+    return text
+
+
 class PostForm(forms.ModelForm):
+    def clean_text(self):
+        text = check_text(self.cleaned_data["text"])
+        if (duplicates.get_option("MODE") == "reject" and
+                duplicates.find(text, exclude=self.instance.pk) is not None):
+            raise forms.ValidationError(
+                "Почти такой же пост уже опубликован недавно")
+        return text
+
     class Meta:
         model = Post
         fields = ("group", "text", "image")
@@ -14,10 +29,7 @@ class PostForm(forms.ModelForm):
 
 class CommentForm(forms.ModelForm):
     def clean_text(self):
-        data = self.cleaned_data["text"]
-        if "плохой коммент" in data.lower():
-            raise forms.ValidationError("Айяйяй!")
-        return data
+        return check_text(self.cleaned_data["text"])
 
     class Meta:
         model = Comment
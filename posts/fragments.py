@@ -0,0 +1,75 @@
+"""
+Кеш общих частей страницы поста: карточки и списка комментариев.
+
+Ключ фрагмента содержит версию поста (Post.version), которая меняется
+при правке поста, создании и удалении комментария и достройке миниатюр,
+поэтому старые фрагменты не удаляются, а просто перестают читаться
+и истекают сами. Версия хранится в базе и читается вместе с постом:
+её смена в любом процессе, в том числе в run_jobs, сразу видна всем.
+Форма комментария, кнопка подписки и ещё не записанные комментарии
+рисуются в каждом запросе.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.functional import cached_property
+from django.utils.safestring import mark_safe
+
+from yatube import edge_cache
+from . import cards
+from .models import Post
+
+
+def bump(*post_ids):
+    # Время, а не счётчик: сохранение загруженного раньше поста может
+    # вернуть старую версию, и следующая смена не должна с ней совпасть
+    Post.objects.filter(pk__in=post_ids).update(version=time.time_ns())
+
+
+class PostDetail:
+    """
+    Карточка (card) и список комментариев (comments) страницы поста.
+    Фрагменты читаются из кеша или рисуются при первом обращении из
+    шаблона, так что при потоковой отрисовке шапка страницы уходит раньше.
+    Автору кнопка «Редактировать» видна, поэтому для него свой вариант,
+    а в общей странице (yatube.edge_cache) она скрыта до ответа personal/.
+    """
+    def __init__(self, request, post):
+        self.request = request
+        self.post = post
+
+    @cached_property
+    def fragments(self):
+        post = self.post
+        shared = edge_cache.is_shared(self.request)
+        is_author = self.request.user.id == post.author_id
+        key = (f"post:detail:{post.pk}:{post.version}:{int(is_author)}"
+               f"{':shared' if shared else ''}")
+        detail = cache.get(key)
+        if detail is None:
+            cards.prepare([post])
+            detail = {
+                "card": render_to_string(
+                    "includes/card_post.html",
+                    {"post": post, "user": self.request.user,
+                     "edge_cache": shared}),
+                "comments": render_to_string(
+                    "includes/comment_list.html",
+                    {"comments": post.comments.select_related("author")}),
+            }
+            cache.set(key, detail, settings.POST_DETAIL_TIMEOUT)
+        return detail
+
+    @property
+    def card(self):
+        return mark_safe(self.fragments["card"])
+
+    @property
+    def comments(self):
+        return mark_safe(self.fragments["comments"])
+
+
+def post_detail(request, post):
+    return PostDetail(request, post)
@@ -0,0 +1,89 @@
+"""
+Сводка активности групп для каталога /groups/.
+
+Число постов и время последнего поста меняются сигналами при создании
+и удалении постов. Счётчик за последние WINDOW дней сам по себе не
+«стареет», поэтому его пересчитывает команда
+``manage.py refresh_group_stats``, которую нужно запускать периодически.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Group, GroupStats, Post
+
+WINDOW = timedelta(days=7)
+
+SORTS = {
+    "activity": (F("stats__week_posts").desc(nulls_last=True), "title"),
+    "posts": (F("stats__post_count").desc(nulls_last=True), "title"),
+    "recent": (F("stats__last_post_at").desc(nulls_last=True), "title"),
+    "title": ("title",),
+}
+
+
+def refresh(group_ids=None):
+    """
+    Пересчитывает сводку групп (всех или group_ids) двумя GROUP BY.
+    Возвращает число обновлённых групп.
+    """
+    now = timezone.now()
+    groups = Group.objects.all()
+    posts = Post.objects.order_by().values_list("group")
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+        posts = posts.filter(group_id__in=group_ids)
+    totals = {group_id: (count, last) for group_id, count, last in
+              posts.annotate(count=Count("id"), last=Max("pub_date"))}
+    week = dict(posts.filter(pub_date__gte=now - WINDOW).annotate(
+        count=Count("id")))
+    stats = []
+    for group_id in groups.values_list("pk", flat=True):
+        count, last = totals.get(group_id, (0, None))
+        stats.append(GroupStats(group_id=group_id, post_count=count,
+                                last_post_at=last,
+                                week_posts=week.get(group_id, 0),
+                                refreshed=now))
+    with transaction.atomic():
+        existing = set(GroupStats.objects.filter(
+            group_id__in=[item.group_id for item in stats]
+        ).values_list("group_id", flat=True))
+        GroupStats.objects.bulk_update(
+            [item for item in stats if item.group_id in existing],
+            ["post_count", "last_post_at", "week_posts", "refreshed"],
+            batch_size=500)
+        GroupStats.objects.bulk_create(
+            [item for item in stats if item.group_id not in existing],
+            batch_size=500)
+    return len(stats)
+
+
+def post_added(group_id, pub_date):
+    if not GroupStats.objects.filter(group_id=group_id).update(
+            post_count=F("post_count") + 1,
+            week_posts=F("week_posts") + 1,
+            last_post_at=pub_date):
+        refresh([group_id])
+
+
+def post_removed(group_id, pub_date):
+    stats = GroupStats.objects.filter(group_id=group_id)
+    if stats.filter(last_post_at=pub_date).exists():
+        # Удалён последний пост: время предыдущего знает только база
+        refresh([group_id])
+        return
+    changes = {"post_count": Greatest(F("post_count") - 1, 0)}
+    if pub_date >= timezone.now() - WINDOW:
+        changes["week_posts"] = Greatest(F("week_posts") - 1, 0)
+    stats.update(**changes)
+
+
+def directory(sort):
+    """
+    Все группы со сводкой одним запросом, отсортированные по sort.
+    """
+    return Group.objects.select_related("stats").order_by(
+        *SORTS.get(sort, SORTS["activity"]))
@@ -0,0 +1,135 @@
+"""
+Очередь фоновых задач в базе данных.
+
+Задачи регистрируются декоратором ``task`` в модулях ``tasks.py``
+приложений и ставятся в очередь через ``enqueue`` после коммита текущей
+транзакции. Выполняет их команда ``manage.py run_jobs``.
+
+Ключ идемпотентности уникален только среди ждущих и выполняющихся задач:
+при завершении задачи он снимается, и та же работа может быть поставлена
+снова.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "MAX_ATTEMPTS": 5,
+    # Задержка перед повтором: BACKOFF * 2 ** (попытка - 1) секунд
+    "BACKOFF": 10,
+    # Через сколько секунд задача «running» считается брошенной
+    "LOCK_TIMEOUT": 10 * 60,
+}
+
+registry = {}
+
+
+def get_option(name):
+    return getattr(settings, "JOBS", {}).get(name, DEFAULTS[name])
+
+
+def task(name):
+    """
+    Регистрирует функцию как фоновую задачу с именем name.
+    """
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, lane="default", key=None, delay=0, **payload):
+    """
+    Ставит задачу в очередь после коммита текущей транзакции. Пока задача
+    с тем же ключом идемпотентности ждёт или выполняется, новая
+    не создаётся.
+    """
+    def create():
+        try:
+            with transaction.atomic():
+                Job.objects.create(
+                    name=name, payload=json.dumps(payload),
+                    priority=Job.LANES[lane], idempotency_key=key,
+                    max_attempts=get_option("MAX_ATTEMPTS"),
+                    run_at=timezone.now() + timedelta(seconds=delay))
+        except IntegrityError:
+            if key is None:
+                raise
+            logger.info("Задача %s с ключом %s уже в очереди", name, key)
+    transaction.on_commit(create)
+
+
+def claim(limit, lanes=None):
+    """
+    Забирает до limit готовых к запуску задач. Возвращает их id.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=get_option("LOCK_TIMEOUT"))
+    candidates = Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now) |
+        Q(status=Job.RUNNING, locked_at__lt=stale))
+    if lanes:
+        candidates = candidates.filter(
+            priority__in=[Job.LANES[lane] for lane in lanes])
+    claimed = []
+    for job in candidates.order_by("priority", "run_at").values(
+            "id", "status", "locked_at")[:limit]:
+        # Атомарный захват: задачу получит только один исполнитель
+        if Job.objects.filter(
+                pk=job["id"], status=job["status"],
+                locked_at=job["locked_at"]).update(
+                    status=Job.RUNNING, locked_at=now,
+                    attempts=F("attempts") + 1):
+            claimed.append(job["id"])
+    return claimed
+
+
+def run(job_id):
+    """
+    Выполняет захваченную задачу и записывает результат.
+    """
+    autodiscover_modules("tasks")
+    job = Job.objects.get(pk=job_id)
+    try:
+        registry[job.name](**json.loads(job.payload))
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = get_option("BACKOFF") * 2 ** (job.attempts - 1)
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = Job.FAILED
+            job.idempotency_key = None
+        job.save(update_fields=["status", "run_at", "last_error",
+                                "idempotency_key"])
+        return False
+    job.status = Job.DONE
+    job.idempotency_key = None
+    job.save(update_fields=["status", "idempotency_key"])
+    return True
+
+
+def run_pending(lanes=None):
+    """
+    Синхронно выполняет все готовые задачи. Возвращает их число.
+    """
+    done = 0
+    while True:
+        claimed = claim(100, lanes)
+        if not claimed:
+            return done
+        for job_id in claimed:
+            run(job_id)
+            done += 1
@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.template import Context, Engine
+from django.template.backends.django import get_installed_libraries
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Group, Post
+
+# Карточка в том виде, в каком она была до posts.cards: {% url %} и запросы
+# к комментариям на каждый пост
+LEGACY_CARD = """{% load thumbnail %}
+{% thumbnail post.image "960x339" crop="center" upscale=True as im %}
+<img class="card-img" src="{{ im.url }}"/>{% endthumbnail %}
+<a href="{% url 'profile' post.author.username %}">
+@{{ post.author.username }}</a>
+{% if post.group and not group_index %}
+<a href="{% url 'group_list' post.group.slug %}">#{{ post.group.title }}</a>
+{% endif %}{{ post.text|linebreaksbr }}
+{% if post.comments.exists %}Комментариев: {{ post.comments.count }}{% endif %}
+<a href="{% url 'post' post.author.username post.id %}">
+Добавить комментарий</a>
+{% if user == post.author %}
+<a href="{% url 'post_edit' post.author.username post.id %}">Редактировать</a>
+{% endif %}{{ post.pub_date }}"""
+
+PAGES = {
+    "legacy.html": """{% for post in page %}
+{% include "legacy_card.html" with post=post %}{% endfor %}""",
+    "fast.html": """{% load post_cards %}{% post_cards page %}""",
+    "legacy_card.html": LEGACY_CARD,
+}
+
+
+class Command(BaseCommand):
+    help = ("Сравнение стоимости отрисовки карточки поста: include в цикле "
+            "против {% post_cards %}")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        engine = Engine(
+            dirs=settings.TEMPLATES[0]["DIRS"],
+            loaders=[("django.template.loaders.locmem.Loader", PAGES),
+                     "django.template.loaders.filesystem.Loader",
+                     "django.template.loaders.app_directories.Loader"],
+            libraries=get_installed_libraries(),
+        )
+        with transaction.atomic():
+            page = self.create_page(options["posts"])
+            for name in ("legacy.html", "fast.html"):
+                template = engine.get_template(name)
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    for _ in range(options["repeat"]):
+                        # Свежие объекты, чтобы не мерить кеш ORM
+                        posts = list(Post.objects.select_related(
+                            "author", "group").filter(pk__in=page))
+                        template.render(Context({"page": posts,
+                                                 "user": posts[0].author}))
+                    elapsed = time.perf_counter() - start
+                per_card = elapsed / options["repeat"] / len(page)
+                self.stdout.write(
+                    f"{name}: {per_card * 1e6:.0f} мкс на карточку, "
+                    f"{len(queries) // options['repeat']} запросов на "
+                    f"страницу")
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def create_page(count):
+        author = get_user_model().objects.create_user(username="bench_cards")
+        group = Group.objects.create(title="Бенчмарк", slug="bench-cards",
+                                     description="Бенчмарк")
+        Post.objects.bulk_create(
+            Post(text=f"Пост {number}", author=author, group=group)
+            for number in range(count))
+        page = list(Post.objects.filter(author=author).values_list(
+            "pk", flat=True))
+        Comment.objects.bulk_create(
+            Comment(post_id=pk, author=author, text="Комментарий")
+            for pk in page[::2])
+        return page
@@ -0,0 +1,44 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import moderation
+
+LETTERS = "абвгдежзиклмнопрстуфхцчшщэюя"
+
+
+def random_word(rng):
+    return "".join(rng.choice(LETTERS) for _ in range(rng.randint(5, 12)))
+
+
+class Command(BaseCommand):
+    help = ("Стоимость проверки комментария в зависимости от числа правил: "
+            "автомат Ахо — Корасик против проверки каждого слова через in")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="100,1000,10000")
+        parser.add_argument("--comments", type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        comments = [" ".join(random_word(rng) for _ in range(40))
+                    for _ in range(options["comments"])]
+        for size in map(int, options["sizes"].split(",")):
+            words = [random_word(rng) for _ in range(size)]
+            start = time.perf_counter()
+            rules = moderation.Rules(words)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            for comment in comments:
+                rules.find(comment)
+            automaton = (time.perf_counter() - start) / len(comments)
+            start = time.perf_counter()
+            for comment in comments:
+                text = moderation.normalize(comment)
+                any(word in text for word in words)
+            naive = (time.perf_counter() - start) / len(comments)
+            self.stdout.write(
+                f"{size} правил: автомат {automaton * 1e6:.0f} мкс, "
+                f"in по словам {naive * 1e6:.0f} мкс на комментарий "
+                f"(сборка {build * 1000:.0f} мс)")
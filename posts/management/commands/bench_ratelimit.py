@@ -0,0 +1,36 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from posts import ratelimit
+
+
+class Command(BaseCommand):
+    help = "Замер накладных расходов ограничителя частоты на один запрос"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        request = RequestFactory().post("/new/")
+        request.user = AnonymousUser()
+        rules = {"bench": {"ip": f"{iterations * 10}/s"}}
+        with override_settings(RATELIMITS=rules):
+            cache.delete("rl:bench:ip:127.0.0.1")
+            start = time.perf_counter()
+            for _ in range(iterations):
+                ratelimit.check("bench", request)
+            allowed = (time.perf_counter() - start) / iterations
+
+            rules["bench"]["ip"] = "1/d"
+            cache.delete("rl:bench:ip:127.0.0.1")
+            start = time.perf_counter()
+            for _ in range(iterations):
+                ratelimit.check("bench", request)
+            rejected = (time.perf_counter() - start) / iterations
+        self.stdout.write(f"разрешённый запрос: {allowed * 1e6:.1f} мкс")
+        self.stdout.write(f"отклонённый запрос: {rejected * 1e6:.1f} мкс")
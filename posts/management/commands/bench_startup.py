@@ -0,0 +1,90 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в отдельном процессе: холодный старт воркера
+SCRIPT = """
+import io, json, sys, time
+start = time.perf_counter()
+import django
+from django.conf import settings
+django.setup()
+setup = time.perf_counter()
+from yatube.wsgi import application
+wsgi = time.perf_counter()
+
+def request(path):
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "",
+        "SERVER_NAME": settings.ALLOWED_HOSTS[0], "SERVER_PORT": "80",
+        "HTTP_HOST": settings.ALLOWED_HOSTS[0].lstrip("."),
+        "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http", "wsgi.version": (1, 0),
+        "wsgi.multithread": False, "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    status = []
+    started = time.perf_counter()
+    response = application(environ, lambda code, headers: status.append(code))
+    for _ in response:
+        pass
+    response.close()
+    return time.perf_counter() - started, status[0]
+
+first, status = request(sys.argv[1])
+second, _ = request(sys.argv[1])
+print(json.dumps({
+    "modules": len(sys.modules), "setup": setup - start,
+    "wsgi": wsgi - setup, "first": first, "second": second,
+    "status": status, "apps": len(settings.INSTALLED_APPS),
+    "middleware": len(settings.MIDDLEWARE),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = ("Холодный старт воркера в профилях development и production: "
+            "импорт и django.setup(), загрузка WSGI-приложения, первый "
+            "и второй запрос (медианы по нескольким запускам)")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/",
+                            help="Адрес для первого запроса")
+        parser.add_argument("--runs", type=int, default=5)
+
+    def handle(self, *args, **options):
+        for profile in ("development", "production"):
+            runs = [self.run(profile, options["path"])
+                    for _ in range(options["runs"])]
+            result = {key: statistics.median(run[key] for run in runs)
+                      for key in ("setup", "wsgi", "first", "second")}
+            last = runs[-1]
+            self.stdout.write(
+                f"{profile}: setup {result['setup'] * 1000:.0f} мс, "
+                f"wsgi {result['wsgi'] * 1000:.0f} мс, "
+                f"первый запрос {result['first'] * 1000:.0f} мс, "
+                f"второй {result['second'] * 1000:.1f} мс "
+                f"(ответ {last['status']}; модулей {last['modules']}, "
+                f"приложений {last['apps']}, "
+                f"middleware {last['middleware']})")
+
+    @staticmethod
+    def run(profile, path):
+        env = dict(os.environ, YATUBE_ENV=profile,
+                   DJANGO_SETTINGS_MODULE="yatube.settings")
+        env.setdefault("YATUBE_SECRET_KEY", "bench-startup")
+        # Статика с хешами в именах работает только после collectstatic
+        manifest = os.path.join(settings.STATIC_ROOT, "staticfiles.json")
+        env.setdefault("YATUBE_STATIC_PRODUCTION",
+                       "1" if os.path.exists(manifest) else "0")
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT, path], env=env,
+            cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f"{profile}: {result.stderr[-2000:]}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,70 @@
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+
+from posts import views
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ("Сравнение времени до первого байта и пиковой памяти страницы "
+            "поста: render против потоковой отрисовки")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comments", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            post = self.create_post(options["comments"])
+            for name, streaming in (("render", False), ("streaming", True)):
+                with override_settings(STREAMING_RENDER=streaming):
+                    ttfb, total, peak = self.measure(post, options["repeat"])
+                self.stdout.write(
+                    f"{name}: первый байт {ttfb * 1000:.1f} мс, "
+                    f"весь ответ {total * 1000:.1f} мс, "
+                    f"пик памяти {peak / 1024:.0f} КиБ")
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(post, repeat):
+        factory = RequestFactory()
+        ttfb = total = peak = 0
+        for _ in range(repeat):
+            # Без кеша фрагментов: меряем полную отрисовку
+            cache.clear()
+            request = factory.get(f"/{post.author.username}/{post.pk}/")
+            request.user = AnonymousUser()
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = views.post_view(request, post.author.username,
+                                       post.pk)
+            if response.streaming:
+                chunks = iter(response.streaming_content)
+                next(chunks)
+                ttfb += time.perf_counter() - start
+                for _ in chunks:
+                    pass
+            else:
+                ttfb += time.perf_counter() - start
+            total += time.perf_counter() - start
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return ttfb / repeat, total / repeat, peak
+
+    @staticmethod
+    def create_post(count):
+        author = get_user_model().objects.create_user(
+            username="bench_streaming")
+        post = Post.objects.create(text="Пост для бенчмарка", author=author)
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author,
+                    text=f"Комментарий {number} " * 10)
+            for number in range(count))
+        return post
@@ -0,0 +1,17 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = ("Пересчитывает рекомендации «на кого подписаться» по графу "
+            "подписок; нужен NumPy, запускать периодически")
+
+    def handle(self, *args, **options):
+        try:
+            written = recommendations.build(
+                self.stdout if options["verbosity"] > 1 else None)
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        self.stdout.write(f"Записано рекомендаций: {written}")
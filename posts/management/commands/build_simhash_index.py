@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import bulk, duplicates
+from posts.models import Post, PostFingerprint
+
+
+class Command(BaseCommand):
+    help = "Строит отпечатки SimHash для существующих постов пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        size = options["batch_size"]
+        built = 0
+        for batch in bulk.chunks(Post.objects.all(), size):
+            fingerprints = []
+            for post in Post.objects.filter(pk__in=batch).only(
+                    "text", "pub_date"):
+                value = duplicates.simhash(post.text)
+                if value is not None:
+                    fingerprints.append(
+                        duplicates.make_fingerprint(post, value))
+            with transaction.atomic():
+                PostFingerprint.objects.filter(post_id__in=batch).delete()
+                PostFingerprint.objects.bulk_create(fingerprints,
+                                                    batch_size=size)
+            built += len(fingerprints)
+            self.stdout.write(f"Отпечатков: {built}")
+        self.stdout.write(f"Готово: {built}")
@@ -0,0 +1,49 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def build_chunk(post_ids):
+    built = failed = 0
+    try:
+        for post in Post.objects.filter(pk__in=post_ids).only("image"):
+            try:
+                thumbnails.backend.get_variants(post.image)
+                built += 1
+            except Exception:
+                failed += 1
+    finally:
+        connections.close_all()
+    return built, failed
+
+
+class Command(BaseCommand):
+    help = "Достраивает варианты миниатюр для картинок существующих постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--chunk-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        post_ids = list(Post.objects.exclude(image="").exclude(
+            image__isnull=True).values_list("pk", flat=True).order_by("pk"))
+        size = options["chunk_size"]
+        chunks = [post_ids[i:i + size] for i in range(0, len(post_ids), size)]
+        connections.close_all()
+        built = failed = 0
+        with ProcessPoolExecutor(
+                options["workers"],
+                mp_context=multiprocessing.get_context("fork")) as pool:
+            for future in as_completed(pool.submit(build_chunk, chunk)
+                                       for chunk in chunks):
+                chunk_built, chunk_failed = future.result()
+                built += chunk_built
+                failed += chunk_failed
+                self.stdout.write(f"Обработано {built + failed} из "
+                                  f"{len(post_ids)}")
+        self.stdout.write(f"Готово: {built}, ошибок: {failed}")
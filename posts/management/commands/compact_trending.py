@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ("Удаляет затухшие рейтинги популярных постов; запускать "
+            "периодически")
+
+    def handle(self, *args, **options):
+        deleted = trending.compact()
+        self.stdout.write(f"Удалено рейтингов: {deleted}")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import comment_buffer
+
+
+class Command(BaseCommand):
+    help = ("Дописывает в базу очередь комментариев из журналов "
+            "завершившихся процессов")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--journal-dir", default=None)
+        parser.add_argument("--include-live", action="store_true",
+                            help="Обработать и журналы работающих процессов")
+
+    def handle(self, *args, **options):
+        inserted = comment_buffer.replay_journals(options["journal_dir"],
+                                                  options["include_live"])
+        self.stdout.write(f"Записано комментариев: {inserted}")
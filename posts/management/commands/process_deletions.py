@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts import deletion
+
+
+class Command(BaseCommand):
+    help = ("Выполняет отложенные удаления пользователей, групп и постов "
+            "пачками; прерванное удаление продолжается с того же места")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--status", action="store_true",
+                            help="Только показать ход удалений")
+        parser.add_argument("--time-limit", type=float, default=None,
+                            help="Остановиться через столько секунд")
+
+    def report(self, request):
+        self.stdout.write(f"{request}: {request.stage or 'ожидает'} "
+                          f"{json.loads(request.progress)}")
+
+    def handle(self, *args, **options):
+        for request in deletion.pending():
+            self.report(request)
+            if options["status"]:
+                continue
+            if deletion.process(request, options["time_limit"],
+                                report=self.report):
+                self.stdout.write(f"{request}: удалено")
+            elif options["time_limit"] is not None:
+                return
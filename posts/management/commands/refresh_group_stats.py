@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import group_stats
+
+
+class Command(BaseCommand):
+    help = ("Пересчитывает сводку активности групп; запускать периодически, "
+            "чтобы счётчик постов за неделю не устаревал")
+
+    def handle(self, *args, **options):
+        refreshed = group_stats.refresh()
+        self.stdout.write(f"Обновлено групп: {refreshed}")
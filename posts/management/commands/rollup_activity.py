@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import rollups
+
+
+class Command(BaseCommand):
+    help = ("Добавляет в дневные сводки активности новые посты "
+            "и комментарии; запускать периодически")
+
+    def handle(self, *args, **options):
+        for source, processed in rollups.advance_all().items():
+            self.stdout.write(f"{source}: учтено {processed}")
@@ -0,0 +1,60 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils.module_loading import autodiscover_modules
+
+from posts import jobs
+from posts.models import Job
+
+
+def run_in_child(job_id):
+    try:
+        return jobs.run(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Исполнитель фоновых задач из очереди в базе данных"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=2,
+                            help="Число процессов-исполнителей")
+        parser.add_argument("--lane", action="append",
+                            choices=sorted(Job.LANES),
+                            help="Обрабатывать только указанные полосы")
+        parser.add_argument("--poll", type=float, default=1.0,
+                            help="Пауза между опросами пустой очереди, с")
+        parser.add_argument("--once", action="store_true",
+                            help="Выйти, когда очередь опустеет")
+
+    def handle(self, *args, **options):
+        autodiscover_modules("tasks")
+        concurrency = options["concurrency"]
+        # Дочерние процессы не должны делить соединение с родителем
+        connections.close_all()
+        pool = ProcessPoolExecutor(
+            concurrency, mp_context=multiprocessing.get_context("fork"))
+        running = {}
+        try:
+            while True:
+                free = concurrency - len(running)
+                claimed = jobs.claim(free, options["lane"]) if free else []
+                for job_id in claimed:
+                    running[pool.submit(run_in_child, job_id)] = job_id
+                if not running:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+                done, _ = wait(running, timeout=options["poll"],
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    status = "выполнена" if future.result() else "ошибка"
+                    self.stdout.write(f"Задача #{job_id}: {status}")
+        finally:
+            pool.shutdown()
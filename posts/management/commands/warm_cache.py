@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts import warmup
+
+
+class Command(BaseCommand):
+    help = ("Прогревает кеш после выкладки: первые страницы главной, "
+            "активные группы и авторы, миниатюры их постов. С --url "
+            "страницы запрашиваются у работающего сервера")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Адрес сайта, например "
+                                          "http://127.0.0.1:8000")
+        parser.add_argument("--pages", type=int)
+        parser.add_argument("--groups", type=int)
+        parser.add_argument("--authors", type=int)
+        parser.add_argument("--concurrency", type=int)
+        parser.add_argument("--no-thumbnails", action="store_true")
+
+    def handle(self, *args, **options):
+        result, built = warmup.run(
+            options["url"], options["pages"], options["groups"],
+            options["authors"], options["concurrency"],
+            not options["no_thumbnails"],
+            self.report if options["verbosity"] > 1 else None)
+        failed = [path for path, status in result.items() if status >= 400]
+        self.stdout.write(f"Страниц: {len(result)}, с ошибкой: "
+                          f"{len(failed)}; постов с миниатюрами: {built}")
+        for path in failed:
+            self.stderr.write(f"{result[path]} {path}")
+
+    def report(self, path, status):
+        self.stdout.write(f"{status} {path}")
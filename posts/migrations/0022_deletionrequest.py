@@ -0,0 +1,35 @@
+# Generated by Django 2.2.6 on 2026-10-19 20:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0021_daily_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionRequest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа'), ('post', 'Пост')], max_length=10, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('label', models.CharField(max_length=200, verbose_name='Объект')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('done', 'Выполнено')], default='pending', max_length=10, verbose_name='Статус')),
+                ('stage', models.CharField(blank=True, max_length=50, verbose_name='Шаг')),
+                ('progress', models.TextField(default='{}')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кто удалил')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='deletionrequest',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_deletion_request'),
+        ),
+    ]
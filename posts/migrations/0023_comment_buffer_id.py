@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-19 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_deletionrequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='buffer_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
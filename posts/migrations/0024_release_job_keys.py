@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def release_keys(apps, schema_editor):
+    # Ключи завершённых задач больше не мешают поставить ту же работу
+    Job = apps.get_model("posts", "Job")
+    Job.objects.filter(status__in=["done", "failed"]).update(
+        idempotency_key=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_comment_buffer_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(release_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-19 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_release_job_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
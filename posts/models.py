@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models import TextField
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -25,9 +26,14 @@ class Post(models.Model):
         null=True, on_delete=models.SET_NULL, verbose_name="Группа",
         help_text="Поле для ввода группы публикции")
     image = models.ImageField(upload_to="posts/", blank=True, null=True)
+    # Версия кешированных фрагментов страницы поста (posts.fragments)
+    version = models.BigIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=["pub_date"], name="post_pub_date_idx"),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -42,6 +48,10 @@ class Comment(models.Model):
                             help_text="Введите ваш комментарий")
     created = models.DateTimeField(verbose_name="Дата комментария",
                                    auto_now_add=True)
+    # id записи журнала отложенной записи (posts.comment_buffer): по нему
+    # повторная запись журнала пропускает уже записанные комментарии
+    buffer_id = models.UUIDField(null=True, blank=True, unique=True,
+                                 editable=False)
 
     class Meta:
         ordering = ["-created"]
@@ -62,3 +72,262 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique_follow'),
         ]
+
+
+class Notification(models.Model):
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE,
+                                  related_name="notifications",
+                                  verbose_name="Получатель")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="notifications",
+                             verbose_name="Пост")
+    created = models.DateTimeField(auto_now_add=True)
+    is_read = models.BooleanField(default=False, verbose_name="Прочитано")
+
+    class Meta:
+        ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["recipient", "is_read"],
+                         name="notification_unread_idx"),
+            models.Index(fields=["recipient", "-created"],
+                         name="notification_inbox_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id}: {self.post_id}"
+
+
+class PostFingerprint(models.Model):
+    """
+    SimHash текста поста для поиска почти одинаковых постов
+    (posts.duplicates). 64 бита хеша разбиты на четыре 16-битные полосы:
+    у хешей, отличающихся не более чем в трёх битах, хотя бы одна полоса
+    совпадает.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE,
+                                primary_key=True, related_name="fingerprint")
+    simhash = models.BigIntegerField()
+    band0 = models.PositiveIntegerField(db_index=True)
+    band1 = models.PositiveIntegerField(db_index=True)
+    band2 = models.PositiveIntegerField(db_index=True)
+    band3 = models.PositiveIntegerField(db_index=True)
+    created = models.DateTimeField(db_index=True)
+    duplicate_of = models.ForeignKey(Post, on_delete=models.SET_NULL,
+                                     null=True, blank=True, related_name="+",
+                                     verbose_name="Похож на пост")
+
+    def __str__(self):
+        return f"{self.post_id}: {self.simhash:x}"
+
+
+class GroupStats(models.Model):
+    """
+    Сводка активности группы для каталога групп. Обновляется сигналами
+    при создании и удалении постов и командой refresh_group_stats.
+    """
+    group = models.OneToOneField(Group, on_delete=models.CASCADE,
+                                 primary_key=True, related_name="stats")
+    post_count = models.PositiveIntegerField(default=0,
+                                             verbose_name="Постов")
+    last_post_at = models.DateTimeField(null=True, blank=True,
+                                        verbose_name="Последний пост")
+    week_posts = models.PositiveIntegerField(default=0,
+                                             verbose_name="Постов за неделю")
+    refreshed = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-week_posts"], name="group_activity_idx"),
+        ]
+
+    def __str__(self):
+        return f"Статистика {self.group_id}"
+
+
+class PostScore(models.Model):
+    """
+    Рейтинг поста для ленты популярного (posts.trending). rank — двоичный
+    логарифм суммы вкладов комментариев, растущих со временем, поэтому
+    более свежие комментарии весят больше без пересчёта старых рейтингов.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE,
+                                primary_key=True, related_name="score")
+    group = models.ForeignKey(Group, on_delete=models.SET_NULL, null=True,
+                              blank=True, related_name="+")
+    rank = models.FloatField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-rank"], name="score_rank_idx"),
+            models.Index(fields=["group", "-rank"],
+                         name="score_group_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id}: {self.rank:.2f}"
+
+
+class Recommendation(models.Model):
+    """
+    Автор, на которого стоит подписаться пользователю. Строится командой
+    build_recommendations по графу подписок (posts.recommendations);
+    mutual — сколько авторов из подписок пользователя уже читают его.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name="recommendations",
+                             verbose_name="Пользователь")
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name="+", verbose_name="Автор")
+    score = models.FloatField(verbose_name="Вес")
+    mutual = models.PositiveIntegerField(default=0,
+                                         verbose_name="Общих подписок")
+    built = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "author"],
+                                    name="unique_recommendation"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-score"],
+                         name="recommendation_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} → {self.author_id}: {self.score:.2f}"
+
+
+class DailyActivity(models.Model):
+    """
+    Число постов и комментариев за день по всему сайту, группе или автору
+    (posts.rollups). Пополняется командой rollup_activity.
+    """
+    SITE = "site"
+    GROUP = "group"
+    AUTHOR = "author"
+    SCOPES = [
+        (SITE, "Сайт"),
+        (GROUP, "Группа"),
+        (AUTHOR, "Автор"),
+    ]
+
+    day = models.DateField(verbose_name="День")
+    scope = models.CharField(max_length=10, choices=SCOPES,
+                             verbose_name="Срез")
+    # id группы или автора, для сайта — 0
+    object_id = models.PositiveIntegerField(default=0)
+    posts = models.PositiveIntegerField(default=0, verbose_name="Постов")
+    comments = models.PositiveIntegerField(default=0,
+                                           verbose_name="Комментариев")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "object_id", "day"],
+                                    name="unique_daily_activity"),
+        ]
+        indexes = [
+            models.Index(fields=["scope", "day"],
+                         name="daily_activity_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.object_id} {self.day}"
+
+
+class DeletionRequest(models.Model):
+    """
+    Отложенное удаление пользователя, группы или поста (posts.deletion).
+    Объект скрывается сразу, а зависимые строки и файлы удаляются
+    пачками в фоне; progress — сколько строк удалено на каждом шаге.
+    """
+    USER = "user"
+    GROUP = "group"
+    POST = "post"
+    KINDS = [
+        (USER, "Пользователь"),
+        (GROUP, "Группа"),
+        (POST, "Пост"),
+    ]
+    PENDING = "pending"
+    DONE = "done"
+    STATUSES = [
+        (PENDING, "Ожидает"),
+        (DONE, "Выполнено"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KINDS,
+                            verbose_name="Тип")
+    object_id = models.PositiveIntegerField(verbose_name="id объекта")
+    label = models.CharField(max_length=200, verbose_name="Объект")
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL,
+                                     null=True, blank=True, related_name="+",
+                                     verbose_name="Кто удалил")
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING, verbose_name="Статус")
+    stage = models.CharField(max_length=50, blank=True, verbose_name="Шаг")
+    progress = models.TextField(default="{}")
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True,
+                                    verbose_name="Завершено")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"],
+                                    name="unique_deletion_request"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.label}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Последний учтённый в DailyActivity id постов или комментариев.
+    """
+    source = models.CharField(max_length=20, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.last_id}"
+
+
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    )
+    # Приоритетные полосы: меньшее значение забирается раньше
+    LANES = {"high": 0, "default": 5, "low": 9}
+
+    name = models.CharField(max_length=100, verbose_name="Задача")
+    payload = models.TextField(default="{}", verbose_name="Аргументы")
+    priority = models.PositiveSmallIntegerField(default=LANES["default"],
+                                                verbose_name="Приоритет")
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=QUEUED, verbose_name="Статус")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now,
+                                  verbose_name="Запустить после")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=200, unique=True,
+                                       null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "priority", "run_at"],
+                         name="job_pick_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
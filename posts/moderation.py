@@ -0,0 +1,191 @@
+"""
+Проверка текстов постов и комментариев по списку запрещённых слов.
+
+Правила читаются из файла MODERATION["RULES_FILE"]: по одному слову или
+фразе в строке, строки с префиксом ``re:`` — регулярные выражения,
+``#`` — комментарии. Слова собираются в автомат Ахо — Корасик, а
+регулярные выражения — в одно объединённое выражение, так что текст
+проверяется за один проход независимо от числа правил.
+
+Перед поиском и текст, и слова приводятся к одному виду: нижний
+регистр, «ё» как «е», латинские буквы, похожие на кириллические (и
+цифры 0 и 3), заменяются кириллическими, невидимые символы удаляются.
+Регулярные выражения не приводятся (замена букв испортила бы \\b, \\x
+и классы символов), поэтому ищутся и в приведённом тексте, и в тексте
+только в нижнем регистре без невидимых символов: так срабатывают и
+кириллические выражения на тексте с латиницей, и выражения с латиницей.
+Файл правил перечитывается при изменении без перезапуска процесса.
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+DEFAULTS = {
+    "RULES_FILE": os.path.join(os.path.dirname(__file__),
+                               "moderation_rules.txt"),
+    # Как часто (в секундах) проверять время изменения файла правил
+    "RELOAD_INTERVAL": 5,
+}
+
+# Мягкий перенос и символы нулевой ширины
+INVISIBLE = {"\u00ad": None, "\u200b": None, "\u200c": None,
+             "\u200d": None, "\u2060": None, "\ufeff": None}
+
+HOMOGLYPHS = str.maketrans({
+    "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "k": "к", "m": "м",
+    "o": "о", "p": "р", "t": "т", "x": "х", "y": "у", "0": "о", "3": "з",
+    "ё": "е",
+    **INVISIBLE,
+})
+
+VISIBLE = str.maketrans(INVISIBLE)
+
+
+def get_option(name):
+    return getattr(settings, "MODERATION", {}).get(name, DEFAULTS[name])
+
+
+def normalize(text):
+    # Латинские b, h, m, t похожи на кириллицу только заглавными, но
+    # заменяются всегда: текст и правила приводятся одинаково
+    return text.lower().translate(HOMOGLYPHS)
+
+
+def fold(text):
+    """
+    Текст для регулярных выражений без замены букв.
+    """
+    return text.lower().translate(VISIBLE)
+
+
+class Automaton:
+    """
+    Автомат Ахо — Корасик: находит вхождения любого из слов за один
+    проход по тексту.
+    """
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+        for word in words:
+            self.add(word)
+        self.build()
+
+    def add(self, word):
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+            state = next_state
+        self.output[state] = word
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                if self.output[next_state] is None:
+                    # Самое длинное слово, оканчивающееся в этом состоянии
+                    self.output[next_state] = self.output[
+                        self.fail[next_state]]
+
+    def find(self, text):
+        """
+        Первое найденное слово или None.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+
+class Rules:
+    def __init__(self, lines):
+        words, patterns = [], []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("re:"):
+                patterns.append(f"(?:{line[3:].strip()})")
+            else:
+                words.append(normalize(line))
+        self.automaton = Automaton(words)
+        self.regex = re.compile("|".join(patterns)) if patterns else None
+        self.size = len(words) + len(patterns)
+
+    def find(self, text):
+        normalized = normalize(text)
+        found = self.automaton.find(normalized)
+        if found is None and self.regex is not None:
+            match = (self.regex.search(normalized) or
+                     self.regex.search(fold(text)))
+            if match:
+                found = match.group(0)
+        return found
+
+
+class RulesFile:
+    """
+    Правила из файла, перечитываемые при изменении времени файла.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rules = None
+        self.path = None
+        self.mtime = None
+        self.checked = 0
+
+    def get(self):
+        now = time.monotonic()
+        if (self.rules is None or
+                now - self.checked >= get_option("RELOAD_INTERVAL")):
+            with self.lock:
+                self.checked = now
+                path = get_option("RULES_FILE")
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    mtime = None
+                if self.rules is None or (path, mtime) != (self.path,
+                                                           self.mtime):
+                    self.rules = self.load(path, mtime)
+                    self.path, self.mtime = path, mtime
+        return self.rules
+
+    @staticmethod
+    def load(path, mtime):
+        if mtime is None:
+            return Rules([])
+        with open(path, encoding="utf-8") as rules_file:
+            return Rules(rules_file)
+
+
+rules = RulesFile()
+
+
+def find(text):
+    """
+    Запрещённое слово или фрагмент, найденный в тексте, или None.
+    """
+    return rules.get().find(text)
@@ -0,0 +1,95 @@
+"""
+Уведомления подписчиков о новых постах.
+
+Пост, созданный через ``new_post``, ставит в очередь задачу
+``notify_followers``: она пачками по BATCH_SIZE читает подписчиков
+и записывает уведомления ``bulk_create``. Число непрочитанных хранится
+в кеше и увеличивается при раздаче, так что запрос счётчика обычно
+не ходит в базу. Раздача идёт в процессе run_jobs, и если кеш не общий,
+её увеличение до веб-процессов не доходит, поэтому число хранится
+недолго (COUNT_TIMEOUT) и затем заново считается по индексу.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from . import jobs
+from .models import Follow, Notification
+
+DEFAULTS = {
+    "BATCH_SIZE": 500,
+    "INBOX_SIZE": 50,
+    "COUNT_TIMEOUT": 30,
+}
+
+
+def get_option(name):
+    return getattr(settings, "NOTIFICATIONS", {}).get(name, DEFAULTS[name])
+
+
+def unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def announce(post):
+    """
+    Ставит раздачу уведомлений о посте в очередь задач.
+    """
+    jobs.enqueue("notify_followers", key=f"notify:{post.pk}",
+                 post_id=post.pk, author_id=post.author_id)
+
+
+def fan_out(post_id, author_id):
+    """
+    Записывает уведомления всем подписчикам автора пачками.
+    Возвращает число уведомлений.
+    """
+    size = get_option("BATCH_SIZE")
+    followers = Follow.objects.filter(author_id=author_id).order_by("pk")
+    last_pk, sent = 0, 0
+    while True:
+        batch = list(followers.filter(pk__gt=last_pk).values_list(
+            "pk", "user_id")[:size])
+        if not batch:
+            return sent
+        last_pk = batch[-1][0]
+        recipients = [user_id for _, user_id in batch]
+        # Повтор задачи после сбоя не должен дублировать уведомления
+        done = set(Notification.objects.filter(
+            post_id=post_id, recipient_id__in=recipients).values_list(
+                "recipient_id", flat=True))
+        recipients = [user_id for user_id in recipients if user_id not in done]
+        Notification.objects.bulk_create(
+            [Notification(recipient_id=user_id, post_id=post_id)
+             for user_id in recipients], batch_size=size)
+        for key in cache.get_many([unread_key(user_id)
+                                   for user_id in recipients]):
+            try:
+                cache.incr(key)
+            except ValueError:
+                pass
+        sent += len(recipients)
+
+
+def unread_count(user):
+    key = unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient=user,
+                                            is_read=False).count()
+        cache.add(key, count, get_option("COUNT_TIMEOUT"))
+    return count
+
+
+def inbox(user):
+    """
+    Последние уведомления пользователя; непрочитанные помечаются
+    прочитанными.
+    """
+    notifications = list(Notification.objects.filter(
+        recipient=user).select_related("post__author")[
+            :get_option("INBOX_SIZE")])
+    if any(not notification.is_read for notification in notifications):
+        Notification.objects.filter(recipient=user,
+                                    is_read=False).update(is_read=True)
+        cache.set(unread_key(user.pk), 0, get_option("COUNT_TIMEOUT"))
+    return notifications
@@ -0,0 +1,67 @@
+"""
+Постраничный вывод со счётчиком вместо COUNT(*) и сокращённым списком
+номеров страниц: 1 … 7 8 9 … 4021.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+
+
+def elided_page_range(number, num_pages, on_each_side=2, on_ends=1):
+    """
+    Номера страниц вокруг текущей и по краям; None — пропуск («…»).
+    """
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    pages = []
+    if number > 1 + on_each_side + on_ends + 1:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(None)
+        pages.extend(range(number - on_each_side, number + 1))
+    else:
+        pages.extend(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages.extend(range(number + 1, number + on_each_side + 1))
+        pages.append(None)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(number + 1, num_pages + 1))
+    return pages
+
+
+def set_count(paginator, count):
+    paginator.count = count
+    paginator.__dict__.pop("num_pages", None)
+
+
+def paginate(request, queryset, counter):
+    """
+    Возвращает (paginator, page). Число объектов берётся из счётчика
+    и исправляется, если страница показала, что он ошибся.
+    """
+    paginator = Paginator(queryset, settings.COUNT_POSTS)
+    set_count(paginator, counter.value())
+    page = paginator.get_page(request.GET.get("page"))
+    per_page = paginator.per_page
+    bottom = (page.number - 1) * per_page
+    exact = None
+    if page.has_next():
+        size = len(page.object_list)
+        if size < per_page:
+            # Счётчик завышен: короткая страница — на самом деле последняя
+            exact = bottom + size if size else queryset.count()
+    else:
+        # На последней по счётчику странице берём одну лишнюю строку:
+        # она покажет, что счётчик занижен, без отдельного запроса
+        rows = list(queryset[bottom:bottom + per_page + 1])
+        page.object_list = rows[:per_page]
+        size = len(page.object_list)
+        if len(rows) > per_page or bottom + size > paginator.count:
+            exact = queryset.count()
+        elif bottom + size < paginator.count:
+            exact = bottom + size if size or not bottom else queryset.count()
+    if exact is not None:
+        counter.correct(exact)
+        set_count(paginator, exact)
+        page = paginator.get_page(page.number)
+    page.elided_range = elided_page_range(page.number, paginator.num_pages)
+    return paginator, page
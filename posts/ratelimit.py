@@ -0,0 +1,138 @@
+"""
+Ограничение частоты запросов (token bucket) для пишущих страниц.
+
+Состояние каждого «ведра» хранится в общем кеше как одно целое число —
+теоретическое время прихода следующего запроса в миллисекундах (GCRA,
+эквивалент token bucket). Разрешённый запрос обходится атомарным
+``cache.incr`` и продлением срока ключа; запись в кеш происходит только
+для пустого или простаивающего ведра (см. ``hit``).
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """
+    Превращает строку вида "10/m" в пару (ёмкость, интервал пополнения, мс).
+    """
+    count, period = rate.split("/")
+    count = int(count)
+    return count, PERIODS[period] * 1000 // count
+
+
+def client_ip(request):
+    """
+    IP клиента; за доверенным прокси берётся первый адрес X-Forwarded-For.
+    """
+    if getattr(settings, "RATELIMIT_TRUST_FORWARDED", False):
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def get_cache():
+    return caches[getattr(settings, "RATELIMIT_CACHE", "default")]
+
+
+def ttl(tat, now):
+    """
+    Срок ключа в секундах: ведро должно дожить до полного наполнения,
+    иначе истечение выдало бы нарушителю новое полное ведро.
+    """
+    return (tat - now) // 1000 + 1
+
+
+def hit(key, rate, now=None):
+    """
+    Забирает один токен из ведра. Возвращает 0, если запрос разрешён,
+    иначе количество секунд до появления свободного токена.
+    """
+    cache = get_cache()
+    capacity, interval = parse_rate(rate)
+    now = int((time.time() if now is None else now) * 1000)
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:
+        # Ведра ещё нет: первый запрос всегда разрешён
+        if cache.add(key, now + interval, ttl(now + interval, now)):
+            return 0
+        tat = cache.incr(key, interval)
+    if tat <= now + interval:
+        # Ведро простаивало и полностью наполнилось. set не сравнивает
+        # старое значение: incr параллельного запроса между нашими incr
+        # и set теряется. Так полное ведро может пропустить лишние
+        # запросы — не больше, чем пришло одновременно с ним; у занятого
+        # ведра эта ветка не выполняется
+        cache.set(key, now + interval, ttl(now + interval, now))
+        return 0
+    if tat - now <= capacity * interval:
+        # incr не меняет срок ключа
+        cache.touch(key, ttl(tat, now))
+        return 0
+    # Отказ не должен расходовать токен
+    cache.decr(key, interval)
+    return math.ceil((tat - now - capacity * interval) / 1000)
+
+
+def refund(key, rate):
+    """
+    Возвращает токен, взятый hit.
+    """
+    _, interval = parse_rate(rate)
+    try:
+        get_cache().decr(key, interval)
+    except ValueError:
+        pass
+
+
+def check(scope, request):
+    """
+    Проверяет все правила RATELIMITS для scope. Возвращает время ожидания
+    в секундах или 0. При отказе по одному правилу токены, уже взятые
+    по другим, возвращаются.
+    """
+    rules = getattr(settings, "RATELIMITS", {}).get(scope, {})
+    buckets = []
+    if "user" in rules and request.user.is_authenticated:
+        buckets.append((f"rl:{scope}:u:{request.user.pk}", rules["user"]))
+    if "ip" in rules:
+        buckets.append((f"rl:{scope}:ip:{client_ip(request)}", rules["ip"]))
+    charged = []
+    for key, rate in buckets:
+        retry_after = hit(key, rate)
+        if retry_after:
+            for charged_key, charged_rate in charged:
+                refund(charged_key, charged_rate)
+            return retry_after
+        charged.append((key, rate))
+    return 0
+
+
+def ratelimit(scope, methods=("POST",)):
+    """
+    Декоратор представления: отвечает 429 с заголовком Retry-After,
+    если исчерпан лимит scope из настройки RATELIMITS.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (getattr(settings, "RATELIMIT_ENABLE", True) and
+                    (methods is None or request.method in methods)):
+                retry_after = check(scope, request)
+                if retry_after:
+                    response = render(request, "misc/429.html",
+                                      {"retry_after": retry_after},
+                                      status=429)
+                    response["Retry-After"] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,240 @@
+"""
+Рекомендации «на кого подписаться» по графу подписок.
+
+Команда ``manage.py build_recommendations`` загружает все подписки
+в массивы NumPy и строит по ним две разреженные матрицы смежности
+в формате CSR: подписки пользователя и подписчики автора. Кандидаты
+для пользователя u:
+
+* авторы, которых читают авторы из подписок u (друзья друзей), вес 1
+  за каждый такой путь;
+* авторы, которых читают подписчики тех же авторов, что и u
+  (совместные подписки), вес CO_FOLLOW_WEIGHT за путь.
+
+На каждом шаге берутся не более MAX_FANOUT самых свежих связей, поэтому
+число путей на пользователя ограничено, а пользователи обрабатываются
+блоками не больше MAX_PAIRS путей. В таблицу Recommendation пишутся TOP
+лучших кандидатов, виджет читает их одним запросом по индексу.
+
+NumPy (requirements.txt) импортируется только командой, веб-процессам
+он не нужен.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Follow, Recommendation
+
+DEFAULTS = {
+    "TOP": 20,
+    "SHOW": 5,
+    "MAX_FANOUT": 50,
+    "CO_FOLLOW_WEIGHT": 0.25,
+    "MAX_PAIRS": 2000000,
+    "LOAD_BATCH": 100000,
+}
+
+
+def get_option(name):
+    return getattr(settings, "RECOMMENDATIONS", {}).get(name, DEFAULTS[name])
+
+
+def for_user(user, limit=None):
+    """
+    Рекомендованные пользователю авторы, лучшие первыми.
+    """
+    if not user.is_authenticated:
+        return []
+    return list(Recommendation.objects.filter(user=user).select_related(
+        "author").order_by("-score")[:limit or get_option("SHOW")])
+
+
+def forget(user_id, author_id):
+    """
+    Убирает рекомендацию автора, на которого пользователь подписался.
+    """
+    Recommendation.objects.filter(user_id=user_id,
+                                  author_id=author_id).delete()
+
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImproperlyConfigured(
+            "Для построения рекомендаций нужен NumPy: pip install numpy")
+    return numpy
+
+
+def load_edges(np):
+    """
+    Все подписки как массивы (подписчик, автор) в порядке создания,
+    прочитанные пачками по первичному ключу.
+    """
+    size = get_option("LOAD_BATCH")
+    follows = Follow.objects.order_by("pk").values_list(
+        "pk", "user_id", "author_id")
+    parts, last_pk = [], 0
+    while True:
+        batch = np.array(follows.filter(pk__gt=last_pk)[:size],
+                         dtype=np.int64).reshape(-1, 3)
+        if not len(batch):
+            break
+        last_pk = int(batch[-1, 0])
+        parts.append(batch[:, 1:])
+    if not parts:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    edges = np.concatenate(parts)
+    return edges[:, 0], edges[:, 1]
+
+
+class Graph:
+    """
+    Граф подписок в CSR: вершины — пользователи с плотными номерами,
+    соседи каждой вершины идут от самых свежих подписок к старым.
+    """
+    def __init__(self, np, followers, authors):
+        self.np = np
+        self.ids, inverse = np.unique(np.concatenate([followers, authors]),
+                                      return_inverse=True)
+        inverse = inverse.astype(np.int32)
+        rows, cols = inverse[:len(followers)], inverse[len(followers):]
+        self.follows = self.csr(rows, cols)
+        self.followers = self.csr(cols, rows)
+
+    def csr(self, rows, cols):
+        np = self.np
+        # Обратный порядок и устойчивая сортировка: свежие связи первыми
+        order = np.argsort(rows[::-1], kind="stable")
+        indices = cols[::-1][order]
+        indptr = np.zeros(len(self.ids) + 1, np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self.ids)),
+                  out=indptr[1:])
+        return indptr, indices
+
+    def degree(self, adjacency, nodes, cap=None):
+        indptr, _ = adjacency
+        counts = indptr[nodes + 1] - indptr[nodes]
+        return counts if cap is None else self.np.minimum(counts, cap)
+
+    def expand(self, adjacency, sources, nodes, cap=None):
+        """
+        Для пар (источник, вершина) возвращает пары (источник, сосед
+        вершины), беря не больше cap соседей.
+        """
+        np = self.np
+        indptr, indices = adjacency
+        counts = self.degree(adjacency, nodes, cap)
+        total = int(counts.sum())
+        starts = np.repeat(indptr[nodes] - np.cumsum(counts) + counts,
+                           counts)
+        return (np.repeat(sources, counts),
+                indices[starts + np.arange(total)])
+
+    def path_counts(self, cap):
+        """
+        Число путей, которые даст каждая вершина: оценка работы на неё.
+        """
+        np = self.np
+        nodes = np.arange(len(self.ids), dtype=np.int32)
+        out_degree = self.degree(self.follows, nodes, cap)
+        # Путь через подписчика w автора a даёт deg(w) кандидатов
+        authors, readers = self.expand(self.followers, nodes, nodes, cap)
+        via_author = np.bincount(authors,
+                                 weights=out_degree[readers],
+                                 minlength=len(nodes))
+        per_author = out_degree + via_author
+        users, followed = self.expand(self.follows, nodes, nodes, cap)
+        return np.bincount(users, weights=per_author[followed],
+                           minlength=len(nodes))
+
+
+def blocks(np, costs, limit):
+    """
+    Делит вершины на отрезки с суммарной работой не больше limit
+    (вершина тяжелее limit идёт отдельным отрезком).
+    """
+    total = np.cumsum(costs)
+    start = 0
+    while start < len(costs):
+        done = total[start - 1] if start else 0
+        stop = int(np.searchsorted(total, done + limit, side="right"))
+        stop = max(stop, start + 1)
+        yield start, stop
+        start = stop
+
+
+def score_block(graph, users):
+    """
+    Лучшие кандидаты для вершин users: массивы (вершина, кандидат, вес,
+    число общих подписок), не больше TOP на вершину.
+    """
+    np = graph.np
+    cap, top = get_option("MAX_FANOUT"), get_option("TOP")
+    size = len(graph.ids)
+    sources, followed = graph.expand(graph.follows, users, users, cap)
+    fof_users, fof = graph.expand(graph.follows, sources, followed, cap)
+    co_users, readers = graph.expand(graph.followers, sources, followed, cap)
+    keep = readers != co_users
+    co_users, co = graph.expand(graph.follows, co_users[keep],
+                                readers[keep], cap)
+    keys = np.concatenate([fof_users.astype(np.int64) * size + fof,
+                           co_users.astype(np.int64) * size + co])
+    weights = np.concatenate([
+        np.ones(len(fof)),
+        np.full(len(co), get_option("CO_FOLLOW_WEIGHT"))])
+    is_fof = np.concatenate([np.ones(len(fof)), np.zeros(len(co))])
+    pairs, inverse = np.unique(keys, return_inverse=True)
+    scores = np.bincount(inverse, weights=weights)
+    mutual = np.bincount(inverse, weights=is_fof)
+    rows, candidates = pairs // size, pairs % size
+    # Себя и уже прочитанных авторов (без ограничения MAX_FANOUT)
+    # не рекомендуем
+    all_users, all_followed = graph.expand(graph.follows, users, users)
+    known = np.concatenate([all_users.astype(np.int64) * size + all_followed,
+                            users.astype(np.int64) * (size + 1)])
+    fresh = ~np.isin(pairs, known)
+    rows, candidates = rows[fresh], candidates[fresh]
+    scores, mutual = scores[fresh], mutual[fresh]
+    order = np.lexsort((candidates, -scores, rows))
+    rows, candidates = rows[order], candidates[order]
+    scores, mutual = scores[order], mutual[order]
+    first = np.searchsorted(rows, rows)
+    best = np.arange(len(rows)) - first < top
+    return rows[best], candidates[best], scores[best], mutual[best]
+
+
+def build(stdout=None):
+    """
+    Пересчитывает рекомендации всех пользователей. Каждый блок
+    записывается своей транзакцией, так что виджет не остаётся пустым
+    на время пересчёта; устаревшие рекомендации пользователей вне графа
+    удаляются в конце. Возвращает число записанных рекомендаций.
+    """
+    np = import_numpy()
+    started = timezone.now()
+    graph = Graph(np, *load_edges(np))
+    costs = graph.path_counts(get_option("MAX_FANOUT"))
+    written = 0
+    for start, stop in blocks(np, costs, get_option("MAX_PAIRS")):
+        users = np.arange(start, stop, dtype=np.int32)
+        rows, candidates, scores, mutual = score_block(
+            graph, users[costs[start:stop] > 0])
+        objects = [Recommendation(user_id=user_id, author_id=author_id,
+                                  score=score, mutual=common, built=started)
+                   for user_id, author_id, score, common in zip(
+                       graph.ids[rows].tolist(),
+                       graph.ids[candidates].tolist(),
+                       scores.tolist(), mutual.astype(int).tolist())]
+        # Номера вершин упорядочены как id, так что блок — отрезок id
+        with transaction.atomic():
+            Recommendation.objects.filter(
+                user_id__gte=int(graph.ids[start]),
+                user_id__lte=int(graph.ids[stop - 1])).delete()
+            Recommendation.objects.bulk_create(objects, batch_size=1000)
+        written += len(objects)
+        if stdout is not None:
+            stdout.write(f"Пользователи {start}–{stop - 1}: {len(objects)}")
+    Recommendation.objects.filter(built__lt=started).delete()
+    return written
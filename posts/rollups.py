@@ -0,0 +1,162 @@
+"""
+Дневные сводки активности для панели аналитики.
+
+Команда ``manage.py rollup_activity`` читает только посты и комментарии
+с id больше сохранённой отметки (RollupWatermark), считает их пачками
+одним GROUP BY по дню, группе и автору и прибавляет результат
+к DailyActivity. Пачка и сдвиг отметки — одна транзакция, поэтому
+прерванный запуск можно просто повторить.
+
+Строки моложе LAG секунд не берутся: транзакция, которая ещё не
+закоммитила строку с меньшим id, не должна оказаться за отметкой.
+Сводки учитывают активность в момент создания: удаление поста или
+перенос его в другую группу их не меняют.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .bulk import chunks
+from .models import (Comment, DailyActivity, Group, Post, RollupWatermark,
+                     User)
+
+DEFAULTS = {
+    "BATCH_SIZE": 10000,
+    "LAG": 5 * 60,
+    "DAYS": 30,
+    "TOP": 10,
+}
+
+# Источник: (модель, поле времени, поле группы, счётчик в DailyActivity)
+SOURCES = {
+    "post": (Post, "pub_date", "group_id", "posts"),
+    "comment": (Comment, "created", "post__group_id", "comments"),
+}
+
+PERIODS = (7, 30, 90)
+
+
+def get_option(name):
+    return getattr(settings, "ROLLUPS", {}).get(name, DEFAULTS[name])
+
+
+def count(model, time_field, group_field, first, last):
+    """
+    Число строк с id из (first, last] по дню, группе и автору.
+    """
+    rows = model.objects.filter(pk__gt=first, pk__lte=last).annotate(
+        day=TruncDate(time_field)).order_by().values_list(
+            "day", group_field, "author_id").annotate(count=Count("pk"))
+    totals = Counter()
+    for day, group_id, author_id, number in rows:
+        totals[DailyActivity.SITE, 0, day] += number
+        totals[DailyActivity.AUTHOR, author_id, day] += number
+        if group_id is not None:
+            totals[DailyActivity.GROUP, group_id, day] += number
+    return totals
+
+
+def add(totals, counter):
+    """
+    Прибавляет totals {(срез, id, день): число} к полю counter сводок.
+    """
+    existing = {}
+    for scope in {scope for scope, _, _ in totals}:
+        keys = [key for key in totals if key[0] == scope]
+        for item in DailyActivity.objects.filter(
+                scope=scope, object_id__in={key[1] for key in keys},
+                day__in={key[2] for key in keys}):
+            existing[item.scope, item.object_id, item.day] = item
+    new = []
+    for (scope, object_id, day), number in totals.items():
+        item = existing.get((scope, object_id, day))
+        if item is None:
+            new.append(DailyActivity(scope=scope, object_id=object_id,
+                                     day=day, **{counter: number}))
+        else:
+            setattr(item, counter, getattr(item, counter) + number)
+    DailyActivity.objects.bulk_update(list(existing.values()), [counter],
+                                      batch_size=500)
+    DailyActivity.objects.bulk_create(new, batch_size=500)
+
+
+def advance(source, now=None):
+    """
+    Учитывает в сводках новые строки источника. Возвращает их число.
+    """
+    model, time_field, group_field, counter = SOURCES[source]
+    cutoff = (now or timezone.now()) - timedelta(seconds=get_option("LAG"))
+    watermark = RollupWatermark.objects.get_or_create(source=source)[0]
+    pending = model.objects.filter(pk__gt=watermark.last_id)
+    too_new = pending.filter(**{f"{time_field}__gte": cutoff}).order_by(
+        "pk").values_list("pk", flat=True).first()
+    if too_new is not None:
+        pending = pending.filter(pk__lt=too_new)
+    processed, first = 0, watermark.last_id
+    for batch in chunks(pending, get_option("BATCH_SIZE")):
+        with transaction.atomic():
+            # Блокировка отметки не даёт двум запускам учесть пачку дважды
+            locked = RollupWatermark.objects.select_for_update().get(
+                source=source)
+            if locked.last_id != first:
+                break
+            add(count(model, time_field, group_field, first, batch[-1]),
+                counter)
+            locked.last_id = batch[-1]
+            locked.save(update_fields=["last_id", "updated"])
+        processed += len(batch)
+        first = batch[-1]
+    return processed
+
+
+def advance_all(now=None):
+    """
+    Обновляет сводки по всем источникам: {источник: число строк}.
+    """
+    return {source: advance(source, now) for source in SOURCES}
+
+
+def leaders(scope, since, limit):
+    return list(DailyActivity.objects.filter(
+        scope=scope, day__gte=since).values("object_id").annotate(
+            posts=Sum("posts"), comments=Sum("comments")).order_by(
+                "-posts", "-comments", "object_id")[:limit])
+
+
+def dashboard(days=None):
+    """
+    Данные панели аналитики за последние days дней: ряд по сайту,
+    самые активные группы и авторы. Читает только сводки.
+    """
+    days = days or get_option("DAYS")
+    since = timezone.localdate() - timedelta(days=days - 1)
+    site = list(DailyActivity.objects.filter(
+        scope=DailyActivity.SITE, day__gte=since).order_by("day"))
+    peak = max([item.posts + item.comments for item in site] or [1]) or 1
+    for item in site:
+        item.share = round(100 * (item.posts + item.comments) / peak)
+    groups = leaders(DailyActivity.GROUP, since, get_option("TOP"))
+    titles = Group.objects.only("title", "slug").in_bulk(
+        [row["object_id"] for row in groups])
+    for row in groups:
+        row["group"] = titles.get(row["object_id"])
+    authors = leaders(DailyActivity.AUTHOR, since, get_option("TOP"))
+    names = User.objects.only("username").in_bulk(
+        [row["object_id"] for row in authors])
+    for row in authors:
+        row["author"] = names.get(row["object_id"])
+    return {
+        "days": days,
+        "periods": PERIODS,
+        "site": site,
+        "total_posts": sum(item.posts for item in site),
+        "total_comments": sum(item.comments for item in site),
+        "groups": groups,
+        "authors": authors,
+        "watermarks": RollupWatermark.objects.order_by("source"),
+    }
@@ -0,0 +1,92 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from . import (counters, duplicates, fragments, group_stats, recommendations,
+               trending)
+from .models import Comment, Follow, Post, PostScore
+
+
+def loaded_group(instance):
+    # Чтение отложенного поля (only/defer) — отдельный запрос на пост
+    return instance.__dict__.get("group_id", DEFERRED)
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._counted_group_id = loaded_group(instance)
+
+
+@receiver(pre_save, sender=Post)
+def load_old_group(sender, instance, **kwargs):
+    if (instance._counted_group_id is DEFERRED and
+            loaded_group(instance) is not DEFERRED and
+            instance.pk is not None):
+        # Группу задали посту, загруженному без неё: прежняя — в базе
+        instance._counted_group_id = Post.objects.filter(
+            pk=instance.pk).values_list("group_id", flat=True).first()
+
+
+@receiver(pre_delete, sender=Post)
+def load_deleted_fields(sender, instance, **kwargs):
+    # После удаления отложенные поля уже не прочитать: count_deleted_post
+    # нужны автор, группа и дата
+    used = {"author_id", "group_id", "pub_date"}
+    deferred = instance.get_deferred_fields() & used
+    if deferred:
+        instance.refresh_from_db(fields=list(deferred))
+    if instance._counted_group_id is DEFERRED:
+        instance._counted_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change(1, counters.post_scopes(instance.author_id,
+                                                instance.group_id))
+        if instance.group_id is not None:
+            group_stats.post_added(instance.group_id, instance.pub_date)
+    elif (instance._counted_group_id is not DEFERRED and
+          loaded_group(instance) != instance._counted_group_id):
+        old_group = instance._counted_group_id
+        if old_group is not None:
+            counters.change(-1, [counters.key("group", old_group)])
+        if instance.group_id is not None:
+            counters.change(1, [counters.key("group", instance.group_id)])
+        PostScore.objects.filter(post=instance).update(
+            group_id=instance.group_id)
+        group_stats.refresh([group_id for group_id in
+                             (old_group, instance.group_id)
+                             if group_id is not None])
+    instance._counted_group_id = loaded_group(instance)
+    if not created:
+        fragments.bump(instance.pk)
+    duplicates.remember(instance)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change(-1, counters.post_scopes(instance.author_id,
+                                             instance._counted_group_id))
+    if instance._counted_group_id is not None:
+        group_stats.post_removed(instance._counted_group_id,
+                                 instance.pub_date)
+
+
+@receiver(post_save, sender=Comment)
+def rank_commented_post(sender, instance, created, **kwargs):
+    if created:
+        trending.record([(instance.post_id, instance.created)])
+    fragments.bump(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def forget_comment(sender, instance, **kwargs):
+    fragments.bump(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def drop_followed_recommendation(sender, instance, created, **kwargs):
+    if created:
+        recommendations.forget(instance.user_id, instance.author_id)
@@ -0,0 +1,35 @@
+from . import deletion, fragments, notifications, thumbnails
+from .jobs import task
+from .models import Post
+
+
+@task("build_thumbnail")
+def build_thumbnail(post_id):
+    """
+    Строит все варианты миниатюры картинки поста заранее, а не при первом
+    показе.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image:
+        thumbnails.backend.get_variants(post.image)
+        fragments.bump(post.pk)
+
+
+@task("notify_followers")
+def notify_followers(post_id, author_id):
+    """
+    Раздаёт уведомление о новом посте подписчикам автора.
+    """
+    notifications.fan_out(post_id, author_id)
+
+
+@task("process_deletion")
+def process_deletion(deletion_id):
+    """
+    Удаляет строки отложенного удаления в течение JOB_TIME_LIMIT секунд
+    и, если работа осталась, ставит продолжение в очередь.
+    """
+    request = deletion.pending().filter(pk=deletion_id).first()
+    if request is not None and not deletion.process(
+            request, time_limit=deletion.get_option("JOB_TIME_LIMIT")):
+        deletion.enqueue(request)
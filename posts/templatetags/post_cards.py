@@ -0,0 +1,21 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, group_index=False):
+    """
+    Отрисовывает карточки постов страницы одним проходом: шаблон карточки
+    загружается один раз, ссылки и счётчики комментариев готовятся заранее.
+    """
+    card = context.template.engine.get_template("includes/card_post.html")
+    output = []
+    with context.push(group_index=group_index):
+        for post in cards.prepare(posts):
+            with context.push(post=post):
+                output.append(card.render(context))
+    return mark_safe("".join(output))
@@ -0,0 +1,16 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag("includes/picture.html")
+def post_picture(post):
+    """
+    Разметка <picture> со всеми вариантами миниатюры картинки поста.
+    Для карточек из posts.cards.prepare данные уже подготовлены пакетно.
+    """
+    if not hasattr(post, "picture"):
+        thumbnails.prefetch([post])
+    return post.picture or {}
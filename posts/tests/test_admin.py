@@ -0,0 +1,81 @@
+import io
+
+from django.contrib.admin import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import counters, deletion
+from posts.models import Group, GroupStats, Post
+
+
+@override_settings(ADMIN_BULK_BATCH_SIZE=2)
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser("admin", "a@a.ru", "pass")
+        cls.author = User.objects.create_user(username="spammer")
+        cls.other = User.objects.create_user(username="other")
+        cls.old = Group.objects.create(title="Старая", slug="old",
+                                       description="Старая")
+        cls.new = Group.objects.create(title="Новая", slug="new",
+                                       description="Новая")
+        cls.url = reverse("admin:posts_post_changelist")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(PostAdminTest.admin)
+        self.spam = [Post.objects.create(text=f"Спам {number}",
+                                         author=PostAdminTest.author,
+                                         group=PostAdminTest.old)
+                     for number in range(5)]
+        self.kept = Post.objects.create(text="Нормальный пост",
+                                        author=PostAdminTest.other)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.get(PostAdminTest.url)
+        # сессия, пользователь, группы для фильтра, посты страницы
+        # и иерархия дат; без COUNT
+        with self.assertNumQueries(6):
+            response = self.client.get(PostAdminTest.url)
+        self.assertEqual(response.context["cl"].result_count, 6)
+        self.assertNotContains(response, "<select name=\"author\"")
+
+    def test_delete_authors_posts_in_background(self):
+        response = self.client.post(PostAdminTest.url, {
+            "action": "delete_authors_posts",
+            ACTION_CHECKBOX_NAME: [self.spam[0].pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        # Посты скрыты сразу, но удаляются только фоновой задачей
+        self.assertEqual(Post.objects.count(), len(self.spam) + 1)
+        self.assertEqual(list(deletion.visible(Post.objects.all())),
+                         [self.kept])
+        call_command("process_deletions", stdout=io.StringIO())
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertEqual(counters.for_group(PostAdminTest.old).value(), 0)
+
+    def test_move_to_group_updates_counters_and_stats(self):
+        form = self.client.post(PostAdminTest.url, {
+            "action": "move_to_group",
+            ACTION_CHECKBOX_NAME: [self.spam[0].pk],
+        })
+        self.assertContains(form, "Все посты авторов")
+        self.assertEqual(counters.for_group(PostAdminTest.old).value(), 5)
+        self.client.post(PostAdminTest.url, {
+            "action": "move_to_group",
+            ACTION_CHECKBOX_NAME: [self.spam[0].pk],
+            "group": PostAdminTest.new.pk,
+            "whole_authors": "on",
+            "apply": "1",
+        })
+        self.assertEqual(Post.objects.filter(
+            group=PostAdminTest.new).count(), 5)
+        self.assertEqual(counters.for_group(PostAdminTest.old).value(), 0)
+        self.assertEqual(counters.for_group(PostAdminTest.new).value(), 5)
+        self.assertEqual(GroupStats.objects.get(
+            group=PostAdminTest.new).post_count, 5)
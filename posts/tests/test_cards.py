@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import cards, deletion
+from posts.models import Comment, Group, Post
+
+
+class CardsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username="Test.User")
+        cls.group = Group.objects.create(title="Группа для теста",
+                                         slug="group_for_test",
+                                         description="Группа для теста")
+        cls.post = Post.objects.create(text="Тестовый пост", author=cls.user,
+                                       group=cls.group)
+        Comment.objects.create(post=cls.post, author=cls.user, text="Коммент")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_urls_match_reverse(self):
+        post = Post.objects.get(pk=CardsTest.post.pk)
+        cards.prepare([post])
+        params = [post.author.username, post.id]
+        self.assertEqual(post.profile_url,
+                         reverse("profile", args=params[:1]))
+        self.assertEqual(post.detail_url, reverse("post", args=params))
+        self.assertEqual(post.edit_url, reverse("post_edit", args=params))
+        self.assertEqual(post.group_url,
+                         reverse("group_list", args=[CardsTest.group.slug]))
+        self.assertEqual(post.comment_count, 1)
+
+    def test_username_with_placeholder_digits(self):
+        author = get_user_model().objects.create_user(
+            username=f"user{cards.POST_ID}")
+        post = Post.objects.create(text="Цифры", author=author)
+        cards.prepare([post])
+        params = [author.username, post.id]
+        self.assertEqual(post.detail_url, reverse("post", args=params))
+        self.assertEqual(post.edit_url, reverse("post_edit", args=params))
+
+    def test_group_page_renders_cards_in_constant_queries(self):
+        for number in range(5):
+            Post.objects.create(text=f"Пост {number}", author=CardsTest.user,
+                                group=CardsTest.group)
+        # Набор удаляемых объектов уже в кеше
+        deletion.hidden()
+        # группа, количество постов, посты и комментарии страницы
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("group_list",
+                                               args=[CardsTest.group.slug]))
+        self.assertContains(response, CardsTest.post.text)
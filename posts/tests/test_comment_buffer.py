@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import comment_buffer
+from posts.models import Comment, Post
+
+
+class CommentBufferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.journal_dir = tempfile.mkdtemp()
+        cls.user = get_user_model().objects.create_user(username="TestUser")
+        cls.post = Post.objects.create(text="Тестовый пост", author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.journal_dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.settings_override = override_settings(COMMENT_BUFFER={
+            "ENABLED": True,
+            "BATCH_SIZE": 3,
+            "FLUSH_INTERVAL": None,
+            "JOURNAL_DIR": CommentBufferTest.journal_dir,
+        })
+        self.settings_override.enable()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CommentBufferTest.user)
+        self.url = reverse("add_comment",
+                           kwargs={"username": CommentBufferTest.user.username,
+                                   "post_id": CommentBufferTest.post.id})
+
+    def tearDown(self):
+        comment_buffer.buffer.entries = []
+        comment_buffer.buffer.flushing = []
+        if comment_buffer.buffer.journal is not None:
+            comment_buffer.buffer.journal.close()
+            comment_buffer.buffer.journal = None
+        for name in os.listdir(CommentBufferTest.journal_dir):
+            os.remove(os.path.join(CommentBufferTest.journal_dir, name))
+        self.settings_override.disable()
+
+    def test_author_sees_pending_comment(self):
+        response = self.authorized_client.post(
+            self.url, {"text": "Отложенный"}, follow=True)
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(response.context["pending_comments"][0].text,
+                         "Отложенный")
+        self.assertFalse(
+            Client().get(response.request["PATH_INFO"]).context[
+                "pending_comments"])
+
+    def test_flush_on_batch_size(self):
+        for number in range(3):
+            self.authorized_client.post(self.url,
+                                        {"text": f"Коммент {number}"})
+        self.assertEqual(Comment.objects.count(), 3)
+        self.assertFalse(comment_buffer.pending(CommentBufferTest.post,
+                                                CommentBufferTest.user))
+
+    def test_replay_journal(self):
+        self.authorized_client.post(self.url, {"text": "Из журнала"})
+        comment_buffer.buffer.journal.close()
+        comment_buffer.buffer.journal = None
+        comment_buffer.buffer.entries = []
+        path = os.path.join(CommentBufferTest.journal_dir,
+                            f"comments-{os.getpid()}.jsonl")
+        os.rename(path, path.replace(str(os.getpid()), "999999999"))
+        self.assertEqual(comment_buffer.replay_journals(), 1)
+        self.assertEqual(comment_buffer.replay_journals(), 0)
+        self.assertTrue(Comment.objects.filter(text="Из журнала").exists())
+
+    def test_failed_flush_keeps_batch_and_journal(self):
+        with mock.patch("posts.trending.record",
+                        side_effect=RuntimeError("база недоступна")), \
+                self.assertLogs("posts.comment_buffer"):
+            for number in range(3):
+                response = self.authorized_client.post(
+                    self.url, {"text": f"Коммент {number}"})
+                self.assertEqual(response.status_code, 302)
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(len(comment_buffer.buffer.entries), 3)
+        self.assertEqual(len(comment_buffer.buffer.flushing), 1)
+        self.assertTrue(os.path.exists(comment_buffer.buffer.flushing[0]))
+        self.assertEqual(comment_buffer.buffer.flush(), 3)
+        self.assertEqual(Comment.objects.count(), 3)
+        self.assertFalse(comment_buffer.buffer.flushing)
+        self.assertFalse([name for name in os.listdir(
+            CommentBufferTest.journal_dir) if name.endswith(".flushing")])
+
+    def test_replay_skips_written_entries_not_equal_text(self):
+        for _ in range(2):
+            self.authorized_client.post(self.url, {"text": "+1"})
+        first = comment_buffer.buffer.entries[0]
+        Comment.objects.create(post=CommentBufferTest.post,
+                               author=CommentBufferTest.user, text="+1",
+                               buffer_id=first["id"])
+        comment_buffer.buffer.journal.close()
+        comment_buffer.buffer.journal = None
+        comment_buffer.buffer.entries = []
+        path = os.path.join(CommentBufferTest.journal_dir,
+                            f"comments-{os.getpid()}.jsonl")
+        os.rename(path, path.replace(str(os.getpid()), "999999999"))
+        self.assertEqual(comment_buffer.replay_journals(), 1)
+        self.assertEqual(Comment.objects.filter(text="+1").count(), 2)
+
+    def test_comment_queued_during_flush_stays_pending(self):
+        self.authorized_client.post(self.url, {"text": "Первый"})
+
+        def add_during_flush(*args):
+            self.authorized_client.post(self.url, {"text": "Второй"})
+
+        with mock.patch("posts.trending.record",
+                        side_effect=add_during_flush):
+            self.assertEqual(comment_buffer.buffer.flush(), 1)
+        self.assertEqual([comment.text for comment in comment_buffer.pending(
+            CommentBufferTest.post, CommentBufferTest.user)], ["Второй"])
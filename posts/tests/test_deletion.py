@@ -0,0 +1,145 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.admin import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import deletion, tasks, thumbnails
+from posts.models import Comment, DeletionRequest, Follow, Group, Post
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DELETION={"BATCH_SIZE": 2},
+                   ADMIN_BULK_BATCH_SIZE=2)
+class DeletionTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="prolific")
+        self.reader = User.objects.create_user(username="reader")
+        self.group = Group.objects.create(title="Удаляемая", slug="gone",
+                                          description="Удаляемая")
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 300), "red").save(buffer, "JPEG")
+        self.posts = [Post.objects.create(text=f"Пост {number}",
+                                          author=self.author,
+                                          group=self.group)
+                      for number in range(4)]
+        self.posts.append(Post.objects.create(
+            text="С картинкой", author=self.author,
+            image=SimpleUploadedFile("pic.jpg", buffer.getvalue(),
+                                     content_type="image/jpeg")))
+        self.kept = Post.objects.create(text="Чужой пост", author=self.reader,
+                                        group=self.group)
+        for post in self.posts[:3]:
+            Comment.objects.create(post=post, author=self.reader,
+                                   text="Ответ")
+        Comment.objects.create(post=self.kept, author=self.author,
+                               text="Коммент автора")
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_user_is_hidden_at_once_and_deleted_in_resumable_batches(self):
+        image = self.posts[-1].image
+        built = thumbnails.backend.get_variants(image).values()
+        self.assertTrue(all(thumbnail.exists() for thumbnail in built))
+        request = deletion.request(self.author)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        profile = reverse("profile", args=["prolific"])
+        self.assertEqual(self.client.get(profile).status_code, 404)
+        post_url = reverse("post", args=["prolific", self.posts[0].pk])
+        self.assertEqual(self.client.get(post_url).status_code, 404)
+        response = self.client.get(reverse("index"))
+        self.assertEqual([post.pk for post in response.context["page"]],
+                         [self.kept.pk])
+        # Одна пачка за запуск: удаление останавливается и продолжается
+        self.assertFalse(deletion.process(request, time_limit=0))
+        request.refresh_from_db()
+        self.assertEqual(request.stage, "follows")
+        call_command("process_deletions", stdout=io.StringIO())
+        request.refresh_from_db()
+        self.assertEqual(request.status, DeletionRequest.DONE)
+        self.assertEqual(json.loads(request.progress),
+                         {"follows": 1, "comments": 1, "posts": 5,
+                          "user": 1})
+        self.assertFalse(get_user_model().objects.filter(
+            username="prolific").exists())
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(os.path.exists(image.path))
+        self.assertFalse(any(thumbnail.exists() for thumbnail in built))
+
+    def test_group_posts_are_detached_before_group_is_deleted(self):
+        request = deletion.request(self.group)
+        url = reverse("group_list", args=["gone"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertNotContains(self.client.get(reverse("group_index")),
+                               "Удаляемая")
+        tasks.process_deletion(request.pk)
+        self.assertFalse(Group.objects.filter(slug="gone").exists())
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertEqual(json.loads(DeletionRequest.objects.get(
+            pk=request.pk).progress), {"posts": 5, "group": 1})
+
+    def test_admin_deletes_posts_in_background(self):
+        admin = get_user_model().objects.create_superuser(
+            "admin", "a@a.ru", "pass")
+        self.client.force_login(admin)
+        self.client.post(reverse("admin:posts_post_changelist"), {
+            "action": "delete_in_background",
+            ACTION_CHECKBOX_NAME: [self.posts[0].pk],
+        })
+        self.assertNotIn(self.posts[0].pk,
+                         [post.pk for post in self.client.get(
+                             reverse("index")).context["page"]])
+        out = io.StringIO()
+        call_command("process_deletions", "--status", stdout=out)
+        self.assertIn("ожидает", out.getvalue())
+        call_command("process_deletions", stdout=io.StringIO())
+        self.assertFalse(Post.objects.filter(pk=self.posts[0].pk).exists())
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_admin_delete_button_deletes_in_background(self):
+        admin = get_user_model().objects.create_superuser(
+            "admin", "a@a.ru", "pass")
+        self.client.force_login(admin)
+        url = reverse("admin:posts_group_delete", args=[self.group.pk])
+        self.assertContains(self.client.get(url), "gone")
+        self.client.post(url, {"post": "yes"})
+        self.assertTrue(Group.objects.filter(pk=self.group.pk).exists())
+        self.assertTrue(deletion.is_hidden(DeletionRequest.GROUP,
+                                           self.group.pk))
+        call_command("process_deletions", stdout=io.StringIO())
+        self.assertFalse(Group.objects.filter(pk=self.group.pk).exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+
+    def test_deletion_from_another_process_is_seen_in_seconds(self):
+        self.assertFalse(deletion.is_hidden(DeletionRequest.POST,
+                                            self.kept.pk))
+        # Запрос создан другим процессом: наш кеш о нём не знает
+        DeletionRequest.objects.create(kind=DeletionRequest.POST,
+                                       object_id=self.kept.pk,
+                                       label=deletion.describe(self.kept))
+        later = time.time() + 10
+        with mock.patch("django.core.cache.backends.locmem.time.time",
+                        return_value=later):
+            self.assertTrue(deletion.is_hidden(DeletionRequest.POST,
+                                               self.kept.pk))
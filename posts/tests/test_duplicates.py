@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import duplicates
+from posts.forms import PostForm
+from posts.models import Post, PostFingerprint
+
+SPAM = ("Купите наши чудесные часы со скидкой прямо сегодня, доставка "
+        "по всей стране бесплатно, пишите в личные сообщения")
+
+
+class NearDuplicateTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username="spammer")
+
+    def test_small_edits_keep_hash_close(self):
+        edited = SPAM.upper().replace("ЧАСЫ", "ЧACЫ") + " срочно!!!"
+        self.assertLessEqual(duplicates.distance(
+            duplicates.simhash(SPAM), duplicates.simhash(edited)), 3)
+        other = ("Сегодня гуляли в парке с собакой, погода была отличная, "
+                 "а вечером смотрели старое кино всей семьёй")
+        self.assertGreater(duplicates.distance(
+            duplicates.simhash(SPAM), duplicates.simhash(other)), 3)
+        self.assertIsNone(duplicates.simhash("коротко"))
+
+    def test_form_rejects_near_duplicate(self):
+        post = Post.objects.create(text=SPAM, author=NearDuplicateTest.user)
+        form = PostForm({"text": SPAM.replace("часы", "чacы")})
+        self.assertFalse(form.is_valid())
+        # правка самого поста дубликатом не считается
+        self.assertTrue(PostForm({"text": SPAM}, instance=post).is_valid())
+
+    @override_settings(NEAR_DUPLICATES={"MODE": "flag"})
+    def test_flag_mode_marks_duplicate(self):
+        first = Post.objects.create(text=SPAM, author=NearDuplicateTest.user)
+        self.assertTrue(PostForm({"text": SPAM}).is_valid())
+        second = Post.objects.create(text=SPAM, author=NearDuplicateTest.user)
+        self.assertEqual(second.fingerprint.duplicate_of, first)
+
+    def test_build_command_indexes_existing_posts(self):
+        post = Post.objects.create(text=SPAM, author=NearDuplicateTest.user)
+        PostFingerprint.objects.all().delete()
+        call_command("build_simhash_index", stdout=open("/dev/null", "w"))
+        self.assertEqual(duplicates.find(SPAM), post.pk)
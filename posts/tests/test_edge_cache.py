@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post, Recommendation
+
+
+@override_settings(EDGE_CACHE=True, EDGE_CACHE_MAX_AGE=60)
+class EdgeCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.author = User.objects.create_user(username="edge")
+        cls.reader = User.objects.create_user(username="visitor")
+        cls.group = Group.objects.create(title="Кеш", slug="edge",
+                                         description="Кеш")
+        cls.post = Post.objects.create(text="Общий пост", author=cls.author,
+                                       group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Recommendation.objects.create(user=cls.author, author=cls.reader,
+                                      score=1, built=timezone.now())
+        cls.urls = [
+            reverse("index"),
+            reverse("group_list", args=["edge"]),
+            reverse("profile", args=["edge"]),
+            reverse("post", args=["edge", cls.post.pk]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_are_public_and_same_for_everyone(self):
+        for url in EdgeCacheTest.urls:
+            with self.subTest(url=url):
+                self.client.logout()
+                anonymous = self.client.get(url)
+                cache.clear()
+                self.client.force_login(EdgeCacheTest.author)
+                logged_in = self.client.get(url)
+                self.assertEqual(logged_in.content, anonymous.content)
+                self.assertIn("public", logged_in["Cache-Control"])
+                self.assertIn("s-maxage=60", logged_in["Cache-Control"])
+                self.assertNotIn("Cookie", logged_in.get("Vary", ""))
+                self.assertFalse(logged_in.cookies)
+                self.assertNotContains(logged_in, "csrfmiddlewaretoken\" "
+                                                  "value")
+
+    @override_settings(STREAMING_RENDER=True)
+    def test_streamed_page_is_public(self):
+        self.client.force_login(EdgeCacheTest.reader)
+        response = self.client.get(EdgeCacheTest.urls[-1])
+        self.assertIn("public", response["Cache-Control"])
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertFalse(response.cookies)
+
+    def test_personal_parts_in_one_request(self):
+        url = reverse("personal")
+        response = self.client.get(url)
+        self.assertEqual(response.json(), {"user": None})
+        self.client.force_login(EdgeCacheTest.reader)
+        response = self.client.get(url, {
+            "authors": f"{EdgeCacheTest.author.pk},{EdgeCacheTest.reader.pk}",
+            "post": EdgeCacheTest.post.pk,
+        })
+        data = response.json()
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertEqual(data["user"]["username"], "visitor")
+        self.assertEqual(data["following"], [EdgeCacheTest.author.pk])
+        self.assertTrue(data["csrf"])
+        self.assertNotIn("recommendations", data)
+        self.client.force_login(EdgeCacheTest.author)
+        data = self.client.get(url, {
+            "profile": EdgeCacheTest.author.pk}).json()
+        self.assertIn("@visitor", data["recommendations"])
+
+    def test_author_sees_own_comment_after_posting(self):
+        self.client.force_login(EdgeCacheTest.reader)
+        url = EdgeCacheTest.urls[-1]
+        # Страница уже лежит в кеше CDN
+        self.assertIn("public", self.client.get(url)["Cache-Control"])
+        response = self.client.post(
+            reverse("add_comment", args=["edge", EdgeCacheTest.post.pk]),
+            {"text": "Мой свежий комментарий"}, follow=True)
+        redirected, _ = response.redirect_chain[-1]
+        self.assertTrue(redirected.startswith(f"{url}?fresh="))
+        self.assertNotIn("public", response["Cache-Control"])
+        self.assertIn("no-store", response["Cache-Control"])
+        self.assertContains(response, "Мой свежий комментарий")
+
+    @override_settings(EDGE_CACHE=False)
+    def test_disabled_pages_stay_personal(self):
+        self.client.force_login(EdgeCacheTest.author)
+        response = self.client.get(EdgeCacheTest.urls[-1])
+        self.assertNotIn("public", response.get("Cache-Control", ""))
+        self.assertContains(response, "Пользователь: edge")
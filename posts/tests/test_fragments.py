@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import fragments
+from posts.models import Comment, Post
+
+
+class PostDetailFragmentTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.author = User.objects.create_user(username="writer")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.post = Post.objects.create(text="Вирусный пост", author=cls.author)
+        cls.url = reverse("post", args=["writer", cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_page_skips_post_and_comment_queries(self):
+        url = PostDetailFragmentTest.url
+        self.client.get(url)
+        # пост и карточка автора; комментарии берутся из фрагмента
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertContains(response, "Вирусный пост")
+
+    def test_comment_create_and_delete_bump_version(self):
+        url = PostDetailFragmentTest.url
+        self.client.get(url)
+        comment = Comment.objects.create(post=PostDetailFragmentTest.post,
+                                         author=PostDetailFragmentTest.reader,
+                                         text="Новый комментарий")
+        self.assertContains(self.client.get(url), "Новый комментарий")
+        comment.delete()
+        self.assertNotContains(self.client.get(url), "Новый комментарий")
+
+    def test_post_edit_bumps_version_and_edit_link_is_per_user(self):
+        url = PostDetailFragmentTest.url
+        self.client.force_login(PostDetailFragmentTest.reader)
+        self.assertNotContains(self.client.get(url), "Редактировать")
+        post = Post.objects.get(pk=PostDetailFragmentTest.post.pk)
+        post.text = "Исправленный пост"
+        post.save()
+        self.client.force_login(PostDetailFragmentTest.author)
+        response = self.client.get(url)
+        self.assertContains(response, "Исправленный пост")
+        self.assertContains(response, "Редактировать")
+
+    def test_bump_from_another_process_is_seen(self):
+        url = PostDetailFragmentTest.url
+        self.client.get(url)
+        post_id = PostDetailFragmentTest.post.pk
+        # Задача в run_jobs со своим кешем в памяти
+        with mock.patch("posts.fragments.cache", LocMemCache("worker", {})):
+            Post.objects.filter(pk=post_id).update(text="Пост из задачи")
+            fragments.bump(post_id)
+        self.assertContains(self.client.get(url), "Пост из задачи")
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, GroupStats, Post
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username="stats")
+        cls.quiet = Group.objects.create(title="Тихая", slug="quiet",
+                                         description="Тихая")
+        cls.busy = Group.objects.create(title="Шумная", slug="busy",
+                                        description="Шумная")
+
+    def test_posts_update_stats(self):
+        first = Post.objects.create(text="Первый", author=GroupStatsTest.user,
+                                    group=GroupStatsTest.busy)
+        second = Post.objects.create(text="Второй",
+                                     author=GroupStatsTest.user,
+                                     group=GroupStatsTest.busy)
+        stats = GroupStats.objects.get(group=GroupStatsTest.busy)
+        self.assertEqual((stats.post_count, stats.week_posts), (2, 2))
+        self.assertEqual(stats.last_post_at, second.pub_date)
+        second.delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.post_count, stats.week_posts), (1, 1))
+        self.assertEqual(stats.last_post_at, first.pub_date)
+        first.group = GroupStatsTest.quiet
+        first.save()
+        stats.refresh_from_db()
+        self.assertEqual(stats.post_count, 0)
+        self.assertEqual(GroupStats.objects.get(
+            group=GroupStatsTest.quiet).post_count, 1)
+
+    def test_refresh_ages_out_week_posts(self):
+        post = Post.objects.create(text="Старый", author=GroupStatsTest.user,
+                                   group=GroupStatsTest.quiet)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=8))
+        call_command("refresh_group_stats", stdout=open("/dev/null", "w"))
+        stats = GroupStats.objects.get(group=GroupStatsTest.quiet)
+        self.assertEqual((stats.post_count, stats.week_posts), (1, 0))
+        self.assertEqual(GroupStats.objects.get(
+            group=GroupStatsTest.busy).post_count, 0)
+
+    def test_directory_is_one_query_sorted_by_activity(self):
+        Post.objects.create(text="Пост", author=GroupStatsTest.user,
+                            group=GroupStatsTest.busy)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("group_index"))
+        groups = list(response.context["groups"])
+        self.assertEqual(groups, [GroupStatsTest.busy, GroupStatsTest.quiet])
+        response = self.client.get(reverse("group_index"), {"sort": "title"})
+        self.assertEqual(list(response.context["groups"]),
+                         [GroupStatsTest.quiet, GroupStatsTest.busy])
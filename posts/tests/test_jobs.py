@@ -0,0 +1,70 @@
+from django.core import mail
+from django.contrib.auth import get_user_model
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts import jobs
+from posts.models import Job
+
+calls = []
+
+
+@jobs.task("test_append")
+def append(value):
+    calls.append(value)
+
+
+@jobs.task("test_fail")
+def fail():
+    raise RuntimeError("Ошибка задачи")
+
+
+class JobQueueTest(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        jobs.enqueue("test_append", value=1)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_idempotency_key(self):
+        jobs.enqueue("test_append", key="once", value=1)
+        jobs.enqueue("test_append", key="once", value=2)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_key_is_released_when_job_finishes(self):
+        jobs.enqueue("test_append", key="again", value=1)
+        jobs.run_pending()
+        jobs.enqueue("test_append", key="again", value=2)
+        jobs.run_pending()
+        self.assertEqual(calls, [1, 2])
+        self.assertFalse(Job.objects.filter(
+            idempotency_key__isnull=False).exists())
+
+    def test_priority_lanes(self):
+        jobs.enqueue("test_append", lane="low", value="low")
+        jobs.enqueue("test_append", lane="high", value="high")
+        jobs.run_pending()
+        self.assertEqual(calls, ["high", "low"])
+
+    def test_retry_with_backoff(self):
+        jobs.enqueue("test_fail")
+        jobs.run_pending()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("Ошибка задачи", job.last_error)
+        # повтор отложен, поэтому сейчас забирать нечего
+        self.assertEqual(jobs.claim(10), [])
+
+    def test_password_reset_mail_is_queued(self):
+        get_user_model().objects.create_user(username="TestUser",
+                                             email="test@test.com",
+                                             password="test")
+        Client().post(reverse("password_reset"), {"email": "test@test.com"})
+        self.assertEqual(len(mail.outbox), 0)
+        jobs.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["test@test.com"])
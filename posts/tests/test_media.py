@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+
+from django.test import Client, SimpleTestCase, override_settings
+
+
+class MediaServingTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.root, "posts"))
+        os.makedirs(os.path.join(cls.root, "private"))
+        cls.content = bytes(range(256)) * 4
+        for folder in ("posts", "private"):
+            with open(os.path.join(cls.root, folder, "pic.jpg"), "wb") as f:
+                f.write(cls.content)
+        cls.settings_override = override_settings(MEDIA_ROOT=cls.root)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_full_file(self):
+        response = self.guest_client.get("/media/posts/pic.jpg")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content),
+                         MediaServingTest.content)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_private_folder_is_hidden(self):
+        response = self.guest_client.get("/media/private/pic.jpg")
+        self.assertEqual(response.status_code, 404)
+
+    def test_path_traversal(self):
+        response = self.guest_client.get("/media/posts/../private/pic.jpg")
+        self.assertEqual(response.status_code, 404)
+
+    def test_byte_range(self):
+        response = self.guest_client.get("/media/posts/pic.jpg",
+                                         HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(b"".join(response.streaming_content),
+                         MediaServingTest.content[10:20])
+
+    def test_unsatisfiable_range(self):
+        response = self.guest_client.get("/media/posts/pic.jpg",
+                                         HTTP_RANGE="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_etag_not_modified(self):
+        etag = self.guest_client.get("/media/posts/pic.jpg")["ETag"]
+        response = self.guest_client.get("/media/posts/pic.jpg",
+                                         HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(MEDIA_ACCEL="nginx")
+    def test_accel_redirect(self):
+        response = self.guest_client.get("/media/posts/pic.jpg")
+        self.assertEqual(response["X-Accel-Redirect"],
+                         "/protected-media/posts/pic.jpg")
+        self.assertEqual(response.content, b"")
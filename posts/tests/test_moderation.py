@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.test import TestCase
+
+from posts import moderation
+from posts.forms import CommentForm, PostForm
+
+
+class ModerationTest(TestCase):
+    def test_automaton_finds_overlapping_words(self):
+        automaton = moderation.Automaton(["he", "she", "his", "hers"])
+        self.assertEqual(automaton.find("ushers"), "she")
+        self.assertEqual(automaton.find("ahis"), "his")
+        self.assertIsNone(automaton.find("hx"))
+
+    def test_homoglyphs_and_invisible_characters(self):
+        rules = moderation.Rules(["спам", "re:казино\\s*\\d+"])
+        self.assertEqual(rules.find("Лучший CПAM тут"), "спам")
+        self.assertEqual(rules.find("сп\u200bам"), "спам")
+        self.assertEqual(rules.find("Kазино 777"), "казино 777")
+        self.assertIsNone(rules.find("спокойный текст"))
+
+    def test_latin_regex_rule(self):
+        rules = moderation.Rules(["re:\\bcasino\\s*\\d+"])
+        self.assertEqual(rules.find("Best CASINO 777"), "casino 777")
+        self.assertEqual(rules.find("cas\u200bino 1"), "casino 1")
+        self.assertIsNone(rules.find("casinos"))
+
+    def test_rules_file_is_reloaded_on_change(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rules.txt")
+            with open(path, "w", encoding="utf-8") as rules_file:
+                rules_file.write("# комментарий\nпервое\n")
+            with self.settings(MODERATION={"RULES_FILE": path,
+                                           "RELOAD_INTERVAL": 0}):
+                self.assertEqual(moderation.find("это первое"), "первое")
+                with open(path, "w", encoding="utf-8") as rules_file:
+                    rules_file.write("второе\n")
+                os.utime(path, ns=(0, 10 ** 18))
+                self.assertIsNone(moderation.find("это первое"))
+                self.assertEqual(moderation.find("это второе"), "второе")
+
+    def test_forms_reject_banned_text(self):
+        self.assertFalse(CommentForm({"text": "Плохой кoммент"}).is_valid())
+        self.assertTrue(CommentForm({"text": "Хороший коммент"}).is_valid())
+        form = PostForm({"text": "Это плохой коммент"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("text", form.errors)
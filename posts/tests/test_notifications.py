@@ -0,0 +1,73 @@
+import json
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import jobs, notifications
+from posts.models import Follow, Job, Notification, Post
+
+
+class NotificationsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.author = User.objects.create_user(username="author")
+        cls.followers = [User.objects.create_user(username=f"reader{number}")
+                         for number in range(5)]
+        Follow.objects.bulk_create(Follow(user=user, author=cls.author)
+                                   for user in cls.followers)
+        cls.post = Post.objects.create(text="Новый пост", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(NOTIFICATIONS={"BATCH_SIZE": 2})
+    def test_fan_out_in_batches_is_idempotent(self):
+        post = NotificationsTest.post
+        self.assertEqual(notifications.fan_out(post.pk, post.author_id), 5)
+        self.assertEqual(notifications.fan_out(post.pk, post.author_id), 0)
+        self.assertEqual(Notification.objects.count(), 5)
+
+    def test_unread_counter_is_cached_and_incremented(self):
+        reader = NotificationsTest.followers[0]
+        self.client.force_login(reader)
+        url = reverse("notification_count")
+        self.assertEqual(self.client.get(url).json(), {"unread": 0})
+        post = NotificationsTest.post
+        notifications.fan_out(post.pk, post.author_id)
+        # число берётся из кеша, в базу — только за сессией и пользователем
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(url).json(), {"unread": 1})
+
+    def test_count_from_job_worker_is_seen_after_timeout(self):
+        reader = NotificationsTest.followers[0]
+        self.assertEqual(notifications.unread_count(reader), 0)
+        post = NotificationsTest.post
+        job = Job.objects.create(name="notify_followers", payload=json.dumps(
+            {"post_id": post.pk, "author_id": post.author_id}))
+        # У процесса run_jobs свой кеш в памяти
+        worker_cache = LocMemCache("worker", {})
+        with mock.patch("posts.notifications.cache", worker_cache):
+            self.assertTrue(jobs.run(job.pk))
+        self.assertEqual(notifications.unread_count(reader), 0)
+        later = time.time() + notifications.get_option("COUNT_TIMEOUT") + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time",
+                        return_value=later):
+            self.assertEqual(notifications.unread_count(reader), 1)
+
+    def test_inbox_marks_notifications_read(self):
+        reader = NotificationsTest.followers[1]
+        post = NotificationsTest.post
+        notifications.fan_out(post.pk, post.author_id)
+        self.client.force_login(reader)
+        response = self.client.get(reverse("notifications"))
+        self.assertContains(response, "@author")
+        self.assertEqual(notifications.unread_count(reader), 0)
+        self.assertFalse(Notification.objects.filter(
+            recipient=reader, is_read=False).exists())
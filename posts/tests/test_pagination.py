@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Group, Post
+from posts.pagination import elided_page_range
+
+
+class ElidedRangeTest(TestCase):
+    def test_short_range_is_not_elided(self):
+        self.assertEqual(elided_page_range(3, 7), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_window_around_current_page(self):
+        self.assertEqual(elided_page_range(50, 4021),
+                         [1, None, 48, 49, 50, 51, 52, None, 4021])
+        self.assertEqual(elided_page_range(1, 100),
+                         [1, 2, 3, None, 100])
+        self.assertEqual(elided_page_range(100, 100),
+                         [1, None, 98, 99, 100])
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username="counter")
+        cls.group = Group.objects.create(title="Группа", slug="counted",
+                                         description="Группа")
+        cls.other = Group.objects.create(title="Другая", slug="other",
+                                         description="Другая")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_signals_keep_counters_in_sync(self):
+        group_counter = counters.for_group(CountersTest.group)
+        self.assertEqual(group_counter.value(), 0)
+        self.assertEqual(counters.for_all().value(), 0)
+        post = Post.objects.create(text="Пост", author=CountersTest.user,
+                                   group=CountersTest.group)
+        self.assertEqual(group_counter.value(), 1)
+        self.assertEqual(counters.for_all().value(), 1)
+        post.group = CountersTest.other
+        post.save()
+        self.assertEqual(group_counter.value(), 0)
+        self.assertEqual(counters.for_group(CountersTest.other).value(), 1)
+        post.delete()
+        self.assertEqual(counters.for_all().value(), 0)
+        self.assertEqual(counters.for_author(CountersTest.user).value(), 0)
+
+    def test_deferred_posts_are_loaded_in_one_query(self):
+        for number in range(3):
+            Post.objects.create(text=f"Пост {number}",
+                                author=CountersTest.user,
+                                group=CountersTest.group)
+        with self.assertNumQueries(1):
+            list(Post.objects.only("text"))
+
+    def test_group_change_on_deferred_post_is_counted(self):
+        Post.objects.create(text="Пост", author=CountersTest.user,
+                            group=CountersTest.group)
+        post = Post.objects.only("text").get()
+        post.group = CountersTest.other
+        post.save()
+        self.assertEqual(counters.for_group(CountersTest.group).value(), 0)
+        self.assertEqual(counters.for_group(CountersTest.other).value(), 1)
+        post = Post.objects.only("text").get()
+        post.text = "Другой текст"
+        post.save()
+        post.delete()
+        self.assertEqual(counters.for_group(CountersTest.other).value(), 0)
+
+    def test_stale_counter_is_corrected_by_page(self):
+        for number in range(3):
+            Post.objects.create(text=f"Пост {number}",
+                                author=CountersTest.user)
+        counter = counters.for_all()
+        for stale in (0, 25):
+            counter.correct(stale)
+            response = self.client.get(reverse("index"))
+            self.assertEqual(response.context["paginator"].count, 3)
+            self.assertEqual(len(response.context["page"].object_list), 3)
+            self.assertEqual(counter.value(), 3)
+
+    def test_page_uses_cached_count(self):
+        Post.objects.create(text="Пост", author=CountersTest.user,
+                            group=CountersTest.group)
+        url = reverse("group_list", args=[CountersTest.group.slug])
+        self.client.get(url)
+        # группа, посты и комментарии страницы: число постов из кеша
+        with self.assertNumQueries(3):
+            self.client.get(url)
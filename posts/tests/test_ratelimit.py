@@ -0,0 +1,84 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts import ratelimit
+from posts.models import Post
+
+
+class TokenBucketTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_burst_then_reject(self):
+        for _ in range(3):
+            self.assertEqual(ratelimit.hit("rl:test", "3/m", now=100), 0)
+        self.assertEqual(ratelimit.hit("rl:test", "3/m", now=100), 20)
+
+    def test_tokens_refill(self):
+        for _ in range(3):
+            ratelimit.hit("rl:test", "3/m", now=100)
+        self.assertEqual(ratelimit.hit("rl:test", "3/m", now=120), 0)
+        self.assertNotEqual(ratelimit.hit("rl:test", "3/m", now=120), 0)
+
+    def test_rejected_request_does_not_spend_token(self):
+        for _ in range(10):
+            ratelimit.hit("rl:test", "1/m", now=100)
+        self.assertEqual(ratelimit.hit("rl:test", "1/m", now=160), 0)
+
+    def test_allowed_hit_extends_key_lifetime(self):
+        now = time.time()
+        for _ in range(3):
+            ratelimit.hit("rl:test", "3/m", now=now)
+        # Первый запрос задал срок ключа около 21 с; через 25 с ведро
+        # должно помнить, что вернулся только один токен
+        with mock.patch("time.time", return_value=now + 25):
+            self.assertEqual(ratelimit.hit("rl:test", "3/m"), 0)
+            self.assertNotEqual(ratelimit.hit("rl:test", "3/m"), 0)
+
+
+@override_settings(RATELIMITS={"new_post": {"user": "5/m", "ip": "1/m"}})
+class CombinedRulesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rejection_by_ip_refunds_user_token(self):
+        user = get_user_model().objects.create_user(username="shared-ip")
+        request = RequestFactory().post("/new/")
+        request.user = user
+        self.assertEqual(ratelimit.check("new_post", request), 0)
+        for _ in range(3):
+            self.assertNotEqual(ratelimit.check("new_post", request), 0)
+        # Отказы по IP не потратили токены пользователя: взят только один
+        for _ in range(4):
+            self.assertEqual(ratelimit.hit(f"rl:new_post:u:{user.pk}",
+                                           "5/m"), 0)
+
+
+@override_settings(RATELIMITS={"add_comment": {"user": "2/m"}})
+class RateLimitedViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username="TestUser")
+        cls.post = Post.objects.create(text="Тестовый пост", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(RateLimitedViewTest.user)
+
+    def test_too_many_comments(self):
+        url = reverse("add_comment",
+                      kwargs={"username": RateLimitedViewTest.user.username,
+                              "post_id": RateLimitedViewTest.post.id})
+        for _ in range(2):
+            response = self.authorized_client.post(url, {"text": "Коммент"})
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(url, {"text": "Коммент"})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response["Retry-After"]) > 0)
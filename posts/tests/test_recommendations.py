@@ -0,0 +1,76 @@
+import sys
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import recommendations
+from posts.models import Follow, Recommendation
+
+
+class RecommendationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.users = {name: User.objects.create_user(username=name)
+                     for name in ("ann", "bob", "cat", "dan", "eve", "fox")}
+
+    def follow(self, *pairs):
+        Follow.objects.bulk_create(
+            [Follow(user=self.users[user], author=self.users[author])
+             for user, author in pairs])
+
+    def recommended(self, name):
+        return [(item.author.username, item.mutual) for item in
+                recommendations.for_user(self.users[name], limit=10)]
+
+    def test_friends_of_friends_and_co_follow(self):
+        # ann читает bob и cat; их подписки — кандидаты ann, dan читают оба.
+        # fox тоже читает bob, а ещё eve — это совместная подписка
+        self.follow(("ann", "bob"), ("ann", "cat"), ("bob", "dan"),
+                    ("cat", "dan"), ("cat", "ann"), ("fox", "bob"),
+                    ("fox", "eve"))
+        call_command("build_recommendations", stdout=StringIO())
+        self.assertEqual(self.recommended("ann"), [("dan", 2), ("eve", 0)])
+        # Себя и тех, кого уже читает, не рекомендуем
+        self.assertNotIn("ann", [name for name, _ in self.recommended("cat")])
+
+    @override_settings(RECOMMENDATIONS={"MAX_PAIRS": 1, "TOP": 1})
+    def test_blocks_give_same_result_and_drop_stale(self):
+        self.follow(("ann", "bob"), ("bob", "dan"), ("bob", "eve"),
+                    ("cat", "bob"), ("eve", "fox"))
+        Recommendation.objects.create(user=self.users["fox"],
+                                      author=self.users["ann"], score=1,
+                                      built=timezone.now())
+        recommendations.build()
+        self.assertEqual(self.recommended("ann"), [("dan", 1)])
+        self.assertEqual(self.recommended("bob"), [("fox", 1)])
+        self.assertEqual(self.recommended("fox"), [])
+
+    def test_command_without_numpy(self):
+        with mock.patch.dict(sys.modules, {"numpy": None}), \
+                self.assertRaises(CommandError):
+            call_command("build_recommendations", stdout=StringIO())
+
+    def test_widget_reads_one_query_and_follow_drops_item(self):
+        ann = self.users["ann"]
+        for score, name in enumerate(("bob", "cat", "dan")):
+            Recommendation.objects.create(user=ann, author=self.users[name],
+                                          score=score, built=timezone.now())
+        self.client.force_login(ann)
+        with self.assertNumQueries(1):
+            self.assertEqual([item.author.username for item in
+                              recommendations.for_user(ann)],
+                             ["dan", "cat", "bob"])
+        response = self.client.get(reverse("follow_index"))
+        self.assertContains(response, "Кого почитать")
+        self.assertContains(response, "@dan")
+        self.client.get(reverse("profile_follow", args=["dan"]))
+        response = self.client.get(reverse("profile", args=["ann"]))
+        self.assertNotContains(response, "@dan")
+        self.assertContains(response, "@cat")
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import rollups
+from posts.models import Comment, DailyActivity, Group, Post, RollupWatermark
+
+
+@override_settings(ROLLUPS={"BATCH_SIZE": 2, "LAG": 0})
+class RollupTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.author = User.objects.create_user(username="writer")
+        cls.staff = User.objects.create_user(username="boss", is_staff=True)
+        cls.group = Group.objects.create(title="Сводки", slug="rollups",
+                                         description="Сводки")
+
+    def activity(self, scope, object_id=0):
+        return DailyActivity.objects.filter(
+            scope=scope, object_id=object_id).values_list(
+                "posts", "comments").first()
+
+    def test_incremental_rollup(self):
+        post = Post.objects.create(text="Первый", author=RollupTest.author,
+                                   group=RollupTest.group)
+        Post.objects.create(text="Второй", author=RollupTest.author)
+        Comment.objects.create(post=post, author=RollupTest.staff,
+                               text="Коммент")
+        call_command("rollup_activity", stdout=StringIO())
+        self.assertEqual(self.activity(DailyActivity.SITE), (2, 1))
+        self.assertEqual(self.activity(DailyActivity.GROUP,
+                                       RollupTest.group.pk), (1, 1))
+        self.assertEqual(self.activity(DailyActivity.AUTHOR,
+                                       RollupTest.author.pk), (2, 0))
+        self.assertEqual(self.activity(DailyActivity.AUTHOR,
+                                       RollupTest.staff.pk), (0, 1))
+        # Повторный запуск не считает старые строки ещё раз
+        self.assertEqual(rollups.advance_all(), {"post": 0, "comment": 0})
+        Post.objects.create(text="Третий", author=RollupTest.author,
+                            group=RollupTest.group)
+        self.assertEqual(rollups.advance_all(), {"post": 1, "comment": 0})
+        self.assertEqual(self.activity(DailyActivity.SITE), (3, 1))
+        self.assertEqual(RollupWatermark.objects.get(source="post").last_id,
+                         Post.objects.order_by("pk").last().pk)
+
+    @override_settings(ROLLUPS={"LAG": 60})
+    def test_recent_rows_wait_for_lag(self):
+        Post.objects.create(text="Свежий", author=RollupTest.author)
+        self.assertEqual(rollups.advance("post"), 0)
+        later = timezone.now() + timedelta(minutes=2)
+        self.assertEqual(rollups.advance("post", now=later), 1)
+
+    def test_dashboard_is_staff_only_and_reads_rollups(self):
+        url = reverse("analytics")
+        self.client.force_login(RollupTest.author)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        Post.objects.create(text="Пост", author=RollupTest.author,
+                            group=RollupTest.group)
+        rollups.advance_all()
+        self.client.force_login(RollupTest.staff)
+        response = self.client.get(url, {"days": 7})
+        self.assertEqual(response.context["days"], 7)
+        self.assertEqual(response.context["total_posts"], 1)
+        self.assertContains(response, RollupTest.group.title)
+        self.assertContains(response, "@writer")
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+SCRIPT = """
+import json
+from django.conf import settings
+print(json.dumps({
+    "debug": settings.DEBUG,
+    "apps": settings.INSTALLED_APPS,
+    "middleware": settings.MIDDLEWARE,
+    "loaders": settings.TEMPLATES[0]["OPTIONS"].get("loaders"),
+    "conn_max_age": settings.DATABASES["default"]["CONN_MAX_AGE"],
+    "cache": settings.CACHES["default"]["BACKEND"],
+}))
+"""
+
+
+class SettingsProfileTest(SimpleTestCase):
+    def load(self, **env):
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT],
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE="yatube.settings",
+                     **env),
+            cwd=settings.BASE_DIR, capture_output=True, text=True)
+        return result.returncode, result.stdout, result.stderr
+
+    def test_production_profile_is_lean(self):
+        code, out, err = self.load(YATUBE_ENV="production",
+                                   YATUBE_SECRET_KEY="test")
+        self.assertEqual(code, 0, err)
+        loaded = json.loads(out)
+        self.assertFalse(loaded["debug"])
+        self.assertNotIn("debug_toolbar", loaded["apps"])
+        self.assertFalse([name for name in loaded["middleware"]
+                          if name.startswith("debug_toolbar")])
+        self.assertEqual(loaded["loaders"][0][0],
+                         "django.template.loaders.cached.Loader")
+        self.assertGreater(loaded["conn_max_age"], 0)
+        self.assertIn(loaded["cache"], settings.SHARED_CACHES)
+
+    def test_production_requires_secret_key(self):
+        code, _, err = self.load(YATUBE_ENV="production",
+                                 YATUBE_SECRET_KEY="")
+        self.assertNotEqual(code, 0)
+        self.assertIn("YATUBE_SECRET_KEY", err)
+
+    def test_production_refuses_non_shared_cache(self):
+        for backend in (settings.LOCMEM_CACHE,
+                        "django.core.cache.backends.filebased.FileBasedCache",
+                        "django.core.cache.backends.db.DatabaseCache"):
+            with self.subTest(backend=backend):
+                code, _, err = self.load(YATUBE_ENV="production",
+                                         YATUBE_SECRET_KEY="test",
+                                         YATUBE_CACHE_BACKEND=backend)
+                self.assertNotEqual(code, 0)
+                self.assertIn(backend, err)
+
+    def test_production_cache_is_chosen_by_env(self):
+        backend = "django_redis.cache.RedisCache"
+        code, out, err = self.load(YATUBE_ENV="production",
+                                   YATUBE_SECRET_KEY="test",
+                                   YATUBE_CACHE_BACKEND=backend,
+                                   YATUBE_CACHE_LOCATION="redis://cache:6379")
+        self.assertEqual(code, 0, err)
+        self.assertEqual(json.loads(out)["cache"], backend)
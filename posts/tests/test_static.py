@@ -0,0 +1,67 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from yatube import serve
+
+
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        with open(os.path.join(cls.source, "site.css"), "w") as css:
+            css.write("body { color: red; }\n" * 100)
+        cls.settings_override = override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                "yatube.storage.CompressedManifestStaticFilesStorage"),
+        )
+        cls.settings_override.enable()
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.hashed = next(name for name in os.listdir(cls.root)
+                          if name.startswith("site.") and
+                          name.endswith(".css") and name != "site.css")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_collectstatic_precompresses_hashed_files(self):
+        with open(os.path.join(StaticPipelineTest.root,
+                               StaticPipelineTest.hashed + ".gz"), "rb") as f:
+            self.assertIn(b"color: red", gzip.decompress(f.read()))
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = serve.static_asset(request, StaticPipelineTest.hashed)
+        self.assertEqual(response["Cache-Control"], serve.IMMUTABLE)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_refused_encoding_is_not_served(self):
+        for header in ("gzip;q=0", "br, gzip; q=0", "*, gzip;q=0"):
+            with self.subTest(header=header):
+                request = RequestFactory().get(
+                    "/", HTTP_ACCEPT_ENCODING=header)
+                response = serve.static_asset(request,
+                                              StaticPipelineTest.hashed)
+                self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(serve.parse_accept_encoding("br;q=0, gzip;q=0.5"),
+                         ({"gzip"}, {"br"}))
+
+    def test_unhashed_file_has_short_cache(self):
+        request = RequestFactory().get("/")
+        response = serve.static_asset(request, "site.css")
+        self.assertNotIn("immutable", response["Cache-Control"])
+        self.assertFalse(response.has_header("Content-Encoding"))
@@ -0,0 +1,63 @@
+import gzip
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+GZIP_MIDDLEWARE = ["yatube.middleware.GZipMiddleware"] + settings.MIDDLEWARE
+
+
+class StreamingRenderTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username="streamer")
+        cls.post = Post.objects.create(text="Длинный пост " * 100,
+                                       author=cls.user)
+        Comment.objects.create(post=cls.post, author=cls.user,
+                               text="Комментарий к посту")
+        cls.url = reverse("post", args=["streamer", cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_streamed_page_matches_render(self):
+        url = reverse("index")
+        rendered = self.client.get(url).content
+        cache.clear()
+        with self.settings(STREAMING_RENDER=True):
+            response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), rendered)
+
+    @override_settings(STREAMING_RENDER=True)
+    def test_layout_is_flushed_before_content(self):
+        response = self.client.get(StreamingRenderTest.url)
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        self.assertIn(b"<head>", chunks[0])
+        body = b"".join(chunks).decode()
+        self.assertIn("Комментарий к посту", body)
+        self.assertIn("csrftoken", response.cookies)
+
+    @override_settings(MIDDLEWARE=GZIP_MIDDLEWARE, STREAMING_RENDER=True)
+    def test_streamed_page_is_gzipped(self):
+        response = self.client.get(StreamingRenderTest.url,
+                                   HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertIn("Комментарий к посту", body.decode())
+
+    @override_settings(MIDDLEWARE=GZIP_MIDDLEWARE, GZIP_MIN_SIZE=10 ** 6)
+    def test_short_response_is_not_gzipped(self):
+        response = self.client.get(StreamingRenderTest.url,
+                                   HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        with self.settings(GZIP_MIN_SIZE=100):
+            response = self.client.get(StreamingRenderTest.url,
+                                       HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
@@ -0,0 +1,86 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailVariantsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 800), "red").save(buffer, "JPEG")
+        cls.user = get_user_model().objects.create_user(username="TestUser")
+        cls.post = Post.objects.create(
+            text="Пост с картинкой", author=cls.user,
+            image=SimpleUploadedFile("pic.jpg", buffer.getvalue(),
+                                     content_type="image/jpeg"))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_all_variants_are_built(self):
+        variants = thumbnails.backend.get_variants(
+            ThumbnailVariantsTest.post.image)
+        self.assertEqual(set(variants), set(thumbnails.variants()))
+        webp = variants[(thumbnails.geometry(480), "WEBP")]
+        self.assertTrue(webp.url.endswith(".webp"))
+        self.assertEqual((webp.width, webp.height), (480, 170))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_variants_are_not_built_in_request(self):
+        post = Post.objects.get(pk=ThumbnailVariantsTest.post.pk)
+        with mock.patch.object(thumbnails.default.engine,
+                               "get_image") as get_image:
+            thumbnails.prefetch([post])
+        get_image.assert_not_called()
+        self.assertEqual(post.picture, {"original": post.image})
+        name = f"{thumbnails.variants_version()}:{post.image.name}"
+        self.assertTrue(cache.get(f"thumbnails:queued:{name}"))
+
+    def test_built_small_thumbnail_is_shown_while_others_queued(self):
+        post = Post.objects.get(pk=ThumbnailVariantsTest.post.pk)
+        variant = thumbnails.placeholder_variant()
+        thumbnails.backend.get_variants(post.image, [variant])
+        cache.clear()
+        thumbnails.prefetch([post])
+        self.assertEqual(post.picture["fallback"].width, 480)
+
+    def test_changed_variants_are_queued_again(self):
+        version = thumbnails.variants_version()
+        with self.settings(THUMBNAIL_WIDTHS=(320, 640)):
+            self.assertNotEqual(thumbnails.variants_version(), version)
+
+    def test_prefetch_is_batched(self):
+        thumbnails.backend.get_variants(ThumbnailVariantsTest.post.image)
+        cache.clear()
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            thumbnails.prefetch(posts)
+        with self.assertNumQueries(0):
+            thumbnails.prefetch(posts)
+        self.assertEqual(posts[0].picture["fallback"].width, 960)
+
+    def test_card_has_picture_markup(self):
+        thumbnails.backend.get_variants(ThumbnailVariantsTest.post.image)
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, '<source type="image/webp"')
+        self.assertContains(response, " 1440w")
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import deletion, trending
+from posts.models import Comment, Group, Post, PostScore
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username="trend")
+        cls.group = Group.objects.create(title="Группа", slug="trend",
+                                         description="Группа")
+        cls.old = Post.objects.create(text="Старое обсуждение",
+                                      author=cls.user)
+        cls.hot = Post.objects.create(text="Горячее обсуждение",
+                                      author=cls.user, group=cls.group)
+
+    def test_recent_comments_outweigh_old_ones(self):
+        half_life = timedelta(seconds=trending.get_option("HALF_LIFE"))
+        now = timezone.now()
+        # три комментария два периода назад весят меньше одного свежего
+        trending.record([(TrendingTest.old.pk, now - 2 * half_life)] * 3)
+        trending.record([(TrendingTest.hot.pk, now)])
+        self.assertEqual(trending.top(), [TrendingTest.hot, TrendingTest.old])
+        self.assertEqual(trending.top(TrendingTest.group), [TrendingTest.hot])
+
+    def test_comment_signal_updates_rank(self):
+        Comment.objects.create(post=TrendingTest.hot, author=TrendingTest.user,
+                               text="Первый")
+        first = PostScore.objects.get(post=TrendingTest.hot).rank
+        Comment.objects.create(post=TrendingTest.hot, author=TrendingTest.user,
+                               text="Второй")
+        second = PostScore.objects.get(post=TrendingTest.hot).rank
+        self.assertAlmostEqual(second - first, 1, places=3)
+
+    def test_concurrent_first_comments_add_up(self):
+        now = timezone.now()
+        trending.record([(TrendingTest.hot.pk, now)])
+        first = PostScore.objects.get(post=TrendingTest.hot).rank
+        # Другой запрос вставил строку уже после нашей блокировки
+        real_lock = trending.lock
+        with mock.patch("posts.trending.lock",
+                        side_effect=[{}, real_lock([TrendingTest.hot.pk])]):
+            trending.record([(TrendingTest.hot.pk, now)])
+        self.assertEqual(PostScore.objects.count(), 1)
+        self.assertAlmostEqual(
+            PostScore.objects.get(post=TrendingTest.hot).rank - first, 1,
+            places=6)
+
+    def test_compact_removes_decayed_scores(self):
+        half_life = timedelta(seconds=trending.get_option("HALF_LIFE"))
+        trending.record([(TrendingTest.old.pk,
+                          timezone.now() - 5 * half_life)])
+        trending.record([(TrendingTest.hot.pk, timezone.now())])
+        self.assertEqual(trending.top(), [TrendingTest.hot])
+        call_command("compact_trending", stdout=open("/dev/null", "w"))
+        self.assertEqual(list(PostScore.objects.values_list(
+            "post_id", flat=True)), [TrendingTest.hot.pk])
+
+    def test_view_reads_top_in_one_query(self):
+        trending.record([(TrendingTest.hot.pk, timezone.now())])
+        # Набор удаляемых объектов уже в кеше
+        deletion.hidden()
+        # рейтинг с постами, затем комментарии карточек
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("trending"))
+        self.assertContains(response, TrendingTest.hot.text)
+        response = self.client.get(reverse("trending"),
+                                   {"group": "missing"})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,72 @@
+import io
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts import counters, thumbnails, warmup
+from posts.models import Group, Post
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+# Прогрев идёт в отдельных потоках со своими соединениями, поэтому
+# данные теста должны быть закоммичены
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class WarmupTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username="warm")
+        self.groups = [Group.objects.create(title=f"Группа {number}",
+                                            slug=f"warm-{number}",
+                                            description="Прогрев")
+                       for number in range(2)]
+        for number in range(12):
+            Post.objects.create(text=f"Пост {number}", author=self.author,
+                                group=self.groups[number % 2])
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 300), "blue").save(buffer, "JPEG")
+        self.image_post = Post.objects.create(
+            text="С картинкой", author=self.author, group=self.groups[0],
+            image=SimpleUploadedFile("warm.jpg", buffer.getvalue(),
+                                     content_type="image/jpeg"))
+        cache.clear()
+
+    def test_targets_cover_pages_groups_and_authors(self):
+        paths, posts = warmup.targets(pages=2, groups=5, authors=5)
+        index = reverse("index")
+        self.assertEqual(paths[:2], [index, f"{index}?page=2"])
+        for group in self.groups:
+            self.assertIn(reverse("group_list", args=[group.slug]), paths)
+        self.assertIn(reverse("profile", args=["warm"]), paths)
+        self.assertEqual([post.pk for post in posts], [self.image_post.pk])
+
+    def test_command_fills_cache_and_builds_thumbnails(self):
+        out = StringIO()
+        call_command("warm_cache", "--pages", "2", stdout=out)
+        self.assertIn("с ошибкой: 0", out.getvalue())
+        self.assertIn("постов с миниатюрами: 1", out.getvalue())
+        self.assertEqual(cache.get(counters.key("all")), 13)
+        for group in self.groups:
+            self.assertIsNotNone(cache.get(counters.key("group", group.pk)))
+        self.assertIsNotNone(cache.get(counters.key("author",
+                                                    self.author.pk)))
+        source = ImageFile(self.image_post.image)
+        for variant in thumbnails.variants():
+            thumbnail, _ = thumbnails.backend.thumbnail(source, *variant)
+            self.assertTrue(default.kvstore.get(thumbnail))
@@ -0,0 +1,221 @@
+"""
+Набор миниатюр картинки поста разных размеров и форматов (в том числе
+WebP) для srcset и <picture>.
+
+Все недостающие варианты строятся за один проход: исходная картинка
+открывается и декодируется один раз. Имена файлов и записи в key-value
+хранилище sorl совпадают с теми, что дал бы ``get_thumbnail``.
+
+Для страницы постов метаданные всех миниатюр читаются одним запросом
+к кешу и не более чем одним к базе (``prefetch``); недостроенные
+варианты ставятся в очередь задач, а в запросе ничего не строится.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from . import jobs
+
+
+def geometry(width):
+    """
+    Геометрия варианта с пропорциями THUMBNAIL_ASPECT.
+    """
+    aspect_width, aspect_height = settings.THUMBNAIL_ASPECT
+    return f"{width}x{round(width * aspect_height / aspect_width)}"
+
+
+def variants():
+    """
+    Все пары (геометрия, формат) из настроек.
+    """
+    return [(geometry(width), image_format)
+            for image_format in settings.THUMBNAIL_FORMATS
+            for width in settings.THUMBNAIL_WIDTHS]
+
+
+def variants_version():
+    """
+    Короткий хеш набора вариантов: после смены настроек достройка
+    ставится в очередь заново.
+    """
+    return hashlib.md5(repr(variants()).encode()).hexdigest()[:8]
+
+
+def placeholder_variant():
+    return (geometry(min(settings.THUMBNAIL_WIDTHS)),
+            settings.THUMBNAIL_FORMATS[-1])
+
+
+class VariantBackend(ThumbnailBackend):
+    def options(self, image_format):
+        options = {"crop": "center", "upscale": True, "format": image_format}
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail(self, source, geometry_string, image_format):
+        """
+        Миниатюра варианта без обращения к хранилищу: только имя файла.
+        """
+        options = self.options(image_format)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage), options
+
+    def get_variants(self, file_, wanted=None):
+        """
+        Возвращает {(геометрия, формат): ImageFile} для вариантов wanted
+        (по умолчанию всех), достраивая недостающие за одно открытие
+        исходной картинки.
+        """
+        source = ImageFile(file_)
+        result, missing = {}, []
+        for variant in wanted or variants():
+            thumbnail, options = self.thumbnail(source, *variant)
+            cached = default.kvstore.get(thumbnail)
+            if cached:
+                result[variant] = cached
+            else:
+                missing.append((variant, thumbnail, options))
+        if not missing:
+            return result
+        # Файл мог остаться без записи в хранилище: как и get_thumbnail,
+        # не перезаписываем его
+        to_create = [item for item in missing
+                     if sorl_settings.THUMBNAIL_FORCE_OVERWRITE or
+                     not item[1].exists()]
+        if to_create:
+            source_image = default.engine.get_image(source)
+            try:
+                source.set_size(default.engine.get_image_size(source_image))
+                for variant, thumbnail, options in to_create:
+                    options["image_info"] = default.engine.get_image_info(
+                        source_image)
+                    self._create_thumbnail(source_image, variant[0], options,
+                                           thumbnail)
+            finally:
+                default.engine.cleanup(source_image)
+        default.kvstore.get_or_set(source)
+        for variant, thumbnail, options in missing:
+            default.kvstore.set(thumbnail, source)
+            result[variant] = thumbnail
+        return result
+
+
+backend = VariantBackend()
+
+
+def picture(variants_map):
+    """
+    Данные для разметки <picture>: srcset для каждого формата и запасная
+    картинка среднего размера в последнем формате из настроек.
+    """
+    sources = []
+    for image_format in settings.THUMBNAIL_FORMATS:
+        images = [(variants_map[(geometry(width), image_format)], width)
+                  for width in settings.THUMBNAIL_WIDTHS
+                  if (geometry(width), image_format) in variants_map]
+        sources.append({
+            "type": f"image/{image_format.lower()}",
+            "srcset": ", ".join(f"{image.url} {width}w"
+                                for image, width in images),
+        })
+    fallback = variants_map.get((geometry(settings.THUMBNAIL_DEFAULT_WIDTH),
+                                 settings.THUMBNAIL_FORMATS[-1]))
+    return {"sources": sources[:-1], "fallback": fallback,
+            "fallback_srcset": sources[-1]["srcset"],
+            "sizes": settings.THUMBNAIL_SIZES}
+
+
+def fetch_raw(keys):
+    """
+    Значения ключей key-value хранилища sorl одним get_many к кешу
+    и одним запросом к базе для промахов.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        # Для других хранилищ пакетного чтения нет
+        return {key: kvstore._get_raw(key) for key in keys}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(KVStoreModel.objects.filter(
+            key__in=missing).values_list("key", "value"))
+        loaded = {key: found.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(loaded, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(loaded)
+    return {key: None if value == EMPTY_VALUE else value
+            for key, value in values.items()}
+
+
+def queue_build(post):
+    """
+    Ставит достройку миниатюр поста в очередь не чаще раза в пять минут.
+    """
+    name = f"{variants_version()}:{post.image.name}"
+    if cache.add(f"thumbnails:queued:{name}", True, 5 * 60):
+        jobs.enqueue("build_thumbnail", lane="low",
+                     key=f"thumbnails:{name}"[:200], post_id=post.id)
+
+
+def placeholder(post, built):
+    """
+    Запасная картинка, пока остальные варианты в очереди: самая маленькая
+    миниатюра в запасном формате, если она уже есть, иначе исходная
+    картинка. Декодировать исходник в запросе страницы слишком дорого.
+    """
+    variant = placeholder_variant()
+    image = built.get(variant)
+    if image is None:
+        return {"original": post.image}
+    width = min(settings.THUMBNAIL_WIDTHS)
+    return {"sources": [], "fallback": image,
+            "fallback_srcset": f"{image.url} {width}w",
+            "sizes": settings.THUMBNAIL_SIZES}
+
+
+def prefetch(posts):
+    """
+    Добавляет постам с картинкой данные для <picture> (post.picture).
+    Если каких-то вариантов ещё нет, показывается запасная картинка
+    (placeholder), а достройка уходит в очередь задач.
+    """
+    wanted = []
+    for post in posts:
+        post.picture = None
+        if not post.image:
+            continue
+        source = ImageFile(post.image)
+        for variant in variants():
+            thumbnail, _ = backend.thumbnail(source, *variant)
+            wanted.append((add_prefix(thumbnail.key), post, variant))
+    raw = fetch_raw(list({key for key, _, _ in wanted}))
+    found = {}
+    for key, post, variant in wanted:
+        found.setdefault(post.id, {})
+        if raw.get(key) is not None:
+            found[post.id][variant] = deserialize_image_file(raw[key])
+    for post in posts:
+        if not post.image:
+            continue
+        post_variants = found[post.id]
+        if len(post_variants) == len(variants()):
+            post.picture = picture(post_variants)
+        else:
+            post.picture = placeholder(post, post_variants)
+            queue_build(post)
+    return posts
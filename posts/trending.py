@@ -0,0 +1,115 @@
+"""
+Популярные посты: рейтинг по числу свежих комментариев с затуханием.
+
+Вклад комментария, оставленного в момент t, равен 2 ** (t / HALF_LIFE),
+а рейтинг поста — двоичный логарифм суммы вкладов. Вклад каждого
+следующего периода полураспада вдвое больше, так что старые комментарии
+относительно «затухают» без пересчёта хранимых рейтингов, и порядок
+по rank совпадает с порядком по текущему затухшему счёту. Текущий счёт
+поста в «комментариях» равен 2 ** (rank - now / HALF_LIFE).
+
+Рейтинги обновляются при создании комментариев. Команда
+``manage.py compact_trending`` удаляет посты, чей текущий счёт упал ниже
+MIN_SCORE, чтобы таблица и индекс оставались маленькими.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Post, PostScore
+
+DEFAULTS = {
+    "HALF_LIFE": 6 * 60 * 60,
+    "TOP": 20,
+    "MIN_SCORE": 0.5,
+}
+EPOCH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+# rank без единого вклада: log2_add(EMPTY_RANK, x) == x
+EMPTY_RANK = -1e9
+
+
+def get_option(name):
+    return getattr(settings, "TRENDING", {}).get(name, DEFAULTS[name])
+
+
+def weight(moment):
+    """
+    Двоичный логарифм вклада комментария, оставленного в момент moment.
+    """
+    return (moment - EPOCH).total_seconds() / get_option("HALF_LIFE")
+
+
+def log2_add(a, b):
+    """
+    log2(2 ** a + 2 ** b) без переполнения.
+    """
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def floor(now=None):
+    """
+    Наименьший rank поста, который ещё считается популярным.
+    """
+    return weight(now or timezone.now()) + math.log2(get_option("MIN_SCORE"))
+
+
+def lock(post_ids):
+    return {score.post_id: score for score in
+            PostScore.objects.select_for_update().filter(
+                post_id__in=post_ids)}
+
+
+def record(comments):
+    """
+    Добавляет вклады комментариев, заданных парами (id поста, время).
+    """
+    added = {}
+    for post_id, created in comments:
+        rank = weight(created)
+        added[post_id] = (log2_add(added[post_id], rank)
+                          if post_id in added else rank)
+    if not added:
+        return
+    with transaction.atomic():
+        scores = lock(added)
+        missing = set(added) - set(scores)
+        if missing:
+            # У первого комментария к посту нет строки для блокировки, и два
+            # первых комментария могут прийти одновременно: строку создаёт
+            # тот, кто успел, с нулевым вкладом, а прибавляют оба под
+            # блокировкой
+            PostScore.objects.bulk_create(
+                (PostScore(post_id=post_id, group_id=group_id,
+                           rank=EMPTY_RANK)
+                 for post_id, group_id in Post.objects.filter(
+                     pk__in=missing).values_list("pk", "group_id")),
+                ignore_conflicts=True)
+            scores.update(lock(missing))
+        for post_id, score in scores.items():
+            score.rank = log2_add(score.rank, added[post_id])
+            score.updated = timezone.now()
+        PostScore.objects.bulk_update(scores.values(), ["rank", "updated"])
+
+
+def top(group=None, limit=None):
+    """
+    Самые популярные посты одним запросом по индексу рейтинга.
+    """
+    scores = PostScore.objects.filter(rank__gte=floor())
+    if group is not None:
+        scores = scores.filter(group=group)
+    scores = scores.select_related("post__author", "post__group").order_by(
+        "-rank")[:limit or get_option("TOP")]
+    return [score.post for score in scores]
+
+
+def compact(now=None):
+    """
+    Удаляет затухшие рейтинги. Возвращает число удалённых.
+    """
+    deleted, _ = PostScore.objects.filter(rank__lt=floor(now)).delete()
+    return deleted
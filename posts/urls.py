@@ -6,11 +6,18 @@ urlpatterns = [
     path("404/", views.page_not_found, name="Error_404"),
     path("500/", views.server_error, name="Error_500"),
     path("", views.index, name="index"),
+    path("trending/", views.trending_posts, name="trending"),
+    path("groups/", views.group_index, name="group_index"),
+    path("analytics/", views.analytics, name="analytics"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
     path("new/", views.new_post, name="new_post"),
     path("<str:username>/<int:post_id>/comment/",
          views.add_comment, name="add_comment"),
     path("follow/", views.follow_index, name="follow_index"),
+    path("notifications/", views.notification_inbox, name="notifications"),
+    path("notifications/unread/", views.notification_count,
+         name="notification_count"),
+    path("personal/", views.personal, name="personal"),
     path("<str:username>/", views.profile, name="profile"),
     path("<str:username>/<int:post_id>/", views.post_view, name="post"),
     path(
@@ -1,39 +1,90 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
 
-from yatube.settings import COUNT_POSTS
+from users.lookup import get_for_username, get_user_or_404
+from yatube import edge_cache, streaming
+from . import (comment_buffer, counters, deletion, fragments, group_stats,
+               jobs, notifications, recommendations, rollups, trending)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
+from .models import DeletionRequest, Group, Post, User, Follow
+from .pagination import paginate
+from .ratelimit import ratelimit
 
 
+@edge_cache.cacheable
 def index(request):
     """
     Отображение главной страницы
     """
-    posts = Post.objects.select_related("group").all()
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    return render(request, "index.html",
-                  {"page": page, "paginator": paginator})
+    posts = deletion.visible(Post.objects.select_related("author", "group"))
+    paginator, page = paginate(request, posts, counters.for_all())
+    return streaming.render(request, "index.html",
+                            {"page": page, "paginator": paginator})
 
 
+@edge_cache.cacheable
 def group_posts(request, slug):
     """
     Отображение постов в группе
     """
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    return render(request, "group.html", {"group": group,
-                                          "page": page,
-                                          "paginator": paginator})
+    deletion.check_visible(DeletionRequest.GROUP, group.pk)
+    posts = deletion.visible(group.posts.select_related("author", "group"))
+    paginator, page = paginate(request, posts, counters.for_group(group))
+    return streaming.render(request, "group.html", {"group": group,
+                                                    "page": page,
+                                                    "paginator": paginator})
+
+
+def trending_posts(request):
+    """
+    Популярные посты: все или одной группы (?group=slug)
+    """
+    group = None
+    slug = request.GET.get("group")
+    if slug:
+        group = get_object_or_404(Group, slug=slug)
+    return streaming.render(request, "trending.html",
+                            {"posts": deletion.visible_posts(
+                                trending.top(group)),
+                             "group": group})
+
+
+def group_index(request):
+    """
+    Каталог групп со сводкой активности
+    """
+    sort = request.GET.get("sort", "activity")
+    if sort not in group_stats.SORTS:
+        sort = "activity"
+    return streaming.render(request, "groups.html",
+                            {"groups": deletion.visible_groups(
+                                group_stats.directory(sort)),
+                             "sort": sort})
+
+
+@staff_member_required
+def analytics(request):
+    """
+    Панель аналитики по дневным сводкам активности
+    """
+    try:
+        days = int(request.GET.get("days", ""))
+    except ValueError:
+        days = None
+    if days not in rollups.PERIODS:
+        days = None
+    return render(request, "analytics.html", rollups.dashboard(days))
 
 
 @login_required
+@ratelimit("new_post")
 def new_post(request):
     """
     Создание нового поста
@@ -43,19 +94,23 @@ def new_post(request):
         form_instance_updated = form.save(commit=False)
         form_instance_updated.author = request.user
         form_instance_updated.save()
+        if form_instance_updated.image:
+            jobs.enqueue("build_thumbnail",
+                         post_id=form_instance_updated.id)
+        notifications.announce(form_instance_updated)
         return redirect("index")
     return render(request, "new.html", {"form": form})
 
 
+@edge_cache.cacheable
 def profile(request, username):
     """
     Просмотр профиля пользователя
     """
-    user = get_object_or_404(User, username=username)
-    user_posts = user.posts.all()
-    paginator = Paginator(user_posts, COUNT_POSTS)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    user = get_user_or_404(username)
+    deletion.check_visible(DeletionRequest.USER, user.pk)
+    user_posts = deletion.visible(user.posts.select_related("group"))
+    paginator, page = paginate(request, user_posts, counters.for_author(user))
     context = {"user_profile": user,
                "page": page,
                "paginator": paginator}
@@ -63,59 +118,74 @@ def profile(request, username):
             Follow.objects.filter(author=user,
                                   user=request.user).exists()):
         context["following"] = True
-    return render(request, "profile.html", context)
+    if request.user.pk == user.pk:
+        context["recommendations"] = recommendations.for_user(request.user)
+    return streaming.render(request, "profile.html", context)
 
 
 def post_edit(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    if post.author != request.user:
+    post = get_for_username(deletion.visible(Post.objects.all()), username,
+                            id=post_id)
+    if post.author_id != request.user.id:
         return redirect("post", username, post_id)
     form = PostForm(request.POST or None, files=request.FILES or None,
                     instance=post)
     if form.is_valid():
         form.save()
+        if "image" in form.changed_data and post.image:
+            jobs.enqueue("build_thumbnail", post_id=post.id)
         return redirect("post", username, post_id)
     return render(request, "new.html", {"form": form,
                                         "is_edit": True,
                                         "post": post})
 
 
+@edge_cache.cacheable
 def post_view(request, username, post_id):
     """
     Просмотр поста
     """
-    post = get_object_or_404(Post, id=post_id, author__username=username)
+    post = get_for_username(
+        deletion.visible(Post.objects.select_related("author", "group")),
+        username, id=post_id)
     form = CommentForm()
-    comments = post.comments.all()
     context = {"post": post,
                "user_profile": post.author,
-               "comments": comments,
+               "detail": fragments.post_detail(request, post),
+               "pending_comments": comment_buffer.pending(post,
+                                                          request.user),
                "form": form}
     if (request.user != "AnonymousUser" or
             Follow.objects.filter(author=post.author,
                                   user=request.user).exists()):
         context["following"] = True
 
-    return render(request, "post.html", context)
+    return streaming.render(request, "post.html", context)
 
 
 @login_required
+@ratelimit("add_comment")
 def add_comment(request, username, post_id):
     """
     Добавление комментариев
     """
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    post = get_for_username(
+        deletion.visible(Post.objects.select_related("author", "group")),
+        username, id=post_id)
     if form.is_valid():
         form_instance_updated = form.save(commit=False)
         form_instance_updated.author = request.user
         form_instance_updated.post = post
-        form_instance_updated.save()
-        return redirect("post", username, post_id)
-    return render(request, "post.html", {"form": form,
-                                         "user_profile": post.author,
-                                         "post": post,
-                                         "following": True})
+        comment_buffer.submit(form_instance_updated)
+        return redirect(edge_cache.fresh_url(
+            reverse("post", args=[username, post_id])))
+    return render(request, "post.html",
+                  {"form": form,
+                   "user_profile": post.author,
+                   "post": post,
+                   "detail": fragments.post_detail(request, post),
+                   "following": True})
 
 
 def page_not_found(request, exception=None):
@@ -137,21 +207,24 @@ def follow_index(request):
     """
     Выводит посты авторов, на которых подписан текущий пользователь.
     """
-    author_posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(author_posts, COUNT_POSTS)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    return render(request, "follow.html", {"page": page,
-                                           "paginator": paginator})
+    author_posts = deletion.visible(Post.objects.select_related(
+        "author", "group").filter(author__following__user=request.user))
+    paginator, page = paginate(request, author_posts,
+                               counters.for_feed(request.user))
+    return streaming.render(
+        request, "follow.html",
+        {"page": page, "paginator": paginator,
+         "recommendations": recommendations.for_user(request.user)})
 
 
 @login_required
+@ratelimit("profile_follow", methods=None)
 def profile_follow(request, username):
     """
     Подписка на автора
     """
-    author = get_object_or_404(User, username=username)
-    if author != request.user:
+    author = get_user_or_404(username, User.objects.only("pk"))
+    if author.pk != request.user.pk:
         Follow.objects.get_or_create(author=author, user=request.user)
     return redirect("profile", username=username)
 
@@ -161,6 +234,64 @@ def profile_unfollow(request, username):
     """
     Отписка от автора
     """
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username, User.objects.only("pk"))
     Follow.objects.filter(author=author, user=request.user).delete()
     return redirect("profile", username=username)
+
+
+@login_required
+def notification_inbox(request):
+    """
+    Уведомления о новых постах авторов, на которых подписан пользователь
+    """
+    return render(request, "notifications.html",
+                  {"notifications": notifications.inbox(request.user)})
+
+
+def notification_count(request):
+    """
+    Число непрочитанных уведомлений для значка в шапке
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"unread": 0})
+    return JsonResponse(
+        {"unread": notifications.unread_count(request.user)})
+
+
+@never_cache
+def personal(request):
+    """
+    Личные части страниц из кеша CDN (yatube.edge_cache) одним запросом:
+    кто вошёл, число уведомлений, токен CSRF, подписки на авторов страницы
+    (?authors=), ещё не записанные комментарии к посту (?post=)
+    и рекомендации на своём профиле (?profile=)
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return JsonResponse({"user": None})
+    data = {
+        "user": {"id": user.pk, "username": user.username,
+                 "is_staff": user.is_staff,
+                 "unread": notifications.unread_count(user)},
+        "csrf": get_token(request),
+        "following": [],
+    }
+    authors = edge_cache.parse_ids(request.GET.get("authors"))
+    if authors:
+        data["following"] = list(Follow.objects.filter(
+            user=user, author_id__in=authors).values_list("author_id",
+                                                          flat=True))
+    post_ids = edge_cache.parse_ids(request.GET.get("post"))
+    if post_ids:
+        # Буферу комментариев нужен только id поста
+        data["pending"] = render_to_string(
+            "includes/pending_comments.html",
+            {"pending_comments": comment_buffer.pending(
+                Post(pk=post_ids[0]), user)}, request)
+    if edge_cache.parse_ids(request.GET.get("profile")) == [user.pk]:
+        found = recommendations.for_user(user)
+        if found:
+            data["recommendations"] = render_to_string(
+                "includes/recommendations.html",
+                {"recommendations": found}, request)
+    return JsonResponse(data)
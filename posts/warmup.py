@@ -0,0 +1,169 @@
+"""
+Прогрев кеша после выкладки или перезапуска.
+
+Страницы, которые первыми откроют пользователи — первые PAGES страниц
+главной, самые активные группы и профили самых активных авторов, —
+запрашиваются анонимно, как обычный посетитель, и сами наполняют кеш
+фрагментов, счётчиков и имён. Миниатюры постов с этих страниц
+достраиваются заранее. Запросы идут не больше чем в CONCURRENCY потоков,
+поэтому прогрев можно запускать под живой нагрузкой.
+
+LocMemCache у каждого процесса свой, поэтому страницы запрашиваются
+либо по HTTP у работающего сервера (``manage.py warm_cache --url``),
+либо внутри самого процесса: командой, если кеш общий, или при старте
+воркера (WARMUP["ON_START"]).
+"""
+import io
+import sys
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+
+from . import group_stats, rollups, thumbnails
+from .models import DailyActivity, Post, User
+
+DEFAULTS = {
+    "PAGES": 3,
+    "GROUPS": 10,
+    "AUTHORS": 10,
+    "CONCURRENCY": 4,
+    "TIMEOUT": 30,
+    "ON_START": False,
+}
+
+handler = None
+
+
+def get_option(name):
+    return getattr(settings, "WARMUP", {}).get(name, DEFAULTS[name])
+
+
+def top_authors(limit):
+    """
+    Самые активные за месяц авторы по дневным сводкам, а пока сводок
+    нет — авторы последних постов.
+    """
+    since = timezone.localdate() - timedelta(days=30)
+    ids = [row["object_id"] for row in rollups.leaders(
+        DailyActivity.AUTHOR, since, limit)]
+    if not ids:
+        recent = Post.objects.order_by("-pub_date").values_list(
+            "author_id", flat=True)[:limit * 20]
+        ids = list(dict.fromkeys(recent))[:limit]
+    found = User.objects.filter(pk__in=ids).in_bulk()
+    return [found[pk] for pk in ids if pk in found]
+
+
+def targets(pages=None, groups=None, authors=None):
+    """
+    Адреса для прогрева и посты с картинками на их первых страницах.
+    """
+    pages = get_option("PAGES") if pages is None else pages
+    groups = get_option("GROUPS") if groups is None else groups
+    authors = get_option("AUTHORS") if authors is None else authors
+    per_page = settings.COUNT_POSTS
+    index = reverse("index")
+    paths = [index] + [f"{index}?page={number}"
+                       for number in range(2, pages + 1)]
+    with_images = Post.objects.exclude(image="").exclude(image__isnull=True)
+    posts = list(with_images.order_by("-pub_date")[:pages * per_page])
+    for group in group_stats.directory("activity")[:groups]:
+        paths.append(reverse("group_list", args=[group.slug]))
+        posts += with_images.filter(group=group)[:per_page]
+    for author in top_authors(authors):
+        paths.append(reverse("profile", args=[author.username]))
+        posts += with_images.filter(author=author)[:per_page]
+    return paths, list({post.pk: post for post in posts}.values())
+
+
+def fetch_local(path):
+    """
+    Анонимный GET через WSGI-обработчик текущего процесса.
+    """
+    global handler
+    if handler is None:
+        handler = WSGIHandler()
+    path, _, query = path.partition("?")
+    host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS
+                 if host != "*"), "localhost")
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query,
+        "SERVER_NAME": host, "SERVER_PORT": "80", "HTTP_HOST": host,
+        "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http", "wsgi.version": (1, 0),
+        "wsgi.multithread": True, "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    status = []
+    response = handler(environ,
+                       lambda code, headers: status.append(int(code[:3])))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return status[0]
+
+
+def fetch_remote(base_url, path):
+    try:
+        with urllib.request.urlopen(base_url.rstrip("/") + path,
+                                    timeout=get_option("TIMEOUT")) as reply:
+            reply.read()
+            return reply.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def build_thumbnails_for(post):
+    """
+    Достраивает миниатюры поста; битая картинка не останавливает прогрев.
+    """
+    try:
+        thumbnails.backend.get_variants(post.image)
+    except Exception:
+        return False
+    return True
+
+
+def in_thread(func, *args):
+    try:
+        return func(*args)
+    finally:
+        # Соединения с базой у каждого потока свои
+        connections.close_all()
+
+
+def run(base_url=None, pages=None, groups=None, authors=None,
+        concurrency=None, build_thumbnails=True, report=None):
+    """
+    Прогревает миниатюры, затем страницы. Возвращает {адрес: статус}
+    и число постов, чьи миниатюры готовы.
+    """
+    paths, posts = targets(pages, groups, authors)
+    concurrency = concurrency or get_option("CONCURRENCY")
+    built = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if build_thumbnails:
+            # Сначала миниатюры: страницы сразу отрисуются с <picture>
+            built = sum(pool.map(lambda post: in_thread(
+                build_thumbnails_for, post), posts))
+        if base_url:
+            statuses = pool.map(lambda path: in_thread(
+                fetch_remote, base_url, path), paths)
+        else:
+            statuses = pool.map(lambda path: in_thread(fetch_local, path),
+                                paths)
+        result = {}
+        for path, status in zip(paths, statuses):
+            result[path] = status
+            if report is not None:
+                report(path, status)
+    return result, built
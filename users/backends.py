@@ -0,0 +1,43 @@
+"""
+Загрузка пользователя для AuthenticationMiddleware из кеша вместо
+запроса к базе на каждый запрос, если включён AUTH_USER_CACHE. Кеш
+должен быть общим для всех процессов (проверка users.checks), иначе
+сброс записи при смене пароля или блокировке дойдёт только до одного
+процесса.
+
+Запись сбрасывается при сохранении пользователя (смена пароля,
+last_login при входе, правка в админке) и живёт не дольше
+AUTH_USER_CACHE_TIMEOUT: изменения через QuerySet.update() сигналов
+не шлют.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+User = get_user_model()
+
+
+def user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        if not getattr(settings, "AUTH_USER_CACHE", False):
+            return super().get_user(user_id)
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    cache.delete(user_key(instance.pk))
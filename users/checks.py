@@ -0,0 +1,33 @@
+"""
+Проверки настроек, которым нужен общий для всех процессов кеш.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Бэкенды, у которых каждый процесс видит только свой кеш
+PER_PROCESS_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+def is_per_process(alias):
+    return settings.CACHES[alias]["BACKEND"] in PER_PROCESS_CACHES
+
+
+@register(Tags.security)
+def check_shared_cache(app_configs, **kwargs):
+    errors = []
+    if (settings.SESSION_ENGINE ==
+            "django.contrib.sessions.backends.cached_db" and
+            is_per_process(settings.SESSION_CACHE_ALIAS)):
+        errors.append(Error(
+            "Сессии cached_db хранятся в кеше отдельного процесса: выход "
+            "из аккаунта действует только в одном процессе.",
+            hint="Настройте общий кеш или YATUBE_SESSION_ENGINE=db.",
+            id="users.E001"))
+    if (getattr(settings, "AUTH_USER_CACHE", False) and
+            is_per_process("default")):
+        errors.append(Error(
+            "AUTH_USER_CACHE с кешем отдельного процесса: смена пароля "
+            "и блокировка пользователя доходят только до одного процесса.",
+            hint="Настройте общий кеш или отключите AUTH_USER_CACHE.",
+            id="users.E002"))
+    return errors
@@ -0,0 +1,135 @@
+"""
+Кеш соответствия имени пользователя и его id.
+
+Адреса профиля и постов содержат имя автора, а запросы к базе удобнее
+и дешевле делать по первичному ключу. Записи сбрасываются при смене
+имени и удалении пользователя; несуществующие имена не кешируются.
+Запись могла пережить откат транзакции или очистку базы, поэтому
+``get_for_username`` при промахе сбрасывает её и ищет ещё раз.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import DEFERRED
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+User = get_user_model()
+
+TIMEOUT = 24 * 60 * 60
+
+
+def id_key(username):
+    return f"user:id:{username}"
+
+
+def name_key(user_id):
+    return f"user:name:{user_id}"
+
+
+def user_id(username):
+    """
+    id пользователя по имени или None.
+    """
+    found = cache.get(id_key(username))
+    if found is None:
+        found = User.objects.filter(username=username).values_list(
+            "pk", flat=True).first()
+        if found is not None:
+            cache.set_many({id_key(username): found,
+                            name_key(found): username}, TIMEOUT)
+    return found
+
+
+def user_id_or_404(username):
+    found = user_id(username)
+    if found is None:
+        raise Http404(username)
+    return found
+
+
+def forget(username):
+    cache.delete(id_key(username))
+
+
+def get_for_username(queryset, username, field="author_id", **lookups):
+    """
+    Объект из queryset, у которого field равно id пользователя username,
+    или 404.
+    """
+    found = user_id(username)
+    if found is not None:
+        try:
+            return queryset.get(**{field: found}, **lookups)
+        except queryset.model.DoesNotExist:
+            pass
+    forget(username)
+    return get_object_or_404(queryset, **{field: user_id_or_404(username)},
+                             **lookups)
+
+
+def get_user_or_404(username, queryset=None):
+    """
+    Пользователь по имени через поиск по первичному ключу.
+    """
+    if queryset is None:
+        queryset = User.objects.all()
+    return get_for_username(queryset.filter(username=username), username,
+                            "pk")
+
+
+def username(user_id):
+    """
+    Имя пользователя по id или None.
+    """
+    found = cache.get(name_key(user_id))
+    if found is None:
+        found = User.objects.filter(pk=user_id).values_list(
+            "username", flat=True).first()
+        if found is not None:
+            cache.set_many({id_key(found): user_id,
+                            name_key(user_id): found}, TIMEOUT)
+    return found
+
+
+def loaded_username(instance):
+    # Чтение отложенного поля (only/defer) — отдельный запрос
+    return instance.__dict__.get("username", DEFERRED)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._cached_username = loaded_username(instance)
+
+
+@receiver(pre_save, sender=User)
+def load_old_username(sender, instance, **kwargs):
+    if (instance._cached_username is DEFERRED and
+            loaded_username(instance) is not DEFERRED and
+            instance.pk is not None):
+        # Имя задали пользователю, загруженному без него: прежнее — в базе
+        instance._cached_username = User.objects.filter(
+            pk=instance.pk).values_list("username", flat=True).first()
+
+
+@receiver(pre_delete, sender=User)
+def load_deleted_username(sender, instance, **kwargs):
+    if instance._cached_username is DEFERRED:
+        instance._cached_username = instance.username
+
+
+@receiver(post_save, sender=User)
+def forget_old_username(sender, instance, created, **kwargs):
+    if (not created and instance._cached_username is not DEFERRED and
+            loaded_username(instance) != instance._cached_username):
+        cache.delete_many([id_key(instance._cached_username),
+                           name_key(instance.pk)])
+    instance._cached_username = loaded_username(instance)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    cache.delete_many([id_key(instance._cached_username),
+                       name_key(instance.pk)])
@@ -0,0 +1,43 @@
+"""
+Сессия в подписанной cookie с ротацией ключей подписи.
+
+Новые cookie подписываются первым ключом из SESSION_SIGNING_KEYS
+(или SECRET_KEY, если список пуст), но принимаются и подписанные любым
+из остальных ключей: такая сессия сразу переподписывается текущим
+ключом. Чтобы сменить ключ, его добавляют в начало списка, а старый
+удаляют после SESSION_COOKIE_AGE.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends import signed_cookies
+from django.core import signing
+
+SALT = "django.contrib.sessions.backends.signed_cookies"
+
+
+def signing_keys():
+    return list(getattr(settings, "SESSION_SIGNING_KEYS", None) or
+                [settings.SECRET_KEY])
+
+
+class SessionStore(signed_cookies.SessionStore):
+    def load(self):
+        keys = signing_keys()
+        for index, key in enumerate(keys):
+            try:
+                data = signing.loads(
+                    self.session_key, key=key, salt=SALT,
+                    serializer=self.serializer,
+                    max_age=settings.SESSION_COOKIE_AGE)
+            except Exception:
+                continue
+            if index:
+                # Подписано старым ключом: переподписать в этом ответе
+                self.modified = True
+            return data
+        self.create()
+        return {}
+
+    def _get_session_key(self):
+        return signing.dumps(self._session, key=signing_keys()[0],
+                             compress=True, salt=SALT,
+                             serializer=self.serializer)
@@ -0,0 +1,14 @@
+from django.core.mail import EmailMultiAlternatives
+
+from posts.jobs import task
+
+
+@task("send_email")
+def send_email(subject, body, from_email, to, html=None):
+    """
+    Отправляет письмо, подготовленное в запросе.
+    """
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html is not None:
+        message.attach_alternative(html, "text/html")
+    message.send()
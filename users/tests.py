@@ -1,3 +1,134 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from users import checks, lookup
+from users.backends import user_key
+
+User = get_user_model()
+
+
+# В тестах один процесс, поэтому кеш в памяти здесь можно считать общим
+@override_settings(
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+    AUTH_USER_CACHE=True)
+class CachedSessionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="reader",
+                                            password="old-password-123")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_logged_in_request_runs_no_queries(self):
+        self.client.force_login(CachedSessionTest.user)
+        url = reverse("notification_count")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_user_save_invalidates_cache(self):
+        self.client.force_login(CachedSessionTest.user)
+        self.client.get(reverse("notification_count"))
+        self.assertIsNotNone(cache.get(user_key(CachedSessionTest.user.pk)))
+        user = User.objects.get(pk=CachedSessionTest.user.pk)
+        user.set_password("new-password-456")
+        user.save()
+        self.assertIsNone(cache.get(user_key(user.pk)))
+        # смена пароля меняет хеш сессии: старая сессия больше не действует
+        response = self.client.get(reverse("notifications"))
+        self.assertEqual(response.status_code, 302)
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    def test_per_process_cache_is_rejected(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
+        with self.settings(
+                SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+                AUTH_USER_CACHE=True):
+            self.assertEqual(
+                [error.id for error in checks.check_shared_cache(None)],
+                ["users.E001", "users.E002"])
+            with self.settings(CACHES={"default": {
+                    "BACKEND": "django.core.cache.backends.filebased."
+                               "FileBasedCache",
+                    "LOCATION": "/tmp/yatube-check"}}):
+                self.assertEqual(checks.check_shared_cache(None), [])
+
+    def test_sessions_of_model_backend_stay_valid(self):
+        self.assertIn("django.contrib.auth.backends.ModelBackend",
+                      settings.AUTHENTICATION_BACKENDS)
+
+
+@override_settings(SESSION_ENGINE="users.sessions",
+                   SESSION_SIGNING_KEYS=["old-key"])
+class SignedCookieSessionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="cookie")
+
+    def test_old_key_is_accepted_and_rotated(self):
+        self.client.force_login(SignedCookieSessionTest.user)
+        old_cookie = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        url = reverse("notifications")
+        with self.settings(SESSION_SIGNING_KEYS=["new-key", "old-key"]):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            new_cookie = response.cookies[settings.SESSION_COOKIE_NAME].value
+            self.assertNotEqual(new_cookie, old_cookie)
+        with self.settings(SESSION_SIGNING_KEYS=["new-key"]):
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.client.cookies[settings.SESSION_COOKIE_NAME] = old_cookie
+            self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class UsernameLookupTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="renamed")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookup_is_cached_both_ways(self):
+        user = UsernameLookupTest.user
+        self.assertEqual(lookup.user_id("renamed"), user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(lookup.user_id("renamed"), user.pk)
+            self.assertEqual(lookup.username(user.pk), "renamed")
+        self.assertIsNone(lookup.user_id("missing"))
+
+    def test_rename_invalidates_old_name(self):
+        user = User.objects.get(pk=UsernameLookupTest.user.pk)
+        lookup.user_id("renamed")
+        user.username = "new_name"
+        user.save()
+        self.assertIsNone(lookup.user_id("renamed"))
+        self.assertEqual(lookup.username(user.pk), "new_name")
+        self.assertEqual(lookup.user_id("new_name"), user.pk)
+
+    def test_deferred_username_is_not_loaded(self):
+        lookup.user_id("renamed")
+        with self.assertNumQueries(1):
+            lookup.get_user_or_404("renamed", User.objects.only("pk"))
+
+    def test_rename_of_deferred_user_invalidates_old_name(self):
+        lookup.user_id("renamed")
+        user = User.objects.only("pk").get(pk=UsernameLookupTest.user.pk)
+        user.username = "new_name"
+        user.save()
+        self.assertIsNone(lookup.user_id("renamed"))
+        self.assertEqual(lookup.username(user.pk), "new_name")
+
+    def test_stale_entry_is_dropped_on_miss(self):
+        user = UsernameLookupTest.user
+        cache.set(lookup.id_key("renamed"), user.pk + 1000)
+        response = self.client.get(reverse("profile", args=["renamed"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(lookup.user_id("renamed"), user.pk)
@@ -1,10 +1,16 @@
+from django.contrib.auth.views import PasswordResetView
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 urlpatterns = [
     # path() для страницы регистрации нового пользователя
     # её полный адрес будет auth/signup/,
     # но префикс auth/ обрабатывется в головном urls.py
-    path("signup/", views.SignUp.as_view(), name="signup")
+    path("signup/", views.SignUp.as_view(), name="signup"),
+    # письмо со ссылкой для сброса пароля уходит через очередь задач
+    path("password_reset/",
+         PasswordResetView.as_view(form_class=QueuedPasswordResetForm),
+         name="password_reset"),
 ]
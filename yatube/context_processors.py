@@ -1,5 +1,7 @@
 import datetime as dt
 
+from yatube import edge_cache
+
 
 def year(request):
     """
@@ -8,3 +10,11 @@ def year(request):
     return {
         'year': dt.datetime.now().year
     }
+
+
+def shared_page(request):
+    """
+    Флаг общей для всех страницы (yatube.edge_cache): личные части
+    шаблоны оставляют скрытыми для personal/.
+    """
+    return {"edge_cache": edge_cache.is_shared(request)}
@@ -0,0 +1,75 @@
+"""
+Страницы для кеша CDN или обратного прокси (EDGE_CACHE).
+
+Ленты, профиль и страница поста отдаются всем одинаковыми: представление
+и шаблоны видят анонимного посетителя, сессия не читается, поэтому в
+ответе нет Set-Cookie и Vary: Cookie, и его можно пометить
+``Cache-Control: public, s-maxage=EDGE_CACHE_MAX_AGE``. Личные части —
+вход в шапке, кнопки автора и подписки, форма комментария с токеном CSRF,
+ещё не записанные комментарии и рекомендации — страница получает одним
+некешируемым запросом к ``personal/`` (posts.views.personal).
+
+После комментария автор возвращается на адрес с параметром FRESH_PARAM
+(``fresh_url``): такой адрес минует копию в кеше, а его ответ не
+кешируется, поэтому автор сразу видит свой комментарий.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+
+# Сколько id принимает personal/ за один запрос
+MAX_IDS = 100
+
+FRESH_PARAM = "fresh"
+
+
+def is_enabled():
+    return getattr(settings, "EDGE_CACHE", False)
+
+
+def is_shared(request):
+    return getattr(request, "edge_cache", False)
+
+
+def cacheable(view):
+    """
+    Отдаёт страницу в общем для всех варианте с публичными заголовками
+    кеширования, если включён EDGE_CACHE.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_enabled() or request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        request.user = AnonymousUser()
+        request.edge_cache = True
+        response = view(request, *args, **kwargs)
+        if FRESH_PARAM in request.GET:
+            add_never_cache_headers(response)
+        elif response.status_code == 200 and not response.cookies:
+            patch_cache_control(response, public=True, max_age=0,
+                                s_maxage=settings.EDGE_CACHE_MAX_AGE)
+        return response
+    return wrapper
+
+
+def fresh_url(url):
+    """
+    Адрес страницы в обход кеша CDN, если включён EDGE_CACHE.
+    """
+    if not is_enabled():
+        return url
+    return f"{url}?{FRESH_PARAM}={time.time_ns()}"
+
+
+def parse_ids(value):
+    """
+    Список id из строки вида "1,2,3"; мусор пропускается.
+    """
+    ids = []
+    for item in (value or "").split(",")[:MAX_IDS]:
+        if item.strip().isdigit():
+            ids.append(int(item))
+    return ids
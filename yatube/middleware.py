@@ -0,0 +1,57 @@
+"""
+Сжатие ответов gzip на лету.
+
+В отличие от django.middleware.gzip.GZipMiddleware порог размера
+задаётся настройкой GZIP_MIN_SIZE, а каждый кусок потокового ответа
+сбрасывается (Z_SYNC_FLUSH) сразу, чтобы сжатие не задерживало первые
+байты страницы.
+"""
+import zlib
+
+from django.conf import settings
+from django.http import FileResponse
+from django.middleware.gzip import GZipMiddleware as DjangoGZipMiddleware
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+
+def compress_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class GZipMiddleware(DjangoGZipMiddleware):
+    def process_response(self, request, response):
+        # Файлы (статика, медиа, диапазоны байтов) отдаются как есть
+        if (response.has_header("Content-Encoding") or
+                isinstance(response, FileResponse) or
+                response.status_code == 206):
+            return response
+        if (not response.streaming and
+                len(response.content) < settings.GZIP_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not re_accepts_gzip.search(
+                request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content)
+            del response["Content-Length"]
+        else:
+            compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(response.content))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            # Сжатое тело — другое представление: ETag становится слабым
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = "gzip"
+        return response
@@ -0,0 +1,231 @@
+"""
+Отдача файлов без DEBUG: статика с долгим кешированием и выбором заранее
+сжатой копии по Accept-Encoding, медиа с проверкой доступа, передачей
+файла фронт-прокси и поддержкой Range.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Порядок важен: br сжимает лучше gzip
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def is_hashed(path):
+    """
+    Имя файла с хешем из манифеста collectstatic: такой файл не меняется.
+    """
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None)
+    if not hashed_files:
+        return False
+    names = getattr(staticfiles_storage, "hashed_names", None)
+    if names is None:
+        names = staticfiles_storage.hashed_names = set(hashed_files.values())
+    return path in names
+
+
+def parse_accept_encoding(header):
+    """
+    Разбирает Accept-Encoding на принятые (q > 0) и отвергнутые (q=0)
+    кодировки.
+    """
+    accepted, refused = set(), set()
+    for item in header.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else refused).add(name)
+    return accepted, refused
+
+
+def negotiate(request, path):
+    """
+    Выбирает заранее сжатую копию файла, которую принимает клиент.
+    """
+    accepted, refused = parse_accept_encoding(
+        request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    for encoding, suffix in ENCODINGS:
+        if encoding in refused:
+            continue
+        if ((encoding in accepted or "*" in accepted) and
+                os.path.isfile(path + suffix)):
+            return path + suffix, encoding
+    return path, None
+
+
+def resolve(root, path):
+    try:
+        full_path = safe_join(root, path)
+    except ValueError:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+    return full_path
+
+
+def make_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def not_modified(request, stat, etag):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is not None:
+        return etag in if_none_match or if_none_match.strip() == "*"
+    return not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"),
+                                  stat.st_mtime, stat.st_size)
+
+
+def parse_range(request, stat, etag):
+    """
+    Возвращает (начало, конец) запрошенного диапазона байтов, None для
+    ответа целиком или False, если диапазон невыполним.
+    """
+    header = request.META.get("HTTP_RANGE")
+    if not header:
+        return None
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range and if_range != etag:
+        if parse_http_date_safe(if_range) != int(stat.st_mtime):
+            return None
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ("", ""):
+        # Несколько диапазонов не поддерживаем — отдаём файл целиком
+        return None
+    start, end = match.groups()
+    size = stat.st_size
+    if start == "":
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request, path, stat, content_type):
+    """
+    Ответ с файлом: передача фронт-прокси (MEDIA_ACCEL), диапазон байтов
+    или FileResponse, который WSGI-сервер отдаёт через sendfile.
+    """
+    accel = settings.MEDIA_ACCEL
+    if accel == "nginx":
+        response = HttpResponse(content_type=content_type)
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        response["X-Accel-Redirect"] = (settings.MEDIA_ACCEL_PREFIX +
+                                        quote(relative))
+        return response
+    if accel == "sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+        return response
+    etag = make_etag(stat)
+    byte_range = parse_range(request, stat, etag)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return response
+    if byte_range is None:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(path, start, end - start + 1), status=206,
+            content_type=content_type)
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+@require_safe
+def static_asset(request, path):
+    """
+    Отдача собранной статики из STATIC_ROOT
+    """
+    full_path = resolve(settings.STATIC_ROOT, path)
+    if is_hashed(path):
+        cache_control = IMMUTABLE
+    else:
+        cache_control = f"public, max-age={settings.STATIC_MAX_AGE}"
+    served_path, encoding = negotiate(request, full_path)
+    stat = os.stat(served_path)
+    if not_modified(request, stat, make_etag(stat)):
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(full_path)[0]
+        response = FileResponse(open(served_path, "rb"),
+                                content_type=content_type or
+                                "application/octet-stream")
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        response["ETag"] = make_etag(stat)
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["Cache-Control"] = cache_control
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def media_allowed(request, path):
+    """
+    Проверка доступа к файлу из MEDIA_ROOT: открыты только каталоги
+    из MEDIA_PUBLIC_PREFIXES.
+    """
+    path = posixpath.normpath(path)
+    return path.startswith(tuple(settings.MEDIA_PUBLIC_PREFIXES))
+
+
+@require_safe
+def media_file(request, path):
+    """
+    Отдача загруженных картинок и миниатюр из MEDIA_ROOT
+    """
+    if not media_allowed(request, path):
+        raise Http404(path)
+    full_path = resolve(settings.MEDIA_ROOT, path)
+    stat = os.stat(full_path)
+    etag = make_etag(stat)
+    if not_modified(request, stat, etag):
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(full_path)[0]
+        response = file_response(request, full_path, stat,
+                                 content_type or "application/octet-stream")
+        response["Last-Modified"] = http_date(stat.st_mtime)
+    response["ETag"] = etag
+    response["Cache-Control"] = f"public, max-age={settings.MEDIA_MAX_AGE}"
+    return response
@@ -10,27 +10,46 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import importlib.util
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Профиль настроек (YATUBE_ENV): development — отладка и debug_toolbar,
+# production — без отладки и лишних middleware, с кешем шаблонов
+# и постоянными соединениями с базой
+YATUBE_ENV = os.environ.get("YATUBE_ENV", "development")
+if YATUBE_ENV not in ("development", "production"):
+    raise ImproperlyConfigured(f"Неизвестный YATUBE_ENV: {YATUBE_ENV}")
+PRODUCTION = YATUBE_ENV == "production"
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = ')_p3vctyu9a@6&_ic#u0p)kfpemf7umq+a=ukl_%+8o=v2xct2'
+SECRET_KEY = os.environ.get("YATUBE_SECRET_KEY")
+if not SECRET_KEY:
+    if PRODUCTION:
+        raise ImproperlyConfigured("В production нужен YATUBE_SECRET_KEY")
+    SECRET_KEY = ')_p3vctyu9a@6&_ic#u0p)kfpemf7umq+a=ukl_%+8o=v2xct2'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = [
-    "localhost",
-    "127.0.0.1",
-    "[::1]",
-    "testserver",
-    "*",
-]
+DEBUG = not PRODUCTION
+
+if PRODUCTION:
+    ALLOWED_HOSTS = os.environ.get("YATUBE_ALLOWED_HOSTS",
+                                   "localhost,127.0.0.1").split(",")
+else:
+    ALLOWED_HOSTS = [
+        "localhost",
+        "127.0.0.1",
+        "[::1]",
+        "testserver",
+        "*",
+    ]
 
 INTERNAL_IPS = [
     "127.0.0.1",
@@ -52,10 +71,13 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
     # 'rest_framework.authtoken',
 ]
 
+# Ничего лишнего для публичных страниц здесь нет: MessageMiddleware
+# нужен админке (admin.E409) и читает cookie сообщений лениво, только
+# когда шаблон выводит messages; CommonMiddleware добавляет косую черту
+# в адреса, XFrameOptionsMiddleware запрещает показ страниц во фрейме
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -64,9 +86,32 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# debug_toolbar — необязательная зависимость для разработки: find_spec
+# не импортирует пакет, а в production он не подключается вовсе
+DEBUG_TOOLBAR = (DEBUG and
+                 importlib.util.find_spec("debug_toolbar") is not None)
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
+# Сжатие ответов gzip на лету (yatube.middleware): ответы короче
+# GZIP_MIN_SIZE байт не сжимаются
+GZIP_RESPONSES = os.environ.get("YATUBE_GZIP") == "1"
+GZIP_MIN_SIZE = 1024
+if GZIP_RESPONSES:
+    MIDDLEWARE.insert(1, "yatube.middleware.GZipMiddleware")
+
+# Потоковая отрисовка лент и страницы поста (yatube.streaming)
+STREAMING_RENDER = os.environ.get("YATUBE_STREAMING") == "1"
+
+# Ленты, профиль и страница поста без личных частей с заголовком
+# Cache-Control: public для CDN (yatube.edge_cache); личное страница
+# догружает запросом к personal/. EDGE_CACHE_MAX_AGE — s-maxage, секунды
+EDGE_CACHE = os.environ.get("YATUBE_EDGE_CACHE") == "1"
+EDGE_CACHE_MAX_AGE = 60
+
 ROOT_URLCONF = 'yatube.urls'
 
 LOGIN_URL = "/auth/login/"
@@ -77,7 +122,7 @@ LOGIN_REDIRECT_URL = "index"
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': ['templates'],
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -85,12 +130,26 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'yatube.context_processors.year'
+                'yatube.context_processors.year',
+                'yatube.context_processors.shared_page',
             ],
         },
     },
 ]
 
+if PRODUCTION:
+    # Шаблоны разбираются один раз на процесс; контекст для отладки
+    # не нужен
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        ("django.template.loaders.cached.Loader", [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ]),
+    ]
+    TEMPLATES[0]["OPTIONS"]["context_processors"].remove(
+        "django.template.context_processors.debug")
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 # Database
@@ -100,6 +159,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами, а не открывается на каждый
+        'CONN_MAX_AGE': int(os.environ.get("YATUBE_CONN_MAX_AGE",
+                                           60 if PRODUCTION else 0)),
     }
 }
 
@@ -149,20 +211,207 @@ STATIC_URL = '/static/'
 # статика
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
+# Продакшен-режим статики: collectstatic добавляет к именам хеш содержимого
+# и сохраняет сжатые копии (.gz, .br при установленном brotli), а Django
+# отдаёт их с заголовками долгого кеширования
+STATIC_PRODUCTION = os.environ.get("YATUBE_STATIC_PRODUCTION",
+                                   "1" if PRODUCTION else "0") == "1"
+if STATIC_PRODUCTION:
+    STATICFILES_STORAGE = (
+        "yatube.storage.CompressedManifestStaticFilesStorage")
+# Время кеширования статики без хеша в имени, секунды
+STATIC_MAX_AGE = 60 * 60
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Каталоги MEDIA_ROOT, доступные всем (картинки постов и миниатюры sorl)
+MEDIA_PUBLIC_PREFIXES = ("posts/", "cache/")
+# Кто передаёт файл клиенту: None — Django (sendfile WSGI-сервера),
+# "nginx" — заголовок X-Accel-Redirect, "sendfile" — X-Sendfile
+# (Apache mod_xsendfile, lighttpd)
+MEDIA_ACCEL = os.environ.get("YATUBE_MEDIA_ACCEL") or None
+# internal-location nginx, указывающий на MEDIA_ROOT
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+MEDIA_MAX_AGE = 24 * 60 * 60
 
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Кеш. LocMemCache у каждого процесса свой: сброшенные фрагменты,
+# счётчики ограничения частоты и скрытые объекты видит только один
+# воркер. Файловый и DatabaseCache не годятся тоже: incr и add у них —
+# неатомарные чтение и запись, а при MAX_ENTRIES они удаляют случайную
+# треть ключей. Поэтому в production — только memcached или redis
+# (YATUBE_CACHE_BACKEND, YATUBE_CACHE_LOCATION), по умолчанию memcached
+# на этом же сервере
+LOCMEM_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+SHARED_CACHES = {
+    "django.core.cache.backends.memcached.MemcachedCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+    "django_redis.cache.RedisCache",
+}
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.environ.get(
+            "YATUBE_CACHE_BACKEND",
+            "django.core.cache.backends.memcached.MemcachedCache"
+            if PRODUCTION else LOCMEM_CACHE),
+        'LOCATION': os.environ.get(
+            "YATUBE_CACHE_LOCATION",
+            "127.0.0.1:11211" if PRODUCTION else ""),
     }
 }
+if PRODUCTION and CACHES["default"]["BACKEND"] not in SHARED_CACHES:
+    raise ImproperlyConfigured(
+        "В production нужен memcached или redis, а не "
+        f"{CACHES['default']['BACKEND']}")
+
+# Хранилище сессий: db — только база (по умолчанию), cached_db — кеш
+# с записью в базу, signed_cookies — подписанная cookie без обращений
+# к серверу. Ключи подписи cookie — SESSION_SIGNING_KEYS, первый — текущий.
+# cached_db допустим только с общим для всех процессов кешем (проверка
+# users.E001): иначе выход действует лишь в одном процессе
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "users.sessions",
+}
+SESSION_ENGINE = SESSION_ENGINES[
+    os.environ.get("YATUBE_SESSION_ENGINE", "db")]
+SESSION_SIGNING_KEYS = [
+    key for key in os.environ.get("YATUBE_SESSION_KEYS", "").split(",")
+    if key]
+
+# Пользователь для request.user берётся из кеша (users.backends), если
+# AUTH_USER_CACHE; как и cached_db, только с общим кешем (users.E002).
+# ModelBackend остаётся в списке для сессий, созданных с ним
+AUTHENTICATION_BACKENDS = [
+    "users.backends.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+AUTH_USER_CACHE = os.environ.get("YATUBE_AUTH_USER_CACHE") == "1"
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
 
 COUNT_POSTS = 10
+# Размер пачки массовых операций с постами в админке (posts.bulk)
+ADMIN_BULK_BATCH_SIZE = 500
+# Сколько живёт в кеше общая часть страницы поста (posts.fragments)
+POST_DETAIL_TIMEOUT = 10 * 60
+# Сколько живут в кеше счётчики постов для пагинатора (posts.counters)
+COUNTERS_TIMEOUT = 60 * 60
+
+# Варианты миниатюр картинок постов (posts.thumbnails): ширины при
+# пропорциях THUMBNAIL_ASPECT и форматы; последний формат — запасной
+# для браузеров без поддержки остальных
+THUMBNAIL_ASPECT = (960, 339)
+THUMBNAIL_WIDTHS = (480, 960, 1440)
+THUMBNAIL_DEFAULT_WIDTH = 960
+THUMBNAIL_FORMATS = ("WEBP", "JPEG")
+THUMBNAIL_SIZES = "(max-width: 576px) 100vw, 960px"
+
+# Ограничение частоты запросов (posts.ratelimit): "число/период",
+# период — s, m, h или d
+RATELIMIT_ENABLE = True
+RATELIMIT_CACHE = "default"
+RATELIMIT_TRUST_FORWARDED = False
+RATELIMITS = {
+    "new_post": {"user": "10/m", "ip": "60/m"},
+    "add_comment": {"user": "20/m", "ip": "120/m"},
+    "profile_follow": {"user": "60/m", "ip": "300/m"},
+}
+
+# Отложенная пакетная запись комментариев (posts.comment_buffer)
+COMMENT_BUFFER = {
+    "ENABLED": False,
+    "BATCH_SIZE": 50,
+    "FLUSH_INTERVAL": 2.0,
+    "DURABILITY": "journal",
+    "JOURNAL_DIR": os.path.join(BASE_DIR, "comment_journal"),
+}
+
+# Популярные посты (posts.trending): период полураспада вклада
+# комментария в секундах, длина ленты и порог, ниже которого рейтинг
+# удаляет manage.py compact_trending
+TRENDING = {
+    "HALF_LIFE": 6 * 60 * 60,
+    "TOP": 20,
+    "MIN_SCORE": 0.5,
+}
+
+# Уведомления подписчиков о новых постах (posts.notifications)
+NOTIFICATIONS = {
+    "BATCH_SIZE": 500,
+    "INBOX_SIZE": 50,
+    "COUNT_TIMEOUT": 30,
+}
+
+# Проверка текстов по списку запрещённых слов (posts.moderation)
+MODERATION = {
+    "RULES_FILE": os.path.join(BASE_DIR, "posts", "moderation_rules.txt"),
+    "RELOAD_INTERVAL": 5,
+}
+
+# Почти одинаковые посты (posts.duplicates): reject — отклонять,
+# flag — отмечать похожий пост, off — не проверять
+NEAR_DUPLICATES = {
+    "MODE": "reject",
+    "DISTANCE": 3,
+    "WINDOW": 24 * 60 * 60,
+    "MIN_TOKENS": 8,
+}
+
+# Рекомендации авторов (posts.recommendations, manage.py
+# build_recommendations, нужен NumPy): сколько хранить и показывать,
+# сколько связей вершины учитывать и сколько путей считать за один блок
+RECOMMENDATIONS = {
+    "TOP": 20,
+    "SHOW": 5,
+    "MAX_FANOUT": 50,
+    "CO_FOLLOW_WEIGHT": 0.25,
+    "MAX_PAIRS": 2000000,
+    "LOAD_BATCH": 100000,
+}
+
+# Дневные сводки активности (posts.rollups, manage.py rollup_activity):
+# размер пачки, возраст строк, которые ещё не учитываются (секунды),
+# и период и длина списков панели /analytics/ по умолчанию
+ROLLUPS = {
+    "BATCH_SIZE": 10000,
+    "LAG": 5 * 60,
+    "DAYS": 30,
+    "TOP": 10,
+}
+
+# Удаление пользователей, групп и постов в фоне (posts.deletion,
+# manage.py process_deletions): размер пачки, сколько секунд подряд
+# удаляет одна фоновая задача и сколько секунд другие процессы могут
+# ещё показывать только что скрытый объект
+DELETION = {
+    "BATCH_SIZE": 500,
+    "JOB_TIME_LIMIT": 60,
+    "HIDDEN_TIMEOUT": 5,
+}
+
+# Прогрев кеша (posts.warmup, manage.py warm_cache): сколько страниц
+# главной, групп и профилей запрашивать и в сколько потоков. ON_START —
+# прогревать кеш при старте каждого воркера (YATUBE_WARMUP=1;
+# с gunicorn --preload поток остался бы в мастер-процессе)
+WARMUP = {
+    "PAGES": 3,
+    "GROUPS": 10,
+    "AUTHORS": 10,
+    "CONCURRENCY": 4,
+    "TIMEOUT": 30,
+    "ON_START": os.environ.get("YATUBE_WARMUP") == "1",
+}
+
+# Фоновые задачи (posts.jobs, manage.py run_jobs)
+JOBS = {
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF": 10,
+    "LOCK_TIMEOUT": 10 * 60,
+}
 
 # REST_FRAMEWORK = {
 #     'DEFAULT_PERMISSION_CLASSES': [
@@ -0,0 +1,48 @@
+"""
+Хранилище статики для продакшена: имена файлов с хешем содержимого
+и заранее сжатые копии .gz (и .br, если установлен пакет brotli).
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".map", ".svg", ".json", ".txt", ".html",
+                ".xml", ".ico", ".ttf", ".otf", ".eot")
+# Файлы меньше этого размера сжимать бессмысленно
+MIN_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = []
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in set(hashed):
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_SIZE:
+            return
+        variants = {".gz": gzip.compress(content, 9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(content)
+        for suffix, compressed in variants.items():
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
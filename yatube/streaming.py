@@ -0,0 +1,104 @@
+"""
+Потоковая отрисовка страниц: StreamingHttpResponse отдаёт <head>, шапку
+и разметку базового шаблона, пока содержимое страницы ещё отрисовывается.
+
+Включается настройкой STREAMING_RENDER; иначе ``render`` ведёт себя как
+``django.shortcuts.render``. Базовый шаблон и его блоки выводятся по
+узлам верхнего уровня, каждый узел — отдельный кусок ответа.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render as render_page
+from django.template import loader
+from django.template.context import make_context
+from django.template.loader_tags import (BLOCK_CONTEXT_KEY, BlockContext,
+                                         BlockNode, ExtendsNode)
+from django.utils.cache import patch_vary_headers
+
+from yatube import edge_cache
+
+
+def iter_block(node, context):
+    """
+    То же, что BlockNode.render, но по дочерним узлам.
+    """
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context["block"] = node
+            yield from iter_nodes(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context["block"] = block
+        yield from iter_nodes(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def iter_extends(node, context):
+    """
+    То же, что ExtendsNode.render, но с потоковым выводом родителя.
+    """
+    parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    extends = next((item for item in parent.nodelist
+                    if isinstance(item, ExtendsNode)), None)
+    if extends is None:
+        block_context.add_blocks({
+            item.name: item
+            for item in parent.nodelist.get_nodes_by_type(BlockNode)})
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from iter_nodes(parent.nodelist, context)
+
+
+def iter_nodes(nodelist, context):
+    for node in nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from iter_extends(node, context)
+            return
+        if isinstance(node, BlockNode):
+            yield from iter_block(node, context)
+        else:
+            chunk = node.render_annotated(context)
+            if chunk:
+                yield str(chunk)
+
+
+def stream_template(template, context):
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            yield from iter_nodes(template.nodelist, context)
+
+
+def render(request, template_name, context=None, content_type=None,
+           status=None):
+    """
+    Замена django.shortcuts.render с потоковым выводом при
+    STREAMING_RENDER.
+    """
+    if not settings.STREAMING_RENDER:
+        return render_page(request, template_name, context, content_type,
+                           status)
+    backend_template = loader.get_template(template_name)
+    template = backend_template.template
+    page_context = make_context(
+        context, request,
+        autoescape=backend_template.backend.engine.autoescape)
+    response = StreamingHttpResponse(
+        stream_template(template, page_context), content_type=content_type,
+        status=status)
+    if not edge_cache.is_shared(request):
+        # Шаблон отрисовывается уже после process_response промежуточных
+        # слоёв: cookie CSRF и Vary по сессии выставляем заранее
+        get_token(request)
+        patch_vary_headers(response, ("Cookie",))
+    return response
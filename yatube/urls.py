@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.contrib.flatpages import views
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf.urls import handler404, handler500
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import serve
+
 handler404 = "posts.views.page_not_found"  # noqa
 handler500 = "posts.views.server_error"  # noqa
 
@@ -17,14 +19,21 @@ urlpatterns = [
     path('about-spec/', views.flatpage,
          {'url': '/about-spec/'}, name='spec'),
     path("auth/", include("django.contrib.auth.urls")),
+    re_path(r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"),
+            serve.media_file, name="media"),
     path("", include("posts.urls")),
 
 ]
 
-if settings.DEBUG:
-    import debug_toolbar
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
+if settings.STATIC_PRODUCTION:
+    urlpatterns.insert(0, re_path(
+        r"^%s(?P<path>.*)$" % settings.STATIC_URL.lstrip("/"),
+        serve.static_asset, name="static_asset"))
+
+if settings.DEBUG and not settings.STATIC_PRODUCTION:
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)
+
+if settings.DEBUG_TOOLBAR:
+    import debug_toolbar
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
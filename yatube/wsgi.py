@@ -8,9 +8,24 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
 
 import os
+import threading
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.PRODUCTION:
+    # Представления импортируются при старте процесса (до fork при
+    # gunicorn --preload), а не в первом запросе
+    get_resolver().url_patterns
+
+if settings.WARMUP.get("ON_START"):
+    from posts import warmup
+
+    # Кеш прогревается в фоне, пока воркер уже отвечает на запросы
+    # (с LocMemCache — у каждого воркера свой)
+    threading.Thread(target=warmup.run, daemon=True).start()